@@ -0,0 +1,88 @@
+"""Serialization throughput of admin listings: raw ORM rows vs typed responses.
+
+The "before" path mirrors what the admin routes used to do: return
+``{"admissions": rows}`` and let FastAPI run ``jsonable_encoder`` over every
+ORM instance before ``json.dumps``. The "after" path validates rows into the
+admin response models and renders them with ``PydanticJSONResponse``.
+
+    python -m benchmarks.admin_serialization --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import benchmarks  # noqa: F401  (fills in placeholder settings)
+from fastapi.encoders import jsonable_encoder
+
+from src.admin.schemas import AdmissionFormResponse, AdmissionListResponse
+from src.db.models import AdmissionForm, AdmissionStatus
+from src.responses import PydanticJSONResponse
+
+
+def build_rows(count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        AdmissionForm(
+            id=i,
+            form_id=f"{i:036d}",
+            student_id=None,
+            parent_id=i % 500 + 1,
+            purchase_id=i,
+            student_first_name="Ama",
+            student_last_name=f"Mensah{i}",
+            student_dob=now,
+            student_contact="0240000000",
+            student_email=f"student{i}@example.com",
+            parent_first_name="Kofi",
+            parent_last_name=f"Mensah{i}",
+            parent_relationship="father",
+            parent_contact="0200000000",
+            parent_email=f"parent{i}@example.com",
+            intended_grade="Grade 5",
+            previous_school="XYZ Academy",
+            medical_conditions=None,
+            status=AdmissionStatus.PENDING,
+            submission_date=now,
+            processed_by_id=None,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def before(rows) -> bytes:
+    return json.dumps(jsonable_encoder({"admissions": rows})).encode("utf-8")
+
+
+def after(rows) -> bytes:
+    payload = AdmissionListResponse(admissions=[AdmissionFormResponse.model_validate(row) for row in rows])
+    return PydanticJSONResponse(payload).body
+
+
+def measure(label: str, fn, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<8} best {best * 1000:8.1f} ms  {len(rows) / best:10.0f} rows/s  {len(body) / 1024:8.0f} KiB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    assert json.loads(before(rows[:10]))["admissions"][0]["id"] == json.loads(after(rows[:10]))["admissions"][0]["id"]
+
+    slow = measure("before", before, rows, args.repeat)
+    fast = measure("after", after, rows, args.repeat)
+    print(f"speedup  {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Database round trips per admission application: step-by-step vs single transaction.
+
+The "before" path mirrors the old ``apply_for_admission``: verify the token
+with NOT EXISTS, look up the student, look up the parent, insert user and
+parent with a flush each, then commit and refresh the form. The "after" path
+is the current ``AdmissionService.apply_for_admission``.
+
+Round trips are counted from engine events: every executed statement plus each
+BEGIN and COMMIT. Run it against a scratch database; the tables are created
+and rows are added:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.apply_round_trips --applications 50
+
+New-parent applications use a data-modifying CTE and need PostgreSQL; on other
+databases only the existing-parent case is measured.
+"""
+import argparse
+import asyncio
+import secrets
+import time
+import uuid
+from datetime import datetime
+
+import benchmarks  # noqa: F401  (fills in placeholder settings)
+from sqlalchemy import event, exists, or_, select
+
+from src.admissionservice.schemas import ApplicationFormCreate
+from src.admissionservice.services import AdmissionService
+from src.authservice.utils import generate_password_hash
+from src.db.main import AsyncSessionLocal, async_engine, init_db
+from src.db.models import (AdmissionForm, AdmissionStatus, Gender, Parent, PurchaseAdmissionForm, Role, RoleEnum,
+                           Student, User)
+
+
+class RoundTrips:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+async def legacy_apply(form_data: ApplicationFormCreate, session) -> AdmissionForm:
+    """The pre-pipeline sequence of queries, kept here as the baseline"""
+    purchase = (await session.execute(
+        select(PurchaseAdmissionForm)
+        .where(PurchaseAdmissionForm.serial_token == form_data.purchase_token)
+        .where(~exists().where(AdmissionForm.purchase_id == PurchaseAdmissionForm.id))
+    )).scalars().first()
+
+    query = select(Student).join(User).where(User.email == form_data.student.email)
+    if form_data.student.enrollment_number:
+        query = query.where(or_(User.email == form_data.student.email,
+                                Student.enrollment_number == form_data.student.enrollment_number))
+    student = (await session.execute(query)).scalars().first()
+
+    parent = (await session.execute(
+        select(Parent).join(User).where(User.email == form_data.parent.email)
+    )).scalars().first()
+    if not parent:
+        parent_user = User(
+            first_name=form_data.parent.first_name, last_name=form_data.parent.last_name,
+            gender=Gender.PREFER_NOT_TO_SAY, contact_number=form_data.parent.contact_number,
+            email=form_data.parent.email, username=form_data.parent.email,
+            password_hash=generate_password_hash(secrets.token_urlsafe(12)), is_active=False
+        )
+        session.add(parent_user)
+        await session.flush()
+        parent = Parent(user_id=parent_user.id, relationship_type=form_data.parent.relationship)
+        session.add(parent)
+        await session.flush()
+
+    form = AdmissionForm(
+        form_id=str(uuid.uuid4()), purchase_id=purchase.id, student_id=student.id if student else None,
+        parent_id=parent.id, student_first_name=form_data.student.first_name,
+        student_last_name=form_data.student.last_name, student_dob=form_data.student.date_of_birth,
+        student_contact=form_data.student.contact_number, student_email=form_data.student.email,
+        parent_first_name=form_data.parent.first_name, parent_last_name=form_data.parent.last_name,
+        parent_relationship=form_data.parent.relationship, parent_contact=form_data.parent.contact_number,
+        parent_email=form_data.parent.email, intended_grade=form_data.intended_grade,
+        status=AdmissionStatus.PENDING, submission_date=datetime.utcnow()
+    )
+    session.add(form)
+    await session.commit()
+    await session.refresh(form)
+    return form
+
+
+async def seed(count: int, run_id: str):
+    """Purchases for both paths, plus one existing parent account"""
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        if not (await session.execute(select(Role).where(Role.name == RoleEnum.PARENT))).scalars().first():
+            session.add(Role(name=RoleEnum.PARENT))
+        user = User(first_name="Existing", last_name="Parent", gender=Gender.OTHER, contact_number="0200000000",
+                    email=f"parent-{run_id}@example.com", username=f"parent-{run_id}", password_hash="x")
+        session.add(user)
+        await session.flush()
+        session.add(Parent(user_id=user.id, relationship_type="mother"))
+        tokens = [f"{run_id}-{i}" for i in range(count * 4)]
+        session.add_all([
+            PurchaseAdmissionForm(first_name="Buyer", last_name=str(i), contact="0240000000",
+                                  email="buyer@example.com", amount=50.0, serial_token=token)
+            for i, token in enumerate(tokens)
+        ])
+        await session.commit()
+    return tokens
+
+
+def application(token: str, parent_email: str, index: int) -> ApplicationFormCreate:
+    return ApplicationFormCreate(
+        student=dict(first_name="Kid", last_name=str(index), contact_number="0240000000",
+                     email=f"kid-{token}@example.com"),
+        parent=dict(first_name="Parent", last_name=str(index), relationship="mother",
+                    contact_number="0200000000", email=parent_email),
+        intended_grade="Grade 1",
+        purchase_token=token
+    )
+
+
+async def measure(name: str, apply, forms) -> None:
+    counter = RoundTrips()
+    sync_engine = async_engine.sync_engine
+    for event_name in ("before_cursor_execute", "begin", "commit"):
+        event.listen(sync_engine, event_name, counter)
+    start = time.perf_counter()
+    try:
+        for form in forms:
+            async with AsyncSessionLocal() as session:
+                await apply(form, session)
+    finally:
+        for event_name in ("before_cursor_execute", "begin", "commit"):
+            event.remove(sync_engine, event_name, counter)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {counter.count / len(forms):>12.1f} {elapsed / len(forms) * 1000:>12.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=50)
+    args = parser.parse_args()
+
+    count = args.applications
+    run_id = uuid.uuid4().hex[:8]
+    tokens = iter(await seed(count, run_id))
+    existing = f"parent-{run_id}@example.com"
+    service = AdmissionService()
+
+    print(f"{'path':<32} {'round trips':>12} {'ms / app':>12}")
+    await measure("existing parent, before", legacy_apply,
+                  [application(next(tokens), existing, i) for i in range(count)])
+    await measure("existing parent, after", service.apply_for_admission,
+                  [application(next(tokens), existing, i) for i in range(count)])
+    if async_engine.dialect.name == "postgresql":
+        await measure("new parent, before", legacy_apply,
+                      [application(next(tokens), f"new-{run_id}-a{i}@example.com", i) for i in range(count)])
+        await measure("new parent, after", service.apply_for_admission,
+                      [application(next(tokens), f"new-{run_id}-b{i}@example.com", i) for i in range(count)])
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
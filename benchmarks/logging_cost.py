@@ -0,0 +1,117 @@
+"""Per-request logging cost on the request's thread: direct writes vs the queue pipeline.
+
+A simulated request logs what user creation used to log: six INFO lines with
+f-string messages. Each setup writes to a stream that sleeps for
+``--write-latency-ms`` per write, standing in for a slow or back-pressured stdout
+(a container log pipe, a terminal):
+
+- print:         print() straight to the stream
+- stream:        logging.StreamHandler with a text formatter (the old setup)
+- queue json:    src.log_config pipeline: queue handler, JSON written by a listener thread
+- queue sampled: the same with LOG_INFO_SAMPLE_RATE at 10%, decided per request id
+
+Only the time spent in the log calls themselves is measured; that is the time
+the event loop cannot serve other requests.
+
+    python -m benchmarks.logging_cost --requests 2000 --write-latency-ms 0.2
+"""
+import argparse
+import io
+import logging
+import logging.handlers
+import queue
+import time
+import uuid
+
+import benchmarks  # noqa: F401  (fills in placeholder settings)
+
+from src.config import Config
+from src.log_config import JSONFormatter, NonBlockingQueueHandler, RequestSampler, request_id_var
+
+LINES_PER_REQUEST = 6
+
+
+class SlowStream(io.TextIOBase):
+    """Discards text, taking a fixed time per write like a congested pipe"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def simulated_request(log, email: str, user_id: int) -> None:
+    log(f"Starting user creation for email: {email}")
+    log("Looking for role: STUDENT")
+    log("Role STUDENT found")
+    log(f"Creating user with data: {['first_name', 'last_name', 'email', 'username']}")
+    log(f"User created with ID: {user_id}")
+    log(f"User creation successful for email: {email}, ID: {user_id}")
+
+
+def run(name: str, log, requests: int, stream: SlowStream, drain=None) -> None:
+    elapsed = 0.0
+    for i in range(requests):
+        token = request_id_var.set(uuid.uuid4().hex)
+        start = time.perf_counter()
+        simulated_request(log, f"user{i}@example.com", i)
+        elapsed += time.perf_counter() - start
+        request_id_var.reset(token)
+    drained = 0.0
+    if drain is not None:
+        start = time.perf_counter()
+        drain()
+        drained = time.perf_counter() - start
+    print(f"{name:<16} {elapsed / requests * 1e6:>14.1f} {elapsed / (requests * LINES_PER_REQUEST) * 1e6:>12.2f} "
+          f"{stream.writes:>9} {drained * 1000:>13.1f}")
+
+
+def bench_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-latency-ms", type=float, default=0.2)
+    args = parser.parse_args()
+    latency = args.write_latency_ms / 1000
+
+    print(f"{args.requests} requests x {LINES_PER_REQUEST} lines, {args.write_latency_ms} ms per write")
+    print(f"{'setup':<16} {'us / request':>14} {'us / line':>12} {'writes':>9} {'drain ms':>13}")
+
+    stream = SlowStream(latency)
+    run("print", lambda message: print(message, file=stream), args.requests, stream)
+
+    stream = SlowStream(latency)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    run("stream", bench_logger("stream", handler).info, args.requests, stream)
+
+    for name, rate in (("queue json", 1.0), ("queue sampled", 0.1)):
+        Config.LOG_INFO_SAMPLE_RATE = rate
+        stream = SlowStream(latency)
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JSONFormatter())
+        # Large enough that nothing is dropped; the point is the caller's cost
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=args.requests * LINES_PER_REQUEST))
+        handler.addFilter(RequestSampler())
+        listener = logging.handlers.QueueListener(handler.queue, output)
+        listener.start()
+        run(name, bench_logger(name.replace(" ", "_"), handler).info, args.requests, stream, drain=listener.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Mail throughput and tail latency through the pooled SMTP sender.
+
+Drives ``send_welcome_email``, ``send_serial_token``,
+``send_approve_admission_email`` and ``send_decline_admission_email`` with a
+fixed number of sends in flight, the way the outbox worker does, and reports
+messages/sec and latency percentiles per helper. Latency is measured per call,
+so it includes waiting for a pooled connection.
+
+By default an in-process ``benchmarks.smtp_sink`` receives the mail; use
+``--server host:port`` to target a sink in another process (its event loop
+then stops competing with the senders) or a real test provider:
+
+    python -m benchmarks.mail_throughput --messages 2000 --concurrency 20 --pool-size 5 --latency-ms 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import benchmarks  # noqa: F401  (fills in placeholder settings)
+
+from benchmarks.smtp_sink import SMTPSink
+from src.config import Config
+from src.email_templates import email_templates
+from src.mail import send_approve_admission_email, send_decline_admission_email, send_serial_token, send_welcome_email
+from src.smtp_pool import smtp_pool
+
+SENDERS = {
+    "send_welcome_email": lambda i: send_welcome_email(f"user{i}@example.com", f"Temp-{i:08d}"),
+    "send_serial_token": lambda i: send_serial_token(f"buyer{i}@example.com", f"TOKEN-{i:012d}"),
+    "send_approve_admission_email": lambda i: send_approve_admission_email(f"parent{i}@example.com", i),
+    "send_decline_admission_email": lambda i: send_decline_admission_email(f"parent{i}@example.com", i),
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def drive(send: Callable[[int], Awaitable[None]], count: int, concurrency: int):
+    """Run `count` sends with at most `concurrency` in flight; returns latencies, failures and elapsed time"""
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await send(i)
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies, failures, time.perf_counter() - start
+
+
+def report(name: str, latencies: List[float], failures: int, elapsed: float) -> None:
+    ms = [latency * 1000 for latency in latencies]
+    print(f"{name:<30} {len(ms):>7} {failures:>6} {len(ms) / elapsed:>9.1f} "
+          f"{statistics.median(ms) if ms else 0.0:>8.2f} {percentile(ms, 0.95):>8.2f} "
+          f"{percentile(ms, 0.99):>8.2f} {max(ms, default=0.0):>8.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="sends per helper")
+    parser.add_argument("--concurrency", type=int, default=Config.OUTBOX_CONCURRENCY)
+    parser.add_argument("--pool-size", type=int, default=Config.MAIL_POOL_SIZE)
+    parser.add_argument("--server", help="host:port of an external SMTP server instead of the in-process sink")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="in-process sink only")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="in-process sink only")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="in-process sink only")
+    args = parser.parse_args()
+
+    sink: Optional[SMTPSink] = None
+    if args.server:
+        host, port = args.server.rsplit(":", 1)
+    else:
+        sink = SMTPSink(args.latency_ms, args.fail_rate, args.drop_rate, seed=0)
+        await sink.start()
+        host, port = "127.0.0.1", sink.port
+    Config.MAIL_SERVER = host
+    Config.MAIL_PORT = int(port)
+    Config.MAIL_STARTTLS = False
+    Config.MAIL_SSL_TLS = False
+    Config.MAIL_POOL_SIZE = args.pool_size
+    email_templates.load()
+
+    print(f"{args.messages} sends per helper, {args.concurrency} in flight, {args.pool_size} SMTP connections")
+    print(f"{'helper':<30} {'sent':>7} {'failed':>6} {'msg/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    all_latencies: List[float] = []
+    all_failures = 0
+    total_elapsed = 0.0
+    try:
+        for name, send in SENDERS.items():
+            latencies, failures, elapsed = await drive(send, args.messages, args.concurrency)
+            report(name, latencies, failures, elapsed)
+            all_latencies += latencies
+            all_failures += failures
+            total_elapsed += elapsed
+        report("all", all_latencies, all_failures, total_elapsed)
+    finally:
+        await smtp_pool.close()
+        if sink is not None:
+            await sink.stop()
+
+    print(f"pool: {smtp_pool.stats()}")
+    if sink is not None:
+        print(f"sink: {sink.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""Latency and allocations of read-only list endpoints: ORM entities vs column rows.
+
+Each endpoint query runs twice against an in-memory SQLite database: once
+loading full entities into the identity map and copying attributes into the
+response schema (the old path), and once selecting only the schema's columns
+as rows (``columns_for`` + ``rows_to``). The ORM work being compared is the
+same under the sync and async sessions, so a sync session is used here.
+
+    python -m benchmarks.read_paths --rows 20000 --repeat 5
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import benchmarks  # noqa: F401  (fills in placeholder settings)
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from src.admin.schemas import AdmissionFormResponse, AcademicRecordResponse as AdminAcademicRecordResponse
+from src.admissionservice.schemas import AcademicRecordResponse, FeeResponse
+from src.db.models import (AcademicRecord, AdmissionForm, AdmissionStatus, Base, Fee, FeeStatus, FeeType, Gender,
+                           Parent, Student, Teacher, User)
+from src.db.projections import columns_for, rows_to
+
+
+def populate(engine, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            dict(id=i, first_name="First", last_name=f"Last{i}", gender=Gender.OTHER, contact_number="0240000000",
+                 email=f"user{i}@example.com", username=f"user{i}", password_hash="x", is_active=True,
+                 is_verified=False, created_at=now, updated_at=now)
+            for i in (1, 2, 3)
+        ])
+        conn.execute(insert(Parent), [dict(id=1, relationship_type="mother", is_primary=True, user_id=1)])
+        conn.execute(insert(Teacher), [dict(id=1, employee_id="T-1", department="Science", subject_specialization="Maths",
+                                            hire_date=now, is_active=True, user_id=2)])
+        conn.execute(insert(Student), [dict(id=1, enrollment_number="STU-BENCH01", grade_level="Grade 5",
+                                            enrollment_date=now, is_active=True, user_id=3, parent_id=1)])
+        conn.execute(insert(Fee), [
+            dict(student_id=1, parent_id=1, amount=100.0 + i, fee_type=FeeType.TUITION,
+                 due_date=now + timedelta(days=i % 365), status=FeeStatus.UNPAID)
+            for i in range(count)
+        ])
+        conn.execute(insert(AcademicRecord), [
+            dict(student_id=1, teacher_id=1, subject="Maths", grade="A", term=f"Term {i % 3 + 1}",
+                 academic_year=str(2000 + i % 25), comments="Good progress", recorded_date=now - timedelta(days=i))
+            for i in range(count)
+        ])
+        conn.execute(insert(AdmissionForm), [
+            dict(form_id=f"{i:036d}", parent_id=1, student_first_name="Ama", student_last_name=f"Mensah{i}",
+                 student_contact="0240000000", student_email=f"student{i}@example.com", parent_first_name="Kofi",
+                 parent_last_name="Mensah", parent_relationship="father", parent_contact="0200000000",
+                 parent_email="parent@example.com", intended_grade="Grade 5", status=AdmissionStatus.PENDING,
+                 submission_date=now)
+            for i in range(count)
+        ])
+
+
+def fees_entities(session):
+    fees = session.execute(select(Fee).where(Fee.parent_id == 1).order_by(Fee.due_date.desc())).scalars().all()
+    return [
+        FeeResponse(id=fee.id, amount=fee.amount, fee_type=fee.fee_type, due_date=fee.due_date, status=fee.status,
+                    payment_date=fee.payment_date, transaction_reference=fee.transaction_reference)
+        for fee in fees
+    ]
+
+
+def fees_rows(session):
+    result = session.execute(
+        select(*columns_for(FeeResponse, Fee)).where(Fee.parent_id == 1).order_by(Fee.due_date.desc())
+    )
+    return rows_to(FeeResponse, result)
+
+
+def records_entities(session):
+    records = session.execute(
+        select(AcademicRecord).where(AcademicRecord.student_id == 1).order_by(AcademicRecord.recorded_date.desc())
+    ).scalars().all()
+    return [
+        AcademicRecordResponse(id=r.id, subject=r.subject, grade=r.grade, term=r.term,
+                               academic_year=r.academic_year, comments=r.comments, recorded_date=r.recorded_date)
+        for r in records
+    ]
+
+
+def records_rows(session):
+    result = session.execute(
+        select(*columns_for(AcademicRecordResponse, AcademicRecord))
+        .where(AcademicRecord.student_id == 1)
+        .order_by(AcademicRecord.recorded_date.desc())
+    )
+    return rows_to(AcademicRecordResponse, result)
+
+
+def admissions_entities(session):
+    admissions = session.execute(select(AdmissionForm).order_by(AdmissionForm.id)).scalars().all()
+    return [AdmissionFormResponse.model_validate(admission) for admission in admissions]
+
+
+def admissions_rows(session):
+    result = session.execute(select(*columns_for(AdmissionFormResponse, AdmissionForm)).order_by(AdmissionForm.id))
+    return rows_to(AdmissionFormResponse, result)
+
+
+def admin_records_entities(session):
+    records = session.execute(select(AcademicRecord).order_by(AcademicRecord.id)).scalars().all()
+    return [AdminAcademicRecordResponse.model_validate(record) for record in records]
+
+
+def admin_records_rows(session):
+    result = session.execute(select(*columns_for(AdminAcademicRecordResponse, AcademicRecord)).order_by(AcademicRecord.id))
+    return rows_to(AdminAcademicRecordResponse, result)
+
+
+ENDPOINTS = [
+    ("GET /admission/fees/{parent_id}", fees_entities, fees_rows),
+    ("GET /admission/academics/{sid}/{pid}", records_entities, records_rows),
+    ("GET /admin/admission-request", admissions_entities, admissions_rows),
+    ("GET /admin/admission-records", admin_records_entities, admin_records_rows),
+]
+
+
+def run(engine, fn, repeat: int):
+    """Best wall time over ``repeat`` fresh sessions, then peak/total allocations of one run"""
+    best = float("inf")
+    for _ in range(repeat):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            payload = fn(session)
+            best = min(best, time.perf_counter() - start)
+
+    with Session(engine) as session:
+        tracemalloc.start()
+        fn(session)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics("filename"))
+    return best, peak, allocated, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    populate(engine, args.rows)
+
+    print(f"{'endpoint':<38} {'path':<9} {'rows':>7} {'best ms':>9} {'peak KiB':>10} {'live KiB':>10}")
+    for name, entities, rows in ENDPOINTS:
+        results = {}
+        for label, fn in (("entities", entities), ("rows", rows)):
+            best, peak, allocated, count = run(engine, fn, args.repeat)
+            results[label] = best, peak
+            print(f"{name:<38} {label:<9} {count:>7} {best * 1000:>9.1f} {peak / 1024:>10.0f} {allocated / 1024:>10.0f}")
+        (slow, slow_peak), (fast, fast_peak) = results["entities"], results["rows"]
+        print(f"{'':<38} {'gain':<9} {'':>7} {slow / fast:>8.1f}x {slow_peak / fast_peak:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Local SMTP stand-in for load tests: accepts and counts mail, delivers nothing.
+
+Speaks just enough ESMTP for ``src.smtp_pool`` (EHLO, AUTH PLAIN/LOGIN with
+any credentials, MAIL/RCPT/DATA, RSET, NOOP, QUIT); STARTTLS is not offered,
+so point the app at it with ``MAIL_STARTTLS=false``. Latency and failures can
+be injected to see how senders behave against a slow or flaky provider:
+
+    python -m benchmarks.smtp_sink --port 1025 --latency-ms 20 --fail-rate 0.01 --drop-rate 0.001
+
+``--fail-rate`` answers that share of messages with a temporary 451 error;
+``--drop-rate`` closes the connection instead of answering.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+
+class SMTPSink:
+    def __init__(self, latency_ms: float = 0.0, fail_rate: float = 0.0, drop_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port: Optional[int] = None
+        self.connections = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.bytes = 0
+        self._started = time.monotonic()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self._started
+        return {
+            "connections": self.connections,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "bytes": self.bytes,
+            "accepted_per_second": self.accepted / elapsed if elapsed else 0.0,
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        try:
+            await reply("220 smtp-sink ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.split(b" ", 1)[0].strip().upper()
+                if command == b"EHLO":
+                    await reply("250-smtp-sink")
+                    await reply("250-8BITMIME")
+                    await reply("250-AUTH PLAIN LOGIN")
+                    await reply("250 SMTPUTF8")
+                elif command == b"AUTH":
+                    if b"LOGIN" in line.upper() and len(line.split()) == 2:
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    await reply("235 2.7.0 Authentication successful")
+                elif command == b"DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while True:
+                        data = await reader.readline()
+                        if not data or data == b".\r\n":
+                            break
+                        self.bytes += len(data)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    roll = self._random.random()
+                    if roll < self.drop_rate:
+                        self.dropped += 1
+                        break
+                    if roll < self.drop_rate + self.fail_rate:
+                        self.rejected += 1
+                        await reply("451 4.3.0 Injected temporary failure")
+                    else:
+                        self.accepted += 1
+                        await reply("250 2.0.0 Queued")
+                elif command == b"QUIT":
+                    await reply("221 2.0.0 Bye")
+                    break
+                else:
+                    # HELO, MAIL, RCPT, RSET, NOOP: accept anything
+                    await reply("250 2.0.0 OK")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--report-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.latency_ms, args.fail_rate, args.drop_rate)
+    await sink.start(args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{sink.port}")
+    try:
+        while True:
+            await asyncio.sleep(args.report_seconds)
+            print(sink.stats())
+    finally:
+        await sink.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
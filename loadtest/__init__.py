@@ -0,0 +1,13 @@
+"""End-to-end load testing.
+
+Two steps, run from the repository root against a database migrated to head:
+
+1. ``python -m loadtest.dataset`` fills the database with a synthetic school
+   and writes a manifest of the accounts and ids it created.
+2. ``python -m loadtest.driver`` replays traffic mixes against the running app
+   over HTTP, using the manifest, and reports throughput, latency percentiles
+   and error rates per endpoint.
+
+The generator imports the app's models and settings, so it needs the same
+``.env`` as the app. The driver only speaks HTTP.
+"""
@@ -0,0 +1,412 @@
+"""Deterministic synthetic school dataset for load tests.
+
+Fills a database migrated to head, and otherwise empty of load test data,
+with one school at realistic volume. At ``--scale 1`` that is:
+
+- 200,000 users: 150,000 students, 45,000 parents, 4,500 teachers, 400 staff, 100 admins
+- classes and class enrollments for each of the last ``--years`` academic years
+- academic records per term and subject for every year a student was enrolled
+- attendance for the first ``--attendance-days`` school days of the current year
+- fees per term, paid in past years and a mix of statuses in the current one
+- ``--admissions`` pending applications, with their purchased forms
+
+The same seed and options give the same data. Every account has the same
+password (``--password``). It is hashed once, and each login still costs one
+bcrypt check. Rows go in with multi-row INSERTs. Students are written
+``--chunk-size`` at a time, each chunk in its own transaction with all of its
+enrollments, records, attendance and fees.
+
+The manifest written at the end lists the logins and ids used by
+``python -m loadtest.driver``.
+
+    python -m loadtest.dataset --scale 1 --seed 7 --manifest loadtest/manifest.json
+    python -m loadtest.dataset --scale 0.01 --attendance-days 10   # a quick small school
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import insert, select
+
+from src.authservice.utils import generate_password_hash
+from src.db.main import async_engine
+from src.db.models import (AcademicRecord, Admin, AdmissionForm, AdmissionStatus, Attendance, AttendanceStatus, Class,
+                           ClassEnrollment, Fee, FeeStatus, FeeType, Gender, Parent, PurchaseAdmissionForm, Role,
+                           RoleEnum, Staff, Student, Teacher, User, user_role)
+
+DOMAIN = "loadtest.example.com"
+
+# Users per role at --scale 1; 200,000 in total
+VOLUMES = {"students": 150_000, "parents": 45_000, "teachers": 4_500, "staff": 400, "admins": 100}
+
+GRADES = [f"Grade {n}" for n in range(1, 13)]
+SECTIONS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CLASS_SIZE = 40
+TERMS = ("Term 1", "Term 2", "Term 3")
+SUBJECTS = ("Mathematics", "English Language", "Integrated Science", "Social Studies", "ICT", "French",
+            "Religious and Moral Education", "Creative Arts")
+LETTER_GRADES = (("A", 15), ("B+", 20), ("B", 25), ("C+", 15), ("C", 12), ("D", 8), ("E", 5))
+COMMENTS = (None, None, "Good progress", "Excellent work", "Needs to participate more", "Keep it up",
+            "Can do better", "Consistent effort")
+ATTENDANCE = ((AttendanceStatus.PRESENT, 90), (AttendanceStatus.LATE, 4), (AttendanceStatus.ABSENT, 4),
+              (AttendanceStatus.EXCUSED, 2))
+CURRENT_FEE_STATUSES = ((FeeStatus.PAID, 55), (FeeStatus.UNPAID, 25), (FeeStatus.PARTIAL, 10), (FeeStatus.OVERDUE, 10))
+EXTRA_FEES = (FeeType.TRANSPORT, FeeType.LIBRARY, FeeType.UNIFORM, FeeType.ACTIVITY)
+
+FIRST_NAMES = ("Ama", "Kofi", "Kwame", "Akosua", "Yaw", "Abena", "Kwabena", "Efua", "Kojo", "Adwoa", "Kwaku", "Afia",
+               "Esi", "Kweku", "Yaa", "Fiifi", "Nana", "Akua", "Selasi", "Mawuli", "Dzifa", "Edem", "Elikem", "Senam",
+               "Ato", "Araba", "Ekow", "Naa", "Nii", "Korkor")
+LAST_NAMES = ("Mensah", "Owusu", "Boateng", "Asante", "Osei", "Agyeman", "Appiah", "Darko", "Amoah", "Addo", "Ofori",
+              "Acheampong", "Danso", "Quaye", "Tetteh", "Lamptey", "Annan", "Quartey", "Adjei", "Frimpong",
+              "Gyamfi", "Nkrumah", "Sarpong", "Badu", "Antwi", "Kyei", "Bonsu", "Amponsah", "Ansah", "Yeboah")
+CITIES = ("Accra", "Kumasi", "Tamale", "Takoradi", "Cape Coast", "Tema", "Ho", "Koforidua", "Sunyani", "Techiman")
+OCCUPATIONS = ("Teacher", "Nurse", "Trader", "Engineer", "Farmer", "Accountant", "Driver", "Civil Servant",
+               "Pharmacist", "Banker", None)
+DEPARTMENTS = ("Sciences", "Languages", "Mathematics", "Humanities", "Arts", "ICT")
+
+
+def school_days(start: datetime, count: int) -> List[datetime]:
+    """The first `count` weekdays from `start`"""
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def section_label(section: int) -> str:
+    """A, B, ... Z for the first 26 sections of a grade, then A2, B2, ... so every label is unique"""
+    cycle, letter = divmod(section, len(SECTIONS))
+    return SECTIONS[letter] + (str(cycle + 1) if cycle else "")
+
+
+class DatasetGenerator:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.volumes = {name: max(1, round(count * args.scale)) for name, count in VOLUMES.items()}
+        self.admissions = max(0, round(args.admissions * args.scale))
+        first_year = args.year - args.years + 1
+        self.years = [(year, f"{year}/{year + 1}", datetime(year, 9, 1, tzinfo=timezone.utc))
+                      for year in range(first_year, args.year + 1)]
+        self.created_at = self.years[0][2] - timedelta(days=30)
+        self.sections = max(1, math.ceil(self.volumes["students"] / len(GRADES) / CLASS_SIZE))
+        self.counts: Counter = Counter()
+        self.password_hash = ""
+        self.role_ids: Dict[RoleEnum, int] = {}
+        self.teacher_ids: List[int] = []
+        self.admin_ids: List[int] = []
+        # Per parent, in creation order: Parent.id, User.id, email, last name, first name, contact
+        self.parents: List[Tuple[int, int, str, str, str, str]] = []
+        self.wards: Dict[int, List[int]] = {}
+        self.student_logins: List[Tuple[int, str]] = []
+        self.class_ids: Dict[Tuple[str, int, int], int] = {}
+        self.class_teachers: Dict[int, int] = {}
+
+    async def insert(self, conn, table, rows: List[Dict[str, Any]], returning=None) -> List[int]:
+        """Multi-row INSERT; with `returning`, the generated ids in the order of `rows`"""
+        if not rows:
+            return []
+        table = getattr(table, "__table__", table)
+        self.counts[table.name] += len(rows)
+        if returning is None:
+            await conn.execute(insert(table), rows)
+            return []
+        result = await conn.execute(insert(table).returning(returning, sort_by_parameter_order=True), rows)
+        return list(result.scalars())
+
+    def contact(self) -> str:
+        return f"02{self.rng.randrange(10 ** 8):08d}"
+
+    def user_row(self, kind: str, index: int, first_name: str, last_name: str, born: datetime) -> Dict[str, Any]:
+        return dict(
+            first_name=first_name, last_name=last_name, gender=self.rng.choice((Gender.MALE, Gender.FEMALE)),
+            date_of_birth=born, contact_number=self.contact(), email=f"{kind}{index}@{DOMAIN}",
+            username=f"lt_{kind}{index}", password_hash=self.password_hash, city=self.rng.choice(CITIES),
+            country="Ghana", is_active=True, is_verified=True, created_at=self.created_at, updated_at=self.created_at
+        )
+
+    def adult_row(self, kind: str, index: int) -> Dict[str, Any]:
+        born = datetime(self.args.year - self.rng.randint(25, 60), self.rng.randint(1, 12), self.rng.randint(1, 28),
+                        tzinfo=timezone.utc)
+        return self.user_row(kind, index, self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES), born)
+
+    async def create_users(self, conn, rows: List[Dict[str, Any]], role: RoleEnum) -> List[int]:
+        user_ids = await self.insert(conn, User, rows, User.id)
+        await self.insert(conn, user_role, [dict(user_id=user_id, role_id=self.role_ids[role]) for user_id in user_ids])
+        return user_ids
+
+    async def prepare(self) -> None:
+        async with async_engine.begin() as conn:
+            existing = await conn.scalar(select(User.id).where(User.email == f"admin0@{DOMAIN}"))
+            if existing is not None:
+                raise SystemExit("Load test data is already present; generate into a fresh database")
+            roles = dict((await conn.execute(select(Role.name, Role.id))).all())
+            missing = [role for role in RoleEnum if role not in roles]
+            if missing:
+                ids = await self.insert(conn, Role, [dict(name=role, is_default=False) for role in missing], Role.id)
+                roles.update(zip(missing, ids))
+            self.role_ids = roles
+        # bcrypt is slow on purpose; one hash serves every account
+        self.password_hash = generate_password_hash(self.args.password)
+
+    async def create_staff(self) -> None:
+        async with async_engine.begin() as conn:
+            count = self.volumes["admins"]
+            # The first admin is the SUPER_ADMIN the driver logs in as
+            user_ids = await self.create_users(conn, [self.adult_row("admin", 0)], RoleEnum.SUPER_ADMIN)
+            user_ids += await self.create_users(
+                conn, [self.adult_row("admin", i) for i in range(1, count)], RoleEnum.SCHOOL_ADMIN
+            )
+            self.admin_ids = await self.insert(conn, Admin, [
+                dict(employee_id=f"LT-ADM{i:05d}", department="Administration",
+                     position="Head of School" if i == 0 else "Registrar", hire_date=self.created_at,
+                     is_active=True, user_id=user_id)
+                for i, user_id in enumerate(user_ids)
+            ], Admin.id)
+
+            user_ids = await self.create_users(
+                conn, [self.adult_row("staff", i) for i in range(self.volumes["staff"])], RoleEnum.STAFF
+            )
+            await self.insert(conn, Staff, [
+                dict(employee_id=f"LT-STF{i:05d}", department=self.rng.choice(("Finance", "Facilities", "Library")),
+                     position=self.rng.choice(("Officer", "Assistant", "Supervisor")), hire_date=self.created_at,
+                     is_active=True, user_id=user_id)
+                for i, user_id in enumerate(user_ids)
+            ])
+
+            user_ids = await self.create_users(
+                conn, [self.adult_row("teacher", i) for i in range(self.volumes["teachers"])], RoleEnum.TEACHER
+            )
+            self.teacher_ids = await self.insert(conn, Teacher, [
+                dict(employee_id=f"LT-TCH{i:05d}", department=self.rng.choice(DEPARTMENTS),
+                     subject_specialization=self.rng.choice(SUBJECTS), qualification=self.rng.choice(("BEd", "MEd", "BSc")),
+                     hire_date=self.created_at, is_active=True, user_id=user_id)
+                for i, user_id in enumerate(user_ids)
+            ], Teacher.id)
+
+    async def create_parents(self) -> None:
+        count = self.volumes["parents"]
+        for start in range(0, count, self.args.chunk_size):
+            indexes = range(start, min(count, start + self.args.chunk_size))
+            rows = [self.adult_row("parent", i) for i in indexes]
+            async with async_engine.begin() as conn:
+                user_ids = await self.create_users(conn, rows, RoleEnum.PARENT)
+                parent_ids = await self.insert(conn, Parent, [
+                    dict(relationship_type=self.rng.choice(("mother", "father", "guardian")),
+                         occupation=self.rng.choice(OCCUPATIONS), is_primary=True, user_id=user_id)
+                    for user_id in user_ids
+                ], Parent.id)
+            for parent_id, user_id, row in zip(parent_ids, user_ids, rows):
+                self.parents.append((parent_id, user_id, row["email"], row["last_name"], row["first_name"],
+                                     row["contact_number"]))
+
+    async def create_classes(self) -> None:
+        rows = []
+        keys = []
+        for _, academic_year, _ in self.years:
+            for grade in range(len(GRADES)):
+                for section in range(self.sections):
+                    teacher_id = self.teacher_ids[len(rows) % len(self.teacher_ids)]
+                    rows.append(dict(name=f"{GRADES[grade]}{section_label(section)}", grade_level=GRADES[grade],
+                                     teacher_id=teacher_id, academic_year=academic_year))
+                    keys.append((academic_year, grade, section))
+        async with async_engine.begin() as conn:
+            class_ids = await self.insert(conn, Class, rows, Class.id)
+        self.class_ids = dict(zip(keys, class_ids))
+        self.class_teachers = {class_id: row["teacher_id"] for class_id, row in zip(class_ids, rows)}
+
+    def student_years(self, index: int):
+        """(years back, academic year, year start, grade index, class id) for every year the student was enrolled"""
+        grade_now = index % len(GRADES)
+        section = (index // len(GRADES)) % self.sections
+        for back, (_, academic_year, start) in enumerate(reversed(self.years)):
+            grade = grade_now - back
+            if grade < 0:
+                break
+            yield back, academic_year, start, grade, self.class_ids[(academic_year, grade, section)]
+
+    async def create_students(self) -> None:
+        count = self.volumes["students"]
+        current_start = self.years[-1][2]
+        attendance_days = school_days(current_start, self.args.attendance_days)
+        subjects = SUBJECTS[:self.args.subjects]
+        started = time.perf_counter()
+        for start in range(0, count, self.args.chunk_size):
+            indexes = list(range(start, min(count, start + self.args.chunk_size)))
+            families = [self.rng.randrange(len(self.parents)) for _ in indexes]
+            users = []
+            for index, family in zip(indexes, families):
+                grade = index % len(GRADES)
+                born = datetime(self.args.year - 6 - grade, self.rng.randint(1, 12), self.rng.randint(1, 28),
+                                tzinfo=timezone.utc)
+                users.append(self.user_row("student", index, self.rng.choice(FIRST_NAMES), self.parents[family][3], born))
+
+            async with async_engine.begin() as conn:
+                user_ids = await self.create_users(conn, users, RoleEnum.STUDENT)
+                student_ids = await self.insert(conn, Student, [
+                    dict(enrollment_number=f"STU-LT{index:07d}", grade_level=GRADES[index % len(GRADES)],
+                         section=section_label((index // len(GRADES)) % self.sections),
+                         enrollment_date=list(self.student_years(index))[-1][2], is_active=True,
+                         user_id=user_id, parent_id=self.parents[family][0])
+                    for index, family, user_id in zip(indexes, families, user_ids)
+                ], Student.id)
+
+                enrollments, records, attendance, fees = [], [], [], []
+                for index, family, student_id in zip(indexes, families, student_ids):
+                    parent_id = self.parents[family][0]
+                    ability = self.rng.randrange(len(LETTER_GRADES) - 2)
+                    for back, academic_year, year_start, grade, class_id in self.student_years(index):
+                        enrollments.append(dict(student_id=student_id, class_id=class_id, enrollment_date=year_start))
+                        terms = TERMS if back else TERMS[:1]
+                        for term_index, term in enumerate(terms):
+                            recorded = year_start + timedelta(days=110 + 120 * term_index)
+                            for subject in subjects:
+                                letter = LETTER_GRADES[min(len(LETTER_GRADES) - 1, ability + self.rng.randrange(3))][0]
+                                records.append(dict(
+                                    student_id=student_id, teacher_id=self.class_teachers[class_id], subject=subject,
+                                    grade=letter, term=term, academic_year=academic_year,
+                                    comments=self.rng.choice(COMMENTS), recorded_date=recorded
+                                ))
+                        fees.extend(self.fee_rows(student_id, parent_id, grade, year_start, current=not back))
+                    for day in attendance_days:
+                        status = self.rng.choices(*zip(*ATTENDANCE))[0]
+                        attendance.append(dict(student_id=student_id, date=day, status=status,
+                                               remarks="Arrived after assembly" if status == AttendanceStatus.LATE else None))
+                await self.insert(conn, ClassEnrollment, enrollments)
+                await self.insert(conn, AcademicRecord, records)
+                await self.insert(conn, Attendance, attendance)
+                await self.insert(conn, Fee, fees)
+
+            for index, family, student_id in zip(indexes, families, student_ids):
+                self.wards.setdefault(family, []).append(student_id)
+                self.student_logins.append((student_id, f"student{index}@{DOMAIN}"))
+            done = indexes[-1] + 1
+            elapsed = time.perf_counter() - started
+            print(f"  students {done:>8}/{count}  {sum(self.counts.values()):>10} rows  {elapsed:7.1f}s")
+
+    def fee_rows(self, student_id: int, parent_id: int, grade: int, year_start: datetime, current: bool):
+        tuition = 1200.0 + 150.0 * grade
+        items = [(FeeType.TUITION, tuition, year_start + timedelta(days=14 + 120 * term)) for term in range(len(TERMS))]
+        items.append((FeeType.EXAM, 150.0, year_start + timedelta(days=75)))
+        if self.rng.random() < 0.5:
+            items.append((self.rng.choice(EXTRA_FEES), float(self.rng.choice((80, 120, 200, 350))),
+                          year_start + timedelta(days=30)))
+        for number, (fee_type, amount, due) in enumerate(items):
+            if not current:
+                status = FeeStatus.WAIVED if self.rng.random() < 0.03 else FeeStatus.PAID
+            elif number == 0 or fee_type != FeeType.TUITION:
+                status = self.rng.choices(*zip(*CURRENT_FEE_STATUSES))[0]
+            else:
+                status = FeeStatus.UNPAID
+            paid = status in (FeeStatus.PAID, FeeStatus.PARTIAL)
+            yield dict(
+                student_id=student_id, parent_id=parent_id, amount=amount, fee_type=fee_type, due_date=due,
+                status=status, payment_date=due - timedelta(days=self.rng.randint(0, 10)) if paid else None,
+                transaction_reference=f"LT{self.rng.getrandbits(48):012X}" if paid else None
+            )
+
+    async def create_admissions(self) -> None:
+        """Pending applications from existing parents, with the forms they bought"""
+        if not self.admissions:
+            return
+        current_start = self.years[-1][2]
+        purchases, forms = [], []
+        for i in range(self.admissions):
+            parent_id, _, email, last_name, first_name, contact = self.parents[self.rng.randrange(len(self.parents))]
+            bought = current_start - timedelta(days=self.rng.randint(10, 120))
+            purchases.append(dict(first_name=first_name, last_name=last_name, contact=contact, email=email,
+                                  amount=5000.0, serial_token=str(uuid.UUID(int=self.rng.getrandbits(128))),
+                                  purchase_date=bought))
+            forms.append(dict(
+                form_id=str(uuid.UUID(int=self.rng.getrandbits(128))), parent_id=parent_id,
+                student_first_name=self.rng.choice(FIRST_NAMES), student_last_name=last_name,
+                student_dob=datetime(self.args.year - 6, self.rng.randint(1, 12), self.rng.randint(1, 28), tzinfo=timezone.utc),
+                student_contact=contact, student_email=f"applicant{i}@{DOMAIN}", parent_first_name=first_name,
+                parent_last_name=last_name, parent_relationship="parent", parent_contact=contact, parent_email=email,
+                intended_grade=self.rng.choice(GRADES), previous_school=self.rng.choice((None, "Hillside Academy")),
+                status=AdmissionStatus.PENDING, submission_date=bought + timedelta(days=self.rng.randint(0, 9))
+            ))
+        async with async_engine.begin() as conn:
+            purchase_ids = await self.insert(conn, PurchaseAdmissionForm, purchases, PurchaseAdmissionForm.id)
+            for form, purchase_id in zip(forms, purchase_ids):
+                form["purchase_id"] = purchase_id
+            await self.insert(conn, AdmissionForm, forms)
+
+    def manifest(self) -> Dict[str, Any]:
+        """Logins and ids for the load driver; a sample, drawn from a separate seeded generator"""
+        sample = random.Random(self.args.seed + 1)
+        families = sorted(self.wards)
+        families = sample.sample(families, min(len(families), self.args.manifest_size))
+        teacher_emails = [f"teacher{i}@{DOMAIN}" for i in range(self.volumes["teachers"])]
+        return {
+            "seed": self.args.seed,
+            "scale": self.args.scale,
+            "academic_year": self.years[-1][1],
+            "password": self.args.password,
+            "admin_email": f"admin0@{DOMAIN}",
+            "families": [
+                {"parent_id": self.parents[family][0], "parent_user_id": self.parents[family][1],
+                 "email": self.parents[family][2], "student_ids": self.wards[family]}
+                for family in families
+            ],
+            "students": [
+                {"student_id": student_id, "email": email}
+                for student_id, email in sample.sample(self.student_logins,
+                                                       min(len(self.student_logins), self.args.manifest_size))
+            ],
+            "teachers": sample.sample(teacher_emails, min(len(teacher_emails), self.args.manifest_size)),
+            "last_names": list(LAST_NAMES),
+            "grades": GRADES,
+        }
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        await self.prepare()
+        await self.create_staff()
+        await self.create_parents()
+        await self.create_classes()
+        await self.create_students()
+        await self.create_admissions()
+        elapsed = time.perf_counter() - started
+
+        with open(self.args.manifest, "w") as file:
+            json.dump(self.manifest(), file, indent=1)
+        total = sum(self.counts.values())
+        print(f"{total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s); manifest: {self.args.manifest}")
+        for table, rows in sorted(self.counts.items(), key=lambda item: -item[1]):
+            print(f"  {table:<28} {rows:>10}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every volume")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--year", type=int, default=datetime.now(timezone.utc).year,
+                        help="start of the current academic year; pin it to reproduce a dataset later")
+    parser.add_argument("--years", type=int, default=3, help="academic years of history, the current one included")
+    parser.add_argument("--subjects", type=int, default=5, choices=range(1, len(SUBJECTS) + 1))
+    parser.add_argument("--attendance-days", type=int, default=40)
+    parser.add_argument("--admissions", type=int, default=2000, help="pending applications at --scale 1")
+    parser.add_argument("--password", default="LoadTest#2024")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="students (or parents) per transaction")
+    parser.add_argument("--manifest", default="loadtest/manifest.json")
+    parser.add_argument("--manifest-size", type=int, default=5000, help="families, students and teachers listed")
+    args = parser.parse_args()
+    try:
+        await DatasetGenerator(args).run()
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
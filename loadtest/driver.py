@@ -0,0 +1,329 @@
+"""Async HTTP load driver: replays realistic traffic mixes against the app.
+
+Virtual users (``--users``) each run a closed loop for ``--duration`` seconds:
+pick an action from the scenario's weighted mix, run it, think for
+``--think-ms`` on average, and repeat. Scenarios:
+
+- login:         login storm; parents, students and teachers signing in at once (bcrypt bound)
+- parent-portal: a parent opens the dashboard, then their wards, fees or a child's records
+- admission:     admission season; buy a form, then apply with its serial token
+                 (queued mode is followed through the submission status until the token exists)
+- admin:         SUPER_ADMIN listings; admission requests, student search, a student's records
+- mixed:         all of the above, weighted like a school day in admission season
+
+Logins and ids come from the manifest written by ``python -m loadtest.dataset``.
+Each request is recorded under its route, e.g. ``GET /v1/admission/fees/{parent_id}``.
+The report lists requests, throughput, error rate and p50/p95/p99/max latency
+per route. A response is an error when its status is not one the route returns
+on success; transport failures count as errors too.
+
+Point it at a running app, or let it start one with uvicorn:
+
+    python -m loadtest.driver --base-url http://127.0.0.1:8000 --scenario mixed --users 50 --duration 60
+    python -m loadtest.driver --start-app --workers 4 --scenario login --users 200 --duration 30 --json login.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+API = "/v1"
+# Successful statuses: purchase and apply answer 202 instead of 201 in queued mode
+CREATED = (201, 202)
+SUBMISSION_POLLS = 20
+SUBMISSION_POLL_SECONDS = 0.25
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Recorder:
+    """Latencies and outcomes per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, route: str, seconds: float, outcome: str, ok: bool) -> None:
+        self.latencies[route].append(seconds)
+        self.outcomes[route][outcome] += 1
+        if not ok:
+            self.errors[route] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        routes = {}
+        everything: List[float] = []
+        for route in sorted(self.latencies):
+            latencies = self.latencies[route]
+            everything += latencies
+            routes[route] = self._stats(latencies, self.errors[route], elapsed, self.outcomes[route])
+        totals = Counter()
+        for outcomes in self.outcomes.values():
+            totals.update(outcomes)
+        routes["all"] = self._stats(everything, sum(self.errors.values()), elapsed, totals)
+        return routes
+
+    @staticmethod
+    def _stats(latencies: List[float], errors: int, elapsed: float, outcomes: Counter) -> Dict[str, Any]:
+        ms = [latency * 1000 for latency in latencies]
+        return {
+            "requests": len(ms),
+            "per_second": len(ms) / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": errors / len(ms) if ms else 0.0,
+            "p50_ms": percentile(ms, 0.50),
+            "p95_ms": percentile(ms, 0.95),
+            "p99_ms": percentile(ms, 0.99),
+            "max_ms": max(ms, default=0.0),
+            "outcomes": dict(outcomes.most_common()),
+        }
+
+
+class LoadContext:
+    """What every virtual user shares: the HTTP client, the manifest and the recorder"""
+
+    def __init__(self, client: httpx.AsyncClient, manifest: Dict[str, Any], recorder: Recorder):
+        self.client = client
+        self.manifest = manifest
+        self.recorder = recorder
+        self.admin_token: Optional[str] = None
+
+    async def request(self, method: str, route: str, url: str, expected: Sequence[int] = (200,),
+                      **kwargs) -> Optional[httpx.Response]:
+        """Send one request and record it under `route`; returns the response, or None if it never arrived"""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(f"{method} {route}", time.perf_counter() - start, type(e).__name__, False)
+            return None
+        ok = response.status_code in expected
+        self.recorder.record(f"{method} {route}", time.perf_counter() - start, str(response.status_code), ok)
+        return response
+
+    async def login(self, email: str) -> Optional[str]:
+        response = await self.request(
+            "POST", f"{API}/auth/login", f"{API}/auth/login",
+            json={"email": email, "password": self.manifest["password"]}
+        )
+        if response is None or response.status_code != 200:
+            return None
+        return response.json()["access_token"]
+
+    async def admin_headers(self) -> Optional[Dict[str, str]]:
+        if self.admin_token is None:
+            self.admin_token = await self.login(self.manifest["admin_email"])
+        return {"Authorization": f"Bearer {self.admin_token}"} if self.admin_token else None
+
+
+async def login_storm(ctx: LoadContext, rng: random.Random) -> None:
+    manifest = ctx.manifest
+    pool = rng.choices(
+        (manifest["families"], manifest["students"], manifest["teachers"]), weights=(50, 40, 10)
+    )[0] or manifest["families"]
+    identity = rng.choice(pool)
+    await ctx.login(identity if isinstance(identity, str) else identity["email"])
+
+
+async def parent_portal(ctx: LoadContext, rng: random.Random) -> None:
+    family = rng.choice(ctx.manifest["families"])
+    parent_id = family["parent_id"]
+    await ctx.request("GET", f"{API}/admission/dashboard/{{parent_id}}", f"{API}/admission/dashboard/{parent_id}")
+    page = rng.choices(("wards", "fees", "academics"), weights=(30, 40, 30))[0]
+    if page == "wards":
+        await ctx.request("GET", f"{API}/admission/ward/{{parent_id}}",
+                          f"{API}/admission/ward/{family['parent_user_id']}")
+    elif page == "fees":
+        await ctx.request("GET", f"{API}/admission/fees/{{parent_id}}", f"{API}/admission/fees/{parent_id}")
+    else:
+        student_id = rng.choice(family["student_ids"])
+        await ctx.request("GET", f"{API}/admission/academics/{{student_id}}/{{parent_id}}",
+                          f"{API}/admission/academics/{student_id}/{parent_id}")
+
+
+async def _submission_result(ctx: LoadContext, accepted: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Poll a queued submission until it is persisted; returns its result"""
+    for _ in range(SUBMISSION_POLLS):
+        await asyncio.sleep(SUBMISSION_POLL_SECONDS)
+        response = await ctx.request("GET", f"{API}/admission/submissions/{{tracking_id}}",
+                                     f"{API}/admission/submissions/{accepted['tracking_id']}")
+        if response is None or response.status_code != 200:
+            return None
+        body = response.json()
+        if body["status"] == "COMPLETED":
+            return body["result"]
+        if body["status"] == "FAILED":
+            return None
+    return None
+
+
+async def admission_burst(ctx: LoadContext, rng: random.Random) -> None:
+    applicant = uuid.uuid4().hex[:12]
+    last_name = rng.choice(ctx.manifest["last_names"])
+    contact = f"05{rng.randrange(10 ** 8):08d}"
+    parent_email = f"lt.parent.{applicant}@loadtest.example.com"
+    response = await ctx.request("POST", f"{API}/admission/purchase", f"{API}/admission/purchase", CREATED, json={
+        "first_name": "Adjoa", "last_name": last_name, "contact": contact, "email": parent_email, "amount": 5000.0,
+    })
+    if response is None or response.status_code not in CREATED:
+        return
+    purchase = response.json() if response.status_code == 201 else await _submission_result(ctx, response.json())
+    if not purchase:
+        return
+    await ctx.request("POST", f"{API}/admission/apply", f"{API}/admission/apply", CREATED, json={
+        "student": {"first_name": "Kobby", "last_name": last_name, "contact_number": contact,
+                    "email": f"lt.applicant.{applicant}@loadtest.example.com"},
+        "parent": {"first_name": "Adjoa", "last_name": last_name, "relationship": "mother",
+                   "contact_number": contact, "email": parent_email},
+        "intended_grade": rng.choice(ctx.manifest["grades"]),
+        "purchase_token": purchase["serial_token"],
+    })
+
+
+async def admin_listings(ctx: LoadContext, rng: random.Random) -> None:
+    headers = await ctx.admin_headers()
+    if headers is None:
+        return
+    page = rng.choices(("admissions", "search", "records"), weights=(20, 50, 30))[0]
+    if page == "admissions":
+        await ctx.request("GET", f"{API}/admin/admission-request", f"{API}/admin/admission-request", headers=headers)
+    elif page == "search":
+        prefix = rng.choice(ctx.manifest["last_names"])[:rng.randint(3, 6)]
+        # A page past the last match is a 404, not a failure
+        await ctx.request("GET", f"{API}/admin/search", f"{API}/admin/search", (200, 404), headers=headers,
+                          params={"student_name": prefix, "limit": 20, "offset": rng.choice((0, 0, 20, 40))})
+    else:
+        student_id = rng.choice(ctx.manifest["students"])["student_id"]
+        await ctx.request("GET", f"{API}/admin/academic-records/{{student_id}}",
+                          f"{API}/admin/academic-records/{student_id}", headers=headers)
+
+
+Action = Callable[[LoadContext, random.Random], Awaitable[None]]
+
+SCENARIOS: Dict[str, List[Tuple[Action, float]]] = {
+    "login": [(login_storm, 1)],
+    "parent-portal": [(parent_portal, 1)],
+    "admission": [(admission_burst, 1)],
+    "admin": [(admin_listings, 1)],
+    "mixed": [(parent_portal, 55), (login_storm, 15), (admission_burst, 20), (admin_listings, 10)],
+}
+
+
+async def virtual_user(ctx: LoadContext, mix: List[Tuple[Action, float]], rng: random.Random, deadline: float,
+                       think: float) -> None:
+    actions, weights = zip(*mix)
+    while time.monotonic() < deadline:
+        action = rng.choices(actions, weights)[0]
+        await action(ctx, rng)
+        if think:
+            await asyncio.sleep(min(rng.expovariate(1 / think), max(0.0, deadline - time.monotonic())))
+
+
+async def run_load(client: httpx.AsyncClient, manifest: Dict[str, Any], scenario: str, users: int, duration: float,
+                   think_ms: float = 0.0, ramp_up: float = 0.0, seed: int = 0) -> Tuple[Recorder, float]:
+    """Run `users` virtual users through `scenario`; returns the recorder and the elapsed time"""
+    recorder = Recorder()
+    ctx = LoadContext(client, manifest, recorder)
+    if scenario in ("admin", "mixed"):
+        await ctx.admin_headers()
+    mix = SCENARIOS[scenario]
+    start = time.monotonic()
+    deadline = start + duration
+
+    async def user(index: int) -> None:
+        if ramp_up:
+            await asyncio.sleep(ramp_up * index / users)
+        await virtual_user(ctx, mix, random.Random(seed * 100_003 + index), deadline, think_ms / 1000)
+
+    await asyncio.gather(*(user(i) for i in range(users)))
+    return recorder, time.monotonic() - start
+
+
+def report(summary: Dict[str, Dict[str, Any]]) -> None:
+    width = max(len(route) for route in summary)
+    print(f"{'route':<{width}} {'requests':>9} {'req/s':>8} {'errors':>7} {'err %':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses")
+    for route, stats in summary.items():
+        outcomes = " ".join(f"{outcome}:{count}" for outcome, count in stats["outcomes"].items())
+        print(f"{route:<{width}} {stats['requests']:>9} {stats['per_second']:>8.1f} {stats['errors']:>7} "
+              f"{stats['error_rate'] * 100:>6.2f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+              f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}  {outcomes}")
+
+
+def start_app(host: str, port: int, workers: int) -> subprocess.Popen:
+    return subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "src:app", "--host", host, "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ])
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(f"{API}/auth/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit(f"The app did not answer on {client.base_url} within {timeout:.0f}s")
+        await asyncio.sleep(0.5)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a user's actions")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users join; 0 starts all at once")
+    parser.add_argument("--manifest", default="loadtest/manifest.json")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-app", action="store_true", help="start uvicorn on --base-url's port for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers, with --start-app")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per request, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the per-route results to this file")
+    args = parser.parse_args()
+
+    with open(args.manifest) as file:
+        manifest = json.load(file)
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        app = None
+        if args.start_app:
+            app = start_app(client.base_url.host, client.base_url.port or 80, args.workers)
+        try:
+            await wait_until_up(client)
+            print(f"{args.scenario}: {args.users} users for {args.duration:.0f}s against {args.base_url}")
+            recorder, elapsed = await run_load(client, manifest, args.scenario, args.users, args.duration,
+                                               args.think_ms, args.ramp_up, args.seed)
+        finally:
+            if app is not None:
+                app.terminate()
+                app.wait(timeout=30)
+
+    summary = recorder.summary(elapsed)
+    report(summary)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"scenario": args.scenario, "users": args.users, "duration": elapsed, "routes": summary},
+                      file, indent=1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
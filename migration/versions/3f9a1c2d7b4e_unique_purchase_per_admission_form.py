@@ -0,0 +1,31 @@
+"""unique purchase per admission form
+
+Revision ID: 3f9a1c2d7b4e
+Revises: db522ab1ffb7
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b4e'
+down_revision: Union[str, None] = 'db522ab1ffb7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A purchase token can be spent on one application only; the constraint is what claims it
+    with op.batch_alter_table('admission_forms', schema=None) as batch_op:
+        batch_op.create_unique_constraint('admission_forms_purchase_id_key', ['purchase_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('admission_forms', schema=None) as batch_op:
+        batch_op.drop_constraint('admission_forms_purchase_id_key', type_='unique')
@@ -0,0 +1,39 @@
+"""admission review claims
+
+Revision ID: 8b2e4d6f1a90
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a90'
+down_revision: Union[str, None] = '3f9a1c2d7b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('admission_forms', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claimed_by_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('claim_expires_at', sa.TIMESTAMP(timezone=True), nullable=True))
+        batch_op.create_foreign_key('admission_forms_claimed_by_id_fkey', 'users', ['claimed_by_id'], ['id'])
+        batch_op.create_index(
+            'ix_admission_forms_review_queue', ['submission_date', 'id'], unique=False,
+            postgresql_where=sa.text("status IN ('PENDING', 'UNDER_REVIEW')")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('admission_forms', schema=None) as batch_op:
+        batch_op.drop_index('ix_admission_forms_review_queue')
+        batch_op.drop_constraint('admission_forms_claimed_by_id_fkey', type_='foreignkey')
+        batch_op.drop_column('claim_expires_at')
+        batch_op.drop_column('claimed_by_id')
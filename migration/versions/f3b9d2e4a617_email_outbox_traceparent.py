@@ -0,0 +1,28 @@
+"""email outbox traceparent
+
+Revision ID: f3b9d2e4a617
+Revises: e7a2c4f6b813
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2e4a617'
+down_revision: Union[str, None] = 'e7a2c4f6b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('traceparent', sa.String(length=55), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('email_outbox', 'traceparent')
@@ -1,25 +1,48 @@
+import logging
+from src.log_config import setup_logging
+
+# Before the other imports, so records logged while the app is built go through the queue
+setup_logging()
+
 from fastapi import FastAPI
 from src.authservice.routes import auth_router
 from src.db.main import init_db
 from contextlib import asynccontextmanager
 from src.admissionservice.routes import admission_router
 from src.admin.routes import admin_router
+from src.middleware import register_middleware
+from src.admissionservice.ingestion import ingestion_queue
+from src.admin.onboarding import cohort_onboarding
+from src.config import Config
+from src.metrics import registry as metrics_registry
+from src.monitoring import monitoring_router
+from src.tracing import exporter as span_exporter
 
 version = "v1"
 
+logger = logging.getLogger(__name__)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Server is starting...")
+    logger.info("Server is starting")
     try:
         await init_db()
-        print("Database tables created successfully!")
-    except Exception as e:
-        print(f"Error creating database tables: {e}")
+        logger.info("Database tables created")
+    except Exception:
+        logger.exception("Error creating database tables")
         raise  # Re-raise the exception to fail fast in development
     
+    if Config.ADMISSION_QUEUE_ENABLED:
+        await ingestion_queue.start()
+    metrics_registry.start()
+    
     yield
     
-    print("Server is shutting down...")
+    logger.info("Server is shutting down")
+    await ingestion_queue.stop()
+    await cohort_onboarding.stop()
+    await metrics_registry.stop()
+    span_exporter.shutdown()
 
 app = FastAPI(
     title="School Management System",
@@ -28,6 +51,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+register_middleware(app)
+
 app.include_router(auth_router, prefix=f"/{version}/auth", tags=["auth"])
 app.include_router(admission_router, prefix=f"/{version}/admission", tags=["admission"])
-app.include_router(admin_router, prefix=f"/{version}/admin", tags=["admin"])
\ No newline at end of file
+app.include_router(admin_router, prefix=f"/{version}/admin", tags=["admin"])
+app.include_router(monitoring_router)
\ No newline at end of file
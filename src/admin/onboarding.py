@@ -0,0 +1,395 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, select, update
+
+from src.admissionservice.dashboard import invalidate_dashboards
+from src.authservice.enrollment import enrollment_numbers
+from src.authservice.utils import generate_password, generate_password_hashes_async
+from src.config import Config
+from src.db.main import AsyncSessionLocal
+from src.db.models import (AdmissionForm, AdmissionStatus, Class, ClassEnrollment, Fee, FeeStatus, FeeType, Gender,
+                           Role, RoleEnum, Student, User, user_role)
+from src.db.redis import redis_service
+from src.outbox import EMAIL_WELCOME, enqueue_email
+from src.tracing import trace_methods
+from .schemas import CohortOnboardingRequest, OnboardingJobStatus
+
+logger = logging.getLogger(__name__)
+
+# Failures kept in the job status; the rest are only logged
+_MAX_REPORTED_FAILURES = 100
+
+# Passwords per bcrypt thread job; a batch's jobs run side by side in the default thread pool
+_HASH_CHUNK = 25
+
+
+def _job_key(job_id: str) -> str:
+    return f"onboarding:job:{job_id}"
+
+
+class _ClassPlacer:
+    """Puts each new student in the least-filled class of their grade for the academic year.
+
+    Placements stay pending until the batch commits, so a batch that rolls back
+    and is retried form by form does not count its seats twice.
+    """
+
+    def __init__(self, enrollment_counts: Dict[str, Dict[int, int]]):
+        self._counts = enrollment_counts
+        self._pending: Dict[Tuple[str, int], int] = {}
+
+    def place(self, grade_level: str) -> Optional[int]:
+        classes = self._counts.get(grade_level)
+        if not classes:
+            return None
+        class_id = min(
+            classes,
+            key=lambda candidate: (classes[candidate] + self._pending.get((grade_level, candidate), 0), candidate)
+        )
+        self._pending[(grade_level, class_id)] = self._pending.get((grade_level, class_id), 0) + 1
+        return class_id
+
+    def confirm(self) -> None:
+        for (grade_level, class_id), added in self._pending.items():
+            self._counts[grade_level][class_id] += added
+        self._pending.clear()
+
+    def discard(self) -> None:
+        self._pending.clear()
+
+
+# The job task copies the request's context, so run() is traced as a child of the request that started it
+@trace_methods
+class CohortOnboarding:
+    """Turns the APPROVED admission forms of an intake into student accounts.
+
+    Forms are processed in batches of ONBOARDING_BATCH_SIZE, each in its own
+    transaction that creates the User, Student, ClassEnrollment and Fee rows
+    and sets AdmissionForm.student_id. A form with a student_id is done, so a
+    job that stopped part way is resumed by starting it again. Concurrent jobs
+    skip rows another job has locked instead of onboarding them twice.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        self._student_role_id: Optional[int] = None
+
+    async def start(self, request: CohortOnboardingRequest) -> Dict[str, Any]:
+        """Record a queued job and run it in the background; returns its status"""
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": OnboardingJobStatus.QUEUED.value,
+            "academic_year": request.academic_year,
+            "started_at": now,
+            "updated_at": now,
+            "batches": 0,
+            "students_created": 0,
+            "forms_linked": 0,
+            "without_class": 0,
+            "failures": [],
+            "error": None,
+        }
+        await self._save(job)
+        task = asyncio.create_task(self.run(job, request), name=f"cohort-onboarding-{job['job_id']}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await asyncio.to_thread(redis_service.client.get, _job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def stop(self) -> None:
+        """Cancel running jobs; the open batch rolls back and a new job resumes from there"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        job["updated_at"] = datetime.now(timezone.utc).isoformat()
+        # Encoded here: the job dict keeps changing on the loop while the thread writes
+        await asyncio.to_thread(
+            redis_service.client.setex, _job_key(job["job_id"]), Config.ONBOARDING_JOB_TTL_SECONDS, json.dumps(job)
+        )
+
+    async def run(self, job: Dict[str, Any], request: CohortOnboardingRequest) -> None:
+        job["status"] = OnboardingJobStatus.RUNNING.value
+        await self._save(job)
+        started = asyncio.get_running_loop().time()
+        try:
+            placer = _ClassPlacer(await self._class_enrollment_counts(request.academic_year))
+            skipped: Set[int] = set()
+            failed = 0
+
+            while True:
+                async with AsyncSessionLocal() as session:
+                    form_ids = await self._next_form_ids(session, request, skipped)
+                if not form_ids:
+                    break
+                try:
+                    counts, rejected = await self._onboard(form_ids, request, placer)
+                except Exception as e:
+                    logger.warning(f"Onboarding batch of {len(form_ids)} failed, retrying individually: {str(e)}")
+                    counts = {"students_created": 0, "forms_linked": 0, "without_class": 0}
+                    rejected = {}
+                    for form_id in form_ids:
+                        try:
+                            single, single_rejected = await self._onboard([form_id], request, placer)
+                        except Exception as e:
+                            logger.error(f"Onboarding admission {form_id} failed: {str(e)}")
+                            rejected[form_id] = str(e)
+                            continue
+                        rejected.update(single_rejected)
+                        for name, value in single.items():
+                            counts[name] += value
+
+                # Rejected forms stay unlinked; skip them so the next batch moves on
+                for form_id, error in rejected.items():
+                    skipped.add(form_id)
+                    failed += 1
+                    if len(job["failures"]) < _MAX_REPORTED_FAILURES:
+                        job["failures"].append({"admission_id": form_id, "error": error})
+
+                if counts["forms_linked"] == 0:
+                    # Every form was locked by another job; that job onboards them
+                    skipped.update(form_ids)
+                job["batches"] += 1
+                for name, value in counts.items():
+                    job[name] += value
+                await self._save(job)
+
+            job["status"] = OnboardingJobStatus.COMPLETED.value
+            logger.info(
+                f"Onboarding job {job['job_id']} finished in {asyncio.get_running_loop().time() - started:.1f}s: "
+                f"{job['students_created']} students created, {job['forms_linked']} forms linked, "
+                f"{failed} failed"
+            )
+        except asyncio.CancelledError:
+            job["status"] = OnboardingJobStatus.FAILED.value
+            job["error"] = "Cancelled at shutdown; start the job again to resume"
+            raise
+        except Exception as e:
+            logger.error(f"Onboarding job {job['job_id']} failed: {str(e)}", exc_info=True)
+            job["status"] = OnboardingJobStatus.FAILED.value
+            job["error"] = str(e)
+        finally:
+            await self._save(job)
+
+    async def _class_enrollment_counts(self, academic_year: str) -> Dict[str, Dict[int, int]]:
+        """grade level -> {class id: current enrollments} for the academic year's classes"""
+        async with AsyncSessionLocal() as session:
+            rows = await session.execute(
+                select(Class.grade_level, Class.id, func.count(ClassEnrollment.id))
+                .outerjoin(ClassEnrollment, ClassEnrollment.class_id == Class.id)
+                .where(Class.academic_year == academic_year)
+                .group_by(Class.grade_level, Class.id)
+            )
+            counts: Dict[str, Dict[int, int]] = {}
+            for grade_level, class_id, enrolled in rows.all():
+                counts.setdefault(grade_level, {})[class_id] = enrolled
+        return counts
+
+    async def _next_form_ids(self, session, request: CohortOnboardingRequest, skipped: Set[int]) -> List[int]:
+        query = (
+            select(AdmissionForm.id)
+            .where(AdmissionForm.status == AdmissionStatus.APPROVED)
+            .where(AdmissionForm.student_id.is_(None))
+            .order_by(AdmissionForm.id)
+            .limit(Config.ONBOARDING_BATCH_SIZE)
+        )
+        if request.intended_grades:
+            query = query.where(AdmissionForm.intended_grade.in_(request.intended_grades))
+        if request.submitted_from:
+            query = query.where(AdmissionForm.submission_date >= request.submitted_from)
+        if request.submitted_to:
+            query = query.where(AdmissionForm.submission_date < request.submitted_to)
+        if skipped:
+            query = query.where(AdmissionForm.id.not_in(skipped))
+        return list((await session.execute(query)).scalars())
+
+    async def _onboard(self, form_ids: List[int], request: CohortOnboardingRequest,
+                       placer: _ClassPlacer) -> Tuple[Dict[str, int], Dict[int, str]]:
+        """Create the accounts for one batch of forms in a single transaction.
+
+        Returns the counts, and the forms that were not onboarded with the reason.
+        """
+        async with AsyncSessionLocal() as session:
+            # Re-check under lock: another job may have onboarded some of these since they were listed
+            form_rows = await session.execute(
+                select(AdmissionForm.id, AdmissionForm.parent_id, AdmissionForm.student_first_name,
+                       AdmissionForm.student_last_name, AdmissionForm.student_dob, AdmissionForm.student_contact,
+                       AdmissionForm.student_email, AdmissionForm.intended_grade)
+                .where(AdmissionForm.id.in_(form_ids))
+                .where(AdmissionForm.status == AdmissionStatus.APPROVED)
+                .where(AdmissionForm.student_id.is_(None))
+                .order_by(AdmissionForm.id)
+                .with_for_update(skip_locked=True)
+            )
+            forms = form_rows.all()
+            if not forms:
+                return {"students_created": 0, "forms_linked": 0, "without_class": 0}, {}
+
+            # Applicants who already have an account keep it, if it is a student's or has no
+            # role yet. Any other account (often the parent's own email typed for the child)
+            # is left alone and the form is reported instead.
+            account_rows = await session.execute(
+                select(User.email, User.id, Student.id)
+                .outerjoin(Student, Student.user_id == User.id)
+                .where(User.email.in_({form.student_email for form in forms}))
+            )
+            accounts = {email: (user_id, student_id) for email, user_id, student_id in account_rows.all()}
+            other_roles = set((await session.execute(
+                select(user_role.c.user_id)
+                .join(Role, Role.id == user_role.c.role_id)
+                .where(user_role.c.user_id.in_([user_id for user_id, _ in accounts.values()]))
+                .where(Role.name != RoleEnum.STUDENT)
+            )).scalars())
+            conflicting = {email for email, (user_id, student_id) in accounts.items()
+                           if student_id is None and user_id in other_roles}
+            rejected = {
+                form.id: f"{form.student_email} belongs to an existing non-student account"
+                for form in forms if form.student_email in conflicting
+            }
+            forms = [form for form in forms if form.student_email not in conflicting]
+            for email in conflicting:
+                del accounts[email]
+
+            # One new student per distinct email; repeat forms for the same applicant share it
+            new_students: Dict[str, Any] = {}
+            for form in forms:
+                _, student_id = accounts.get(form.student_email, (None, None))
+                if student_id is None:
+                    new_students.setdefault(form.student_email, form)
+
+            student_ids = {email: student_id for email, (_, student_id) in accounts.items() if student_id is not None}
+            without_class = 0
+            try:
+                if new_students:
+                    without_class = await self._create_students(
+                        session, list(new_students.values()), accounts, student_ids, request, placer
+                    )
+                if forms:
+                    await session.execute(
+                        update(AdmissionForm),
+                        [dict(id=form.id, student_id=student_ids[form.student_email]) for form in forms]
+                    )
+                await session.commit()
+            except BaseException:
+                placer.discard()
+                raise
+            placer.confirm()
+
+        if new_students:
+            # Core inserts bypass the ORM flush hooks that normally invalidate parent dashboards
+            await invalidate_dashboards(parent_ids={form.parent_id for form in new_students.values()})
+
+        counts = {"students_created": len(new_students), "forms_linked": len(forms), "without_class": without_class}
+        return counts, rejected
+
+    async def _create_students(self, session, forms: list, accounts: Dict[str, tuple], student_ids: Dict[str, int],
+                               request: CohortOnboardingRequest, placer: _ClassPlacer) -> int:
+        """Insert users, roles, students, class enrollments and fees; fills student_ids by email.
+
+        New accounts get their own temporary password, sent in a welcome email through
+        the outbox, the same way as accounts created by an admin.
+        """
+        now = datetime.now(timezone.utc)
+        numbers = await enrollment_numbers.allocate_many(len(forms))
+        number_by_email = {form.student_email: number for form, number in zip(forms, numbers)}
+
+        user_ids = {email: user_id for email, (user_id, _) in accounts.items()}
+        to_create = [form for form in forms if form.student_email not in user_ids]
+        if to_create:
+            passwords = [generate_password() for _ in to_create]
+            chunks = [passwords[i:i + _HASH_CHUNK] for i in range(0, len(passwords), _HASH_CHUNK)]
+            hashes = [h for chunk in await asyncio.gather(*map(generate_password_hashes_async, chunks)) for h in chunk]
+            inserted = await session.execute(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [
+                    dict(
+                        first_name=form.student_first_name,
+                        last_name=form.student_last_name,
+                        gender=Gender.PREFER_NOT_TO_SAY,
+                        date_of_birth=form.student_dob,
+                        contact_number=form.student_contact,
+                        email=form.student_email,
+                        username=number_by_email[form.student_email],
+                        password_hash=password_hash,
+                        is_active=True,
+                        created_at=now,
+                        updated_at=now
+                    )
+                    for form, password_hash in zip(to_create, hashes)
+                ]
+            )
+            user_ids.update(zip((form.student_email for form in to_create), inserted.scalars().all()))
+            for form, password in zip(to_create, passwords):
+                enqueue_email(session, EMAIL_WELCOME, form.student_email, password=password)
+
+        role_id = await self._get_student_role_id(session)
+        if role_id is not None:
+            account_ids = [user_ids[form.student_email] for form in forms]
+            has_role = set((await session.execute(
+                select(user_role.c.user_id)
+                .where(user_role.c.role_id == role_id)
+                .where(user_role.c.user_id.in_(account_ids))
+            )).scalars())
+            role_rows = [dict(user_id=user_id, role_id=role_id) for user_id in account_ids if user_id not in has_role]
+            if role_rows:
+                await session.execute(insert(user_role), role_rows)
+
+        inserted = await session.execute(
+            insert(Student).returning(Student.id, sort_by_parameter_order=True),
+            [
+                dict(
+                    enrollment_number=number,
+                    grade_level=form.intended_grade,
+                    enrollment_date=now,
+                    is_active=True,
+                    user_id=user_ids[form.student_email],
+                    parent_id=form.parent_id
+                )
+                for form, number in zip(forms, numbers)
+            ]
+        )
+        new_ids = inserted.scalars().all()
+        student_ids.update(zip((form.student_email for form in forms), new_ids))
+
+        enrollment_rows = []
+        for form, student_id in zip(forms, new_ids):
+            class_id = placer.place(form.intended_grade)
+            if class_id is not None:
+                enrollment_rows.append(dict(student_id=student_id, class_id=class_id, enrollment_date=now))
+        if enrollment_rows:
+            await session.execute(insert(ClassEnrollment), enrollment_rows)
+
+        if request.tuition_fee:
+            due_date = request.fee_due_date or now + timedelta(days=Config.ONBOARDING_FEE_DUE_DAYS)
+            await session.execute(insert(Fee), [
+                dict(
+                    student_id=student_id,
+                    parent_id=form.parent_id,
+                    admission_form_id=form.id,
+                    amount=request.tuition_fee,
+                    fee_type=FeeType.TUITION,
+                    due_date=due_date,
+                    status=FeeStatus.UNPAID
+                )
+                for form, student_id in zip(forms, new_ids)
+            ])
+
+        return len(forms) - len(enrollment_rows)
+
+    async def _get_student_role_id(self, session) -> Optional[int]:
+        if self._student_role_id is None:
+            self._student_role_id = await session.scalar(select(Role.id).where(Role.name == RoleEnum.STUDENT))
+        return self._student_role_id
+
+
+cohort_onboarding = CohortOnboarding()
@@ -1,32 +1,39 @@
-from fastapi import APIRouter, Depends, status, HTTPException, BackgroundTasks
+import base64
+import logging
+from fastapi import APIRouter, Depends, status, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
 from .services import AdminService
 from src.db.models import *
 from src.db.main import get_session
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from . import schemas
 from src.authservice.dependencies import get_current_user  
+from src.responses import PydanticJSONResponse
 
 admin_router = APIRouter()
 admin_service = AdminService()
+logger = logging.getLogger(__name__)
 
-@admin_router.get("/admission-request")
+@admin_router.get("/admission-request", response_model=schemas.AdmissionListResponse, response_class=PydanticJSONResponse)
 async def get_all_admission_request(
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     # Optionally check if current_user["role"] == "ADMIN"
-    admissions = await AdminService().get_all_admission(current_user, session)
-    return {"admissions": admissions}
+    admissions = await admin_service.get_all_admission(current_user, session)
+    return PydanticJSONResponse(schemas.AdmissionListResponse(admissions=admissions))
 
-@admin_router.get("/get_admission/{admission_id}")
+@admin_router.get("/get_admission/{admission_id}", response_model=schemas.AdmissionDetailResponse, response_class=PydanticJSONResponse)
 async def get_admission(
     admission_id: int,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     try:
-        admission = await AdminService().get_admission_by_id(current_user, admission_id, session)
-        return {"admission": admission}
+        admission = await admin_service.get_admission_by_id(current_user, admission_id, session)
+        return PydanticJSONResponse(
+            schemas.AdmissionDetailResponse(admission=schemas.AdmissionFormResponse.model_validate(admission))
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -35,43 +42,39 @@ async def get_admission(
             detail="An error occurred while fetching the admission"
         )
 
-@admin_router.post("/verify-admission/{admission_id}")
+@admin_router.post("/verify-admission/{admission_id}", response_model=schemas.AdmissionDecisionResponse, response_class=PydanticJSONResponse)
 async def verify_admission(
     admission_id: int,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     """Verify admission"""
     try:
         result = await admin_service.verify_admission(
-            current_user, admission_id, background_tasks, session
+            current_user, admission_id, session
         )
-        return result
+        return PydanticJSONResponse(result)
     except HTTPException:
         raise
-    except Exception as e:
-        import traceback
-        print("Exception occurred:", str(e))
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Verifying admission %s failed", admission_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while verifying the admission"
         )
 
-@admin_router.post("/decline-admission/{admission_id}")
+@admin_router.post("/decline-admission/{admission_id}", response_model=schemas.AdmissionDecisionResponse, response_class=PydanticJSONResponse)
 async def decline_admission(
     admission_id: int,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user)
 ):
     """Decline admission"""
     try:
         result = await admin_service.decline_admission(
-            current_user, admission_id, background_tasks, session
+            current_user, admission_id, session
         )
-        return result
+        return PydanticJSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
@@ -80,7 +83,77 @@ async def decline_admission(
             detail="An error occurred while declining the admission"
         )
 
-@admin_router.get("/admission-records")
+@admin_router.post("/admissions/decisions", response_model=schemas.BatchDecisionResponse, response_class=PydanticJSONResponse)
+async def decide_admissions(
+    request: schemas.BatchDecisionRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Approve or decline a batch of admissions"""
+    try:
+        result = await admin_service.decide_admissions(current_user, request, session)
+        return PydanticJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing the admission decisions"
+        )
+
+@admin_router.post("/admissions/claim", response_model=schemas.ClaimedAdmissionsResponse, response_class=PydanticJSONResponse)
+async def claim_admissions(
+    limit: int = Query(20, ge=1),
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Claim the next pending admissions for review"""
+    try:
+        result = await admin_service.claim_admissions(current_user, limit, session)
+        return PydanticJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while claiming admissions"
+        )
+
+@admin_router.post("/admissions/claim/release", response_model=schemas.ClaimReleaseResponse, response_class=PydanticJSONResponse)
+async def release_admissions(
+    request: schemas.ClaimReleaseRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: dict = Depends(get_current_user)
+):
+    """Release claimed admissions back to the pending queue"""
+    try:
+        result = await admin_service.release_admissions(current_user, request, session)
+        return PydanticJSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while releasing admissions"
+        )
+
+@admin_router.post("/admissions/onboard", status_code=status.HTTP_202_ACCEPTED,
+                   response_model=schemas.OnboardingJobResponse, response_class=PydanticJSONResponse)
+async def start_cohort_onboarding(
+    request: schemas.CohortOnboardingRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Create student accounts for approved admissions in the background; safe to re-run"""
+    result = await admin_service.start_cohort_onboarding(current_user, request)
+    return PydanticJSONResponse(result, status_code=status.HTTP_202_ACCEPTED)
+
+@admin_router.get("/onboarding/{job_id}", response_model=schemas.OnboardingJobResponse, response_class=PydanticJSONResponse)
+async def get_onboarding_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get the progress of a cohort onboarding job"""
+    result = await admin_service.get_onboarding_job(current_user, job_id)
+    return PydanticJSONResponse(result)
+
+@admin_router.get("/admission-records", response_model=schemas.AcademicRecordListResponse, response_class=PydanticJSONResponse)
 async def get_all_admission_records(
     session: AsyncSession = Depends(get_session),
     current_user: dict = Depends(get_current_user),
@@ -89,7 +162,7 @@ async def get_all_admission_records(
     """Get all admission records"""
     try:
         records = await admin_service.get_all_admission_records(current_user, session)
-        return {"records": records}
+        return PydanticJSONResponse(schemas.AcademicRecordListResponse(records=records))
     except HTTPException:
         raise
     except Exception as e:
@@ -98,7 +171,7 @@ async def get_all_admission_records(
             detail="An error occurred while fetching admission records"
         )
 
-@admin_router.get("/academic-records/{student_id}")
+@admin_router.get("/academic-records/{student_id}", response_model=schemas.AcademicRecordListResponse, response_class=PydanticJSONResponse)
 async def get_academic_records_by_student(
     student_id: int,
     session: AsyncSession = Depends(get_session),
@@ -109,7 +182,7 @@ async def get_academic_records_by_student(
         records = await admin_service.get_academic_records_by_admin(
             current_user, student_id, session
         )
-        return {"records": records}
+        return PydanticJSONResponse(schemas.AcademicRecordListResponse(records=records))
     except HTTPException:
         raise
     except Exception as e:
@@ -119,18 +192,55 @@ async def get_academic_records_by_student(
         )
         
         
-@admin_router.get("/search")
-async def filter(student_name:str,current_user:dict = Depends(get_current_user),session:AsyncSession = Depends(get_session)):
+@admin_router.get("/search", response_model=schemas.StudentListResponse, response_class=PydanticJSONResponse)
+async def filter(student_name:str,limit:int = Query(10, ge=1, le=100),offset:int = Query(0, ge=0),current_user:dict = Depends(get_current_user),session:AsyncSession = Depends(get_session)):
     """
     Filter students by name
     """
     try:
-        students = await admin_service.filter(student_name, current_user, session)
-        return {"students": students}
+        students = await admin_service.filter(student_name, current_user, session, limit=limit, offset=offset)
+        return PydanticJSONResponse(schemas.StudentListResponse(students=students))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while filtering students"
-        )
\ No newline at end of file
+        )
+
+
+@admin_router.get("/slow-queries", response_model=schemas.SlowQueryListResponse, response_class=PydanticJSONResponse)
+async def get_slow_queries(current_user: dict = Depends(get_current_user)):
+    """Get sampled EXPLAIN plans of recent slow queries"""
+    samples = await admin_service.get_slow_queries(current_user)
+    return PydanticJSONResponse(schemas.SlowQueryListResponse(slow_queries=samples))
+
+@admin_router.get("/profiles", response_model=schemas.ProfileListResponse, response_class=PydanticJSONResponse)
+async def get_profiles(limit: int = Query(50, ge=1, le=200), current_user: dict = Depends(get_current_user)):
+    """List recent request profiles (see PROFILING_ENABLED)"""
+    profiles = await admin_service.get_profiles(current_user, limit)
+    return PydanticJSONResponse(schemas.ProfileListResponse(profiles=profiles))
+
+@admin_router.get("/profiles/{profile_id}", response_model=schemas.ProfileResponse, response_class=PydanticJSONResponse)
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed|pstats)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a request profile as JSON, collapsed stacks (sampling mode) or a pstats file (cprofile mode)"""
+    profile = await admin_service.get_profile(current_user, profile_id)
+    if format == "json":
+        return PydanticJSONResponse(profile)
+    data = profile.collapsed if format == "collapsed" else profile.pstats
+    if data is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A {profile.mode} profile has no {format} output"
+        )
+    if format == "collapsed":
+        return PlainTextResponse(data)
+    return Response(
+        content=base64.b64decode(data),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'}
+    )
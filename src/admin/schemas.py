@@ -0,0 +1,192 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Literal, Optional
+from src.db.models import AdmissionStatus
+
+
+class AdmissionFormResponse(BaseModel):
+    id: int
+    form_id: str
+    student_id: Optional[int] = None
+    parent_id: int
+    purchase_id: Optional[int] = None
+    student_first_name: str
+    student_last_name: str
+    student_dob: Optional[datetime] = None
+    student_contact: str
+    student_email: str
+    parent_first_name: str
+    parent_last_name: str
+    parent_relationship: str
+    parent_contact: str
+    parent_email: str
+    intended_grade: str
+    previous_school: Optional[str] = None
+    medical_conditions: Optional[str] = None
+    status: AdmissionStatus
+    submission_date: datetime
+    processed_by_id: Optional[int] = None
+    claimed_by_id: Optional[int] = None
+    claim_expires_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AdmissionListResponse(BaseModel):
+    admissions: List[AdmissionFormResponse]
+
+
+class AdmissionDetailResponse(BaseModel):
+    admission: AdmissionFormResponse
+
+
+class AdmissionDecision(BaseModel):
+    id: int
+    status: AdmissionStatus
+    student_id: Optional[int] = None
+
+
+class AdmissionDecisionResponse(BaseModel):
+    message: str
+    admission: AdmissionDecision
+
+
+class BatchDecisionRequest(BaseModel):
+    admission_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    decision: Literal["approve", "decline"]
+
+
+class BatchDecisionOutcome(BaseModel):
+    id: int
+    outcome: Literal["approved", "rejected", "not_found", "already_processed"]
+    status: Optional[AdmissionStatus] = None
+    student_id: Optional[int] = None
+    notified: Optional[str] = None
+
+
+class BatchDecisionResponse(BaseModel):
+    decision: Literal["approve", "decline"]
+    updated: int
+    results: List[BatchDecisionOutcome]
+
+
+class ClaimedAdmissionsResponse(BaseModel):
+    lease_expires_at: Optional[datetime] = None
+    admissions: List[AdmissionFormResponse]
+
+
+class ClaimReleaseRequest(BaseModel):
+    admission_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class ClaimReleaseResponse(BaseModel):
+    released: List[int]
+
+
+class OnboardingJobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class CohortOnboardingRequest(BaseModel):
+    academic_year: str = Field(..., max_length=10)
+    intended_grades: Optional[List[str]] = None
+    submitted_from: Optional[datetime] = None
+    submitted_to: Optional[datetime] = None
+    tuition_fee: Optional[float] = Field(None, gt=0)
+    fee_due_date: Optional[datetime] = None
+
+
+class OnboardingFailure(BaseModel):
+    admission_id: int
+    error: str
+
+
+class OnboardingJobResponse(BaseModel):
+    job_id: str
+    status: OnboardingJobStatus
+    academic_year: str
+    started_at: datetime
+    updated_at: datetime
+    batches: int = 0
+    students_created: int = 0
+    forms_linked: int = 0
+    without_class: int = 0
+    failures: List[OnboardingFailure] = []
+    error: Optional[str] = None
+
+
+class AcademicRecordResponse(BaseModel):
+    id: int
+    student_id: int
+    teacher_id: int
+    subject: str
+    grade: str
+    term: str
+    academic_year: str
+    comments: Optional[str] = None
+    recorded_date: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AcademicRecordListResponse(BaseModel):
+    records: List[AcademicRecordResponse]
+
+
+class StudentSummaryResponse(BaseModel):
+    id: int
+    enrollment_number: str
+    first_name: str
+    last_name: str
+    grade_level: str
+    section: Optional[str] = None
+    enrollment_date: datetime
+    is_active: bool
+    parent_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StudentListResponse(BaseModel):
+    students: List[StudentSummaryResponse]
+
+
+class SlowQuerySample(BaseModel):
+    captured_at: datetime
+    route: Optional[str] = None
+    function: Optional[str] = None
+    duration_ms: float
+    statement: str
+    parameters: Any = None
+    plan: Any = None
+
+
+class SlowQueryListResponse(BaseModel):
+    slow_queries: List[SlowQuerySample]
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    mode: str
+    reason: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: int
+    duration_ms: float
+    created_at: datetime
+    samples: Optional[int] = None
+
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileSummary]
+
+
+class ProfileResponse(ProfileSummary):
+    collapsed: Optional[str] = None
+    stats: Optional[str] = None
+    pstats: Optional[str] = None
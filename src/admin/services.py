@@ -1,11 +1,26 @@
-from fastapi import status, HTTPException, Depends, BackgroundTasks, Query
+from fastapi import status, HTTPException, Depends, Query
 from src.db.models import *
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, exists, or_
+from sqlalchemy import and_, select, exists, func, or_, update
+from datetime import datetime, timedelta, timezone
+from src.db.projections import columns_for, rows_to
 from fastapi.responses import JSONResponse
-from src.mail import send_approve_admission_email, send_decline_admission_email
+from src.outbox import EMAIL_ADMISSION_APPROVED, EMAIL_ADMISSION_DECLINED, enqueue_email, enqueue_emails
+from src.config import Config
+from src.db.slow_queries import get_explain_samples
+from src.profiling import get_profile, list_profiles
+from .schemas import (AdmissionFormResponse, AdmissionDecision, AdmissionDecisionResponse, AcademicRecordResponse,
+                      StudentSummaryResponse, SlowQuerySample, BatchDecisionRequest, BatchDecisionOutcome,
+                      BatchDecisionResponse, ClaimedAdmissionsResponse, ClaimReleaseRequest, ClaimReleaseResponse,
+                      CohortOnboardingRequest, OnboardingJobResponse, ProfileSummary, ProfileResponse)
+from .onboarding import cohort_onboarding
+from src.tracing import trace_methods
+import logging
 
+logger = logging.getLogger(__name__)
 
+
+@trace_methods
 class AdminService:
     async def get_admin_by_id(self, admin_id: int, session: AsyncSession):
         """Get admin by ID"""
@@ -31,7 +46,7 @@ class AdminService:
             )
         return admin
     
-    async def get_all_admission(self, current_user:dict, session: AsyncSession):
+    async def get_all_admission(self, current_user:dict, session: AsyncSession) -> List[AdmissionFormResponse]:
         """Get all admission requests"""
         # Verify admin exists and has permission
         
@@ -41,11 +56,10 @@ class AdminService:
                 detail="You do not have permission to access this resource"
             )
         
-        query = select(AdmissionForm)
+        query = select(*columns_for(AdmissionFormResponse, AdmissionForm)).order_by(AdmissionForm.id)
         result = await session.execute(query)
-        admissions = result.scalars().all()
 
-        return admissions
+        return rows_to(AdmissionFormResponse, result)
     
     async def get_admission_by_id(self, current_user: dict, admission_id: int, session: AsyncSession):
         """Get admission by ID"""
@@ -64,8 +78,7 @@ class AdminService:
             )
         return admission
     
-    async def verify_admission(self, current_user: dict, admission_id: int, background_tasks: BackgroundTasks,
-                               session: AsyncSession):
+    async def verify_admission(self, current_user: dict, admission_id: int, session: AsyncSession):
         """Verify an admission application and notify the user by email."""
         if current_user.get("role") != "SUPER_ADMIN":
             raise HTTPException(
@@ -88,57 +101,34 @@ class AdminService:
                 detail=f"Admission is already {admission.status.value.lower()}"
             )
 
-        # Defensive: Ensure admission has a student
-        # if not admission.student_id:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_400_BAD_REQUEST,
-        #         detail="Admission has no associated student"
-        #     )
-        # print(f"admission.student_id: {admission.student_id}")    
-
-        # Fetch the student
-        student = await session.get(Student, admission.student_id)
-        if not student or not student.user_id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Associated student or user not found"
-            )
-        print(f"student: {student}")
-        
-        # Fetch the user
-        user = await session.get(User, student.user_id)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        print(f"student.user_id: {student.user_id}")
-        
-            
-        user_email = user.email
+        # New applicants have no student account until their cohort is onboarded,
+        # so fall back to the parent email on the form
+        result = await session.execute(
+            select(func.coalesce(User.email, AdmissionForm.parent_email))
+            .select_from(AdmissionForm)
+            .outerjoin(Student, Student.id == AdmissionForm.student_id)
+            .outerjoin(User, User.id == Student.user_id)
+            .where(AdmissionForm.id == admission.id)
+        )
+        user_email = result.scalar_one()
 
-        # Update the admission status
+        # Update the admission status and queue the notification in the same transaction
         admission.status = AdmissionStatus.APPROVED
+        admission.claimed_by_id = None
+        admission.claim_expires_at = None
+        enqueue_email(session, EMAIL_ADMISSION_APPROVED, user_email, admission_id=admission_id)
         await session.commit()
 
-        # Send email notification in the background
-        background_tasks.add_task(
-            send_approve_admission_email,
-            email=user_email,
-            admission_id=admission_id
+        return AdmissionDecisionResponse(
+            message="Admission approved successfully",
+            admission=AdmissionDecision(
+                id=admission.id,
+                status=admission.status,
+                student_id=admission.student_id
+            )
         )
-
-        return {
-            "message": "Admission approved successfully",
-            "admission": {
-                "id": admission.id,
-                "status": admission.status.value,
-                "student_id": admission.student_id
-            }
-        }
         
-    async def decline_admission(self, current_user:dict, admission_id: int, background_tasks: BackgroundTasks, session: AsyncSession):
+    async def decline_admission(self, current_user:dict, admission_id: int, session: AsyncSession):
         """Decline an admission application"""
         if current_user.get("role") != "SUPER_ADMIN":
             raise HTTPException(
@@ -167,27 +157,155 @@ class AdminService:
                 detail="User email not found"
             )
         
-        # Update the admission status
+        # Update the admission status and queue the notification in the same transaction
         admission.status = AdmissionStatus.REJECTED
+        admission.claimed_by_id = None
+        admission.claim_expires_at = None
+        enqueue_email(session, EMAIL_ADMISSION_DECLINED, user_email, admission_id=admission_id)
         await session.commit()
         
-        # Send email notification in the background
-        background_tasks.add_task(
-            send_decline_admission_email,
-            email=user_email,
-            admission_id=admission_id
+        return AdmissionDecisionResponse(
+            message="Admission declined successfully",
+            admission=AdmissionDecision(
+                id=admission.id,
+                status=admission.status,
+                student_id=admission.student_id
+            )
         )
         
-        return {
-            "message": "Admission declined successfully",
-            "admission": {
-                "id": admission.id, 
-                "status": admission.status.value,
-                "student_id": admission.student_id
-            }
-        }
-        
-    async def get_all_admission_records(self, current_user:dict, session: AsyncSession):
+    async def decide_admissions(self, current_user: dict, request: BatchDecisionRequest,
+                                session: AsyncSession) -> BatchDecisionResponse:
+        """Approve or decline many admissions with one UPDATE and queue the applicant emails"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        approved = request.decision == "approve"
+        new_status = AdmissionStatus.APPROVED if approved else AdmissionStatus.REJECTED
+        admission_ids = list(dict.fromkeys(request.admission_ids))
+
+        # Same transition rule as verify/decline: anything not yet approved or rejected
+        updated = await session.execute(
+            update(AdmissionForm)
+            .where(AdmissionForm.id.in_(admission_ids))
+            .where(AdmissionForm.status.not_in([AdmissionStatus.APPROVED, AdmissionStatus.REJECTED]))
+            .values(status=new_status, claimed_by_id=None, claim_expires_at=None)
+            .returning(AdmissionForm.id, AdmissionForm.student_id)
+            .execution_options(synchronize_session=False)
+        )
+        changed = {row.id: row.student_id for row in updated}
+
+        skipped = [admission_id for admission_id in admission_ids if admission_id not in changed]
+        existing = set()
+        if skipped:
+            existing = set((await session.execute(
+                select(AdmissionForm.id).where(AdmissionForm.id.in_(skipped))
+            )).scalars())
+
+        # The student's account email when one exists, otherwise the parent email on the form
+        recipients = {}
+        if changed:
+            emails = await session.execute(
+                select(AdmissionForm.id, func.coalesce(User.email, AdmissionForm.parent_email))
+                .outerjoin(Student, Student.id == AdmissionForm.student_id)
+                .outerjoin(User, User.id == Student.user_id)
+                .where(AdmissionForm.id.in_(changed))
+            )
+            recipients = dict(emails.all())
+
+        await enqueue_emails(
+            session,
+            EMAIL_ADMISSION_APPROVED if approved else EMAIL_ADMISSION_DECLINED,
+            [(recipients[admission_id], {"admission_id": admission_id})
+             for admission_id in changed if recipients.get(admission_id)]
+        )
+        await session.commit()
+
+        results = []
+        for admission_id in admission_ids:
+            if admission_id in changed:
+                results.append(BatchDecisionOutcome(
+                    id=admission_id,
+                    outcome="approved" if approved else "rejected",
+                    status=new_status,
+                    student_id=changed[admission_id],
+                    notified=recipients.get(admission_id)
+                ))
+            else:
+                results.append(BatchDecisionOutcome(
+                    id=admission_id,
+                    outcome="already_processed" if admission_id in existing else "not_found"
+                ))
+
+        logger.info(f"Batch {request.decision}: {len(changed)} of {len(admission_ids)} admissions updated")
+        return BatchDecisionResponse(decision=request.decision, updated=len(changed), results=results)
+
+    async def claim_admissions(self, current_user: dict, limit: int, session: AsyncSession) -> ClaimedAdmissionsResponse:
+        """Reserve the next pending admissions for this reviewer under a lease"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        reviewer_id = int(current_user["sub"])
+        now = datetime.now(timezone.utc)
+        lease_expires_at = now + timedelta(minutes=Config.ADMISSION_CLAIM_LEASE_MINUTES)
+
+        # SKIP LOCKED: concurrent reviewers each take different rows instead of queueing on the same ones
+        claimable = (
+            select(AdmissionForm.id)
+            .where(or_(
+                AdmissionForm.status == AdmissionStatus.PENDING,
+                and_(AdmissionForm.status == AdmissionStatus.UNDER_REVIEW, AdmissionForm.claim_expires_at < now)
+            ))
+            .order_by(AdmissionForm.submission_date, AdmissionForm.id)
+            .limit(min(limit, Config.ADMISSION_CLAIM_MAX_BATCH))
+            .with_for_update(skip_locked=True)
+            .cte("claimable")
+        )
+        result = await session.execute(
+            update(AdmissionForm)
+            .where(AdmissionForm.id == claimable.c.id)
+            .values(status=AdmissionStatus.UNDER_REVIEW, claimed_by_id=reviewer_id, claim_expires_at=lease_expires_at)
+            .returning(*columns_for(AdmissionFormResponse, AdmissionForm))
+            .execution_options(synchronize_session=False)
+        )
+        admissions = rows_to(AdmissionFormResponse, result)
+        await session.commit()
+
+        admissions.sort(key=lambda admission: (admission.submission_date, admission.id))
+        logger.info(f"Reviewer {reviewer_id} claimed {len(admissions)} admissions")
+        return ClaimedAdmissionsResponse(
+            lease_expires_at=lease_expires_at if admissions else None,
+            admissions=admissions
+        )
+
+    async def release_admissions(self, current_user: dict, request: ClaimReleaseRequest,
+                                 session: AsyncSession) -> ClaimReleaseResponse:
+        """Return this reviewer's claimed admissions to the pending queue"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        result = await session.execute(
+            update(AdmissionForm)
+            .where(AdmissionForm.id.in_(request.admission_ids))
+            .where(AdmissionForm.claimed_by_id == int(current_user["sub"]))
+            .where(AdmissionForm.status == AdmissionStatus.UNDER_REVIEW)
+            .values(status=AdmissionStatus.PENDING, claimed_by_id=None, claim_expires_at=None)
+            .returning(AdmissionForm.id)
+            .execution_options(synchronize_session=False)
+        )
+        released = sorted(result.scalars().all())
+        await session.commit()
+        return ClaimReleaseResponse(released=released)
+
+    async def get_all_admission_records(self, current_user:dict, session: AsyncSession) -> List[AcademicRecordResponse]:
         """Get all academic records (admission records)"""
         if current_user.get("role") != "SUPER_ADMIN":
             raise HTTPException(
@@ -195,13 +313,12 @@ class AdminService:
                 detail="You do not have permission to access this resource"
             )
         
-        query = select(AcademicRecord)
+        query = select(*columns_for(AcademicRecordResponse, AcademicRecord)).order_by(AcademicRecord.id)
         result = await session.execute(query)
-        records = result.scalars().all()
         
-        return records
+        return rows_to(AcademicRecordResponse, result)
         
-    async def get_academic_records_by_admin(self, current_user:dict, student_id: int, session: AsyncSession):
+    async def get_academic_records_by_admin(self, current_user:dict, student_id: int, session: AsyncSession) -> List[AcademicRecordResponse]:
         """Get academic records for a specific student"""
         if current_user.get("role") != "SUPER_ADMIN":
             raise HTTPException(
@@ -210,22 +327,24 @@ class AdminService:
             )
         
         # Verify student exists
-        student_query = select(Student).where(Student.id == student_id)
+        student_query = select(Student.id).where(Student.id == student_id)
         student_result = await session.execute(student_query)
-        student = student_result.scalars().first()
         
-        if not student:
+        if student_result.scalar() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="Student not found"
             )
         
         # Get academic records for the student
-        records_query = select(AcademicRecord).where(AcademicRecord.student_id == student_id)
+        records_query = (
+            select(*columns_for(AcademicRecordResponse, AcademicRecord))
+            .where(AcademicRecord.student_id == student_id)
+            .order_by(AcademicRecord.recorded_date.desc())
+        )
         records_result = await session.execute(records_query)
-        records = records_result.scalars().all()
         
-        return records
+        return rows_to(AcademicRecordResponse, records_result)
     
     async def get_admission_statistics(self, current_user:dict, session: AsyncSession):
         """Get admission statistics - bonus method for dashboard"""
@@ -257,25 +376,93 @@ class AdminService:
             "pending": pending_count
         }
         
-    async def filter(self,current_user:dict,session:AsyncSession,student_name:Optional[str] = Query(None, description="Search students by name"),limit:int=Query(10,ge=1,le=100),offset:int=Query(0,ge=0)) -> List[Student]:
-        
+    async def filter(self, student_name: Optional[str], current_user: dict, session: AsyncSession,
+                     limit: int = 10, offset: int = 0) -> List[StudentSummaryResponse]:
+        """Search students by first or last name"""
         if current_user.get("role") != "SUPER_ADMIN":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, 
                 detail="You do not have permission to access this resource"
             )
         
-        statement = select(Student)
+        statement = select(
+            *columns_for(StudentSummaryResponse, Student, first_name=User.first_name, last_name=User.last_name)
+        ).join(Student.user)
         
         if student_name:
-            statement = statement.where(Student.first_name.ilike(f"%{student_name}%"))
+            pattern = f"%{student_name}%"
+            statement = statement.where(or_(User.first_name.ilike(pattern), User.last_name.ilike(pattern)))
             
-        result = await session.execute(statement)
+        result = await session.execute(statement.order_by(Student.id).limit(limit).offset(offset))
         
-        students = result.scalars().all()
+        students = rows_to(StudentSummaryResponse, result)
         if not students:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="No students found"
             )
-        return students    
\ No newline at end of file
+        return students
+    
+    async def get_slow_queries(self, current_user: dict) -> List[SlowQuerySample]:
+        """Get the most recent sampled query plans for slow statements"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, 
+                detail="You do not have permission to access this resource"
+            )
+        
+        return [SlowQuerySample(**sample) for sample in get_explain_samples()]
+
+    async def start_cohort_onboarding(self, current_user: dict, request: CohortOnboardingRequest) -> OnboardingJobResponse:
+        """Start creating student accounts for the approved admissions of an intake"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        job = await cohort_onboarding.start(request)
+        logger.info(f"Cohort onboarding job {job['job_id']} started for {request.academic_year}")
+        return OnboardingJobResponse(**job)
+
+    async def get_onboarding_job(self, current_user: dict, job_id: str) -> OnboardingJobResponse:
+        """Get the progress of a cohort onboarding job"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        job = await cohort_onboarding.get_status(job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Onboarding job not found"
+            )
+        return OnboardingJobResponse(**job)
+
+    async def get_profiles(self, current_user: dict, limit: int) -> List[ProfileSummary]:
+        """List the most recent request profiles"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        return [ProfileSummary(**profile) for profile in await list_profiles(limit)]
+
+    async def get_profile(self, current_user: dict, profile_id: str) -> ProfileResponse:
+        """Get one request profile with its stacks or stats"""
+        if current_user.get("role") != "SUPER_ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to access this resource"
+            )
+
+        profile = await get_profile(profile_id)
+        if not profile:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profile not found"
+            )
+        return ProfileResponse(**profile)
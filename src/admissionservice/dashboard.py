@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config import Config
+from src.db.models import AcademicRecord, Fee
+from src.db.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Flushed changes remembered on session.info until the transaction commits
+_PENDING_KEY = "dashboard_invalidation"
+
+
+def _dashboard_key(parent_id: int) -> str:
+    return f"dashboard:parent:{parent_id}"
+
+
+def _ward_key(student_id: int) -> str:
+    return f"dashboard:student:{student_id}"
+
+
+# Redis round trips run in a worker thread, off the event loop
+
+async def get_cached_dashboard(parent_id: int) -> Optional[str]:
+    if Config.DASHBOARD_CACHE_TTL_SECONDS <= 0:
+        return None
+    return await asyncio.to_thread(redis_service.client.get, _dashboard_key(parent_id))
+
+
+def _store(parent_id: int, payload: str, student_ids: List[int], ttl: int) -> None:
+    pipe = redis_service.client.pipeline(transaction=False)
+    pipe.setex(_dashboard_key(parent_id), ttl, payload)
+    for student_id in student_ids:
+        # Outlives the dashboard so a record change can still be traced to its parent
+        pipe.setex(_ward_key(student_id), ttl * 2, parent_id)
+    pipe.execute()
+
+
+async def cache_dashboard(parent_id: int, payload: str, student_ids: Iterable[int]) -> None:
+    """Store the rendered dashboard and remember which parent each ward belongs to"""
+    ttl = Config.DASHBOARD_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    await asyncio.to_thread(_store, parent_id, payload, list(student_ids), ttl)
+
+
+def _invalidate(parent_ids: List[int], student_ids: List[int]) -> None:
+    """Drop the dashboards of these parents and of the parents of these students; never raises"""
+    try:
+        keys = {_dashboard_key(parent_id) for parent_id in parent_ids}
+        if student_ids:
+            owners = redis_service.client.mget([_ward_key(student_id) for student_id in student_ids])
+            keys.update(_dashboard_key(owner) for owner in owners if owner)
+        if keys:
+            redis_service.client.delete(*keys)
+    except Exception as e:
+        # The TTL still bounds staleness if Redis is unavailable
+        logger.warning(f"Dashboard cache invalidation failed: {str(e)}")
+
+
+async def invalidate_dashboards(parent_ids: Iterable[int] = (), student_ids: Iterable[int] = ()) -> None:
+    """Best effort: a Redis failure is logged, and the cached copy expires with its TTL"""
+    await asyncio.to_thread(_invalidate, list(parent_ids), list(student_ids))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    """Note parents and students whose fees or academic records were written"""
+    pending = None
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Fee):
+            pending = pending or session.info.setdefault(_PENDING_KEY, (set(), set()))
+            pending[0].add(obj.parent_id)
+        elif isinstance(obj, AcademicRecord):
+            pending = pending or session.info.setdefault(_PENDING_KEY, (set(), set()))
+            pending[1].add(obj.student_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    parent_ids, student_ids = (list(ids) for ids in pending)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Plain sync session outside the event loop (scripts): nothing to block
+        _invalidate(parent_ids, student_ids)
+        return
+    # Runs inside `await session.commit()`; hand the Redis round trips to a worker thread
+    loop.run_in_executor(None, _invalidate, parent_ids, student_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
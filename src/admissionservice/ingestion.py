@@ -0,0 +1,400 @@
+import asyncio
+import json
+import logging
+import secrets
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy import insert, or_, select
+
+from src.authservice.utils import generate_password_hashes_async
+from src.config import Config
+from src.db.main import AsyncSessionLocal
+from src.db.models import (AdmissionForm, AdmissionStatus, Gender, Parent, PurchaseAdmissionForm, Role, RoleEnum,
+                           Student, User, user_role)
+from src.db.redis import redis_service
+from src.metrics import Gauge
+from src.outbox import EMAIL_SERIAL_TOKEN, enqueue_emails
+from src.tracing import current_traceparent, start_span
+from .schemas import ApplicationFormCreate, PurchaseAdmissionFormCreate, SubmissionStatus
+from .tokens import is_token_rejected, mark_tokens_consumed, remember_purchase_tokens
+
+logger = logging.getLogger(__name__)
+
+PURCHASE = "purchase"
+APPLICATION = "application"
+
+
+class _Submission:
+    """One acknowledged request waiting to be persisted"""
+
+    __slots__ = ("tracking_id", "kind", "form_data", "submitted_at", "traceparent")
+
+    def __init__(self, kind: str, form_data: Union[PurchaseAdmissionFormCreate, ApplicationFormCreate]):
+        self.tracking_id = str(uuid.uuid4())
+        self.kind = kind
+        self.form_data = form_data
+        self.submitted_at = datetime.now(timezone.utc).isoformat()
+        # Trace of the submitting request; the batch that persists it links back to it
+        self.traceparent = current_traceparent()
+
+
+def _status_key(tracking_id: str) -> str:
+    return f"admission:submission:{tracking_id}"
+
+
+def _write_status(records: Dict[str, str]) -> None:
+    pipe = redis_service.client.pipeline(transaction=False)
+    for key, record in records.items():
+        pipe.setex(key, Config.ADMISSION_SUBMISSION_TTL_SECONDS, record)
+    pipe.execute()
+
+
+def _queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Admission queue is full, please retry shortly",
+        headers={"Retry-After": "5"}
+    )
+
+
+class AdmissionIngestionQueue:
+    """Bounded in-process queue drained by workers that batch inserts.
+
+    Submission state lives in Redis so any app process can answer status
+    lookups. Items still queued when the process dies are lost; the queue is
+    drained on a clean shutdown.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._parent_role_id: Optional[int] = None
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=Config.ADMISSION_QUEUE_MAX_DEPTH)
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"admission-ingest-{index}")
+            for index in range(Config.ADMISSION_QUEUE_WORKERS)
+        ]
+        logger.info(
+            "Admission ingestion queue started: %d workers, depth %d, batch %d, flush %.0fms",
+            Config.ADMISSION_QUEUE_WORKERS, Config.ADMISSION_QUEUE_MAX_DEPTH,
+            Config.ADMISSION_QUEUE_BATCH_SIZE, Config.ADMISSION_QUEUE_FLUSH_MS
+        )
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Persist what is already queued, then stop the workers"""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Admission queue shutdown timed out with %d submissions pending", self.depth)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, kind: str, form_data: Union[PurchaseAdmissionFormCreate, ApplicationFormCreate]) -> str:
+        """Acknowledge a validated request and queue it; returns the tracking id"""
+        if self._queue.full():
+            raise _queue_full()
+        if kind == APPLICATION and await is_token_rejected(form_data.purchase_token):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invalid or already used purchase token"
+            )
+        submission = _Submission(kind, form_data)
+        # Recorded before queueing, so a worker's later status is never overwritten by this one
+        await self._save_status([submission], SubmissionStatus.QUEUED)
+        try:
+            self._queue.put_nowait(submission)
+        except asyncio.QueueFull:
+            # Filled up while the status was written; the unreturned record just expires
+            raise _queue_full()
+        return submission.tracking_id
+
+    async def get_status(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        raw = await asyncio.to_thread(redis_service.client.get, _status_key(tracking_id))
+        return json.loads(raw) if raw else None
+
+    async def _save_status(self, submissions: List[_Submission], state: SubmissionStatus,
+                           results: Optional[Dict[str, Dict[str, Any]]] = None,
+                           errors: Optional[Dict[str, str]] = None) -> None:
+        """Write the state of several submissions in one Redis round trip, off the event loop.
+
+        Best effort: a Redis failure is logged, and never stops the submissions being persisted.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        records = {
+            _status_key(submission.tracking_id): json.dumps({
+                "tracking_id": submission.tracking_id,
+                "kind": submission.kind,
+                "status": state.value,
+                "submitted_at": submission.submitted_at,
+                "updated_at": now,
+                "result": (results or {}).get(submission.tracking_id),
+                "error": (errors or {}).get(submission.tracking_id),
+            })
+            for submission in submissions
+        }
+        try:
+            await asyncio.to_thread(_write_status, records)
+        except RedisError as e:
+            logger.warning(f"Could not record {state.value} status for {len(records)} submissions: {str(e)}")
+
+    async def _next_batch(self) -> List[_Submission]:
+        """Wait for one submission, then collect more until the batch is full or the flush interval passes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + Config.ADMISSION_QUEUE_FLUSH_MS / 1000
+        while len(batch) < Config.ADMISSION_QUEUE_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._save_status(batch, SubmissionStatus.PROCESSING)
+                # Purchases first, so an application in the same batch can use a token bought in it
+                for kind, persist in ((PURCHASE, self._persist_purchases), (APPLICATION, self._persist_applications)):
+                    items = [submission for submission in batch if submission.kind == kind]
+                    if items:
+                        with start_span(f"admission.ingest {kind}", links=[item.traceparent for item in items],
+                                        attributes={"admission.batch_size": len(items)}):
+                            await self._persist_with_fallback(items, persist)
+            except Exception as e:
+                logger.error(f"Admission ingest worker {index} failed on a batch of {len(batch)}: {str(e)}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _persist_with_fallback(self, items: List[_Submission], persist) -> None:
+        """Persist a batch in one transaction; if it fails, retry each submission on its own"""
+        try:
+            results, errors = await persist(items)
+        except Exception as e:
+            if len(items) == 1:
+                logger.error(f"Admission {items[0].kind} {items[0].tracking_id} failed: {str(e)}")
+                await self._save_status(items, SubmissionStatus.FAILED, errors={items[0].tracking_id: str(e)})
+                return
+            logger.warning(f"Batch of {len(items)} {items[0].kind}s failed, retrying individually: {str(e)}")
+            for item in items:
+                await self._persist_with_fallback([item], persist)
+            return
+
+        completed = [item for item in items if item.tracking_id in results]
+        failed = [item for item in items if item.tracking_id in errors]
+        if completed:
+            await self._save_status(completed, SubmissionStatus.COMPLETED, results=results)
+        if failed:
+            await self._save_status(failed, SubmissionStatus.FAILED, errors=errors)
+
+    async def _persist_purchases(self, items: List[_Submission]):
+        now = datetime.utcnow()
+        rows = [
+            dict(
+                first_name=item.form_data.first_name,
+                last_name=item.form_data.last_name,
+                contact=item.form_data.contact,
+                email=item.form_data.email,
+                amount=item.form_data.amount,
+                serial_token=str(uuid.uuid4()),
+                purchase_date=now
+            )
+            for item in items
+        ]
+        async with AsyncSessionLocal() as session:
+            inserted = await session.execute(
+                insert(PurchaseAdmissionForm).returning(
+                    PurchaseAdmissionForm.id, PurchaseAdmissionForm.serial_token, sort_by_parameter_order=True
+                ),
+                rows
+            )
+            purchases = inserted.all()
+            await enqueue_emails(session, EMAIL_SERIAL_TOKEN, [
+                (row["email"], {"serial_token": row["serial_token"]}) for row in rows
+            ])
+            await session.commit()
+        await remember_purchase_tokens(purchase.serial_token for purchase in purchases)
+
+        results = {}
+        for item, purchase in zip(items, purchases):
+            results[item.tracking_id] = {"purchase_id": purchase.id, "serial_token": purchase.serial_token}
+        logger.info(f"Persisted {len(items)} admission form purchases")
+        return results, {}
+
+    async def _persist_applications(self, items: List[_Submission]):
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        forms: List[ApplicationFormCreate] = [item.form_data for item in items]
+
+        async with AsyncSessionLocal() as session:
+            # One lookup per table for the whole batch instead of several per application
+            # Lock the purchases first so concurrent workers cannot both spend the same token,
+            # then see which are used as of after the lock was granted
+            tokens = {form.purchase_token for form in forms}
+            purchase_rows = await session.execute(
+                select(PurchaseAdmissionForm.serial_token, PurchaseAdmissionForm.id)
+                .where(PurchaseAdmissionForm.serial_token.in_(tokens))
+                .order_by(PurchaseAdmissionForm.id)
+                .with_for_update()
+            )
+            purchase_ids = dict(purchase_rows.all())
+            used_rows = await session.execute(
+                select(AdmissionForm.purchase_id).where(AdmissionForm.purchase_id.in_(purchase_ids.values()))
+            )
+            used_purchases = set(used_rows.scalars().all())
+            purchase_ids = {token: purchase_id for token, purchase_id in purchase_ids.items() if purchase_id not in used_purchases}
+
+            student_emails = {form.student.email for form in forms}
+            enrollment_numbers = {form.student.enrollment_number for form in forms if form.student.enrollment_number}
+            student_rows = await session.execute(
+                select(User.email, Student.enrollment_number, Student.id)
+                .join(Student, Student.user_id == User.id)
+                .where(or_(User.email.in_(student_emails), Student.enrollment_number.in_(enrollment_numbers)))
+            )
+            students_by_email, students_by_number = {}, {}
+            for email, number, student_id in student_rows.all():
+                students_by_email[email] = student_id
+                students_by_number[number] = student_id
+
+            parent_emails = {form.parent.email for form in forms}
+            user_rows = await session.execute(
+                select(User.email, Parent.id)
+                .outerjoin(Parent, Parent.user_id == User.id)
+                .where(User.email.in_(parent_emails))
+            )
+            existing_users = dict(user_rows.all())
+
+            accepted: List[_Submission] = []
+            used_tokens = set()
+            for item in items:
+                form = item.form_data
+                if form.purchase_token not in purchase_ids or form.purchase_token in used_tokens:
+                    used_tokens.add(form.purchase_token)
+                    errors[item.tracking_id] = "Invalid or already used purchase token"
+                elif form.parent.email in existing_users and existing_users[form.parent.email] is None:
+                    errors[item.tracking_id] = "Parent email belongs to an account that is not a parent"
+                else:
+                    used_tokens.add(form.purchase_token)
+                    accepted.append(item)
+
+            parent_ids = {email: parent_id for email, parent_id in existing_users.items() if parent_id is not None}
+            new_parents = {}
+            for item in accepted:
+                parent = item.form_data.parent
+                if parent.email not in parent_ids:
+                    new_parents.setdefault(parent.email, parent)
+            if new_parents:
+                parent_ids.update(await self._create_parents(list(new_parents.values()), session))
+
+            admission_rows = []
+            for item in accepted:
+                form = item.form_data
+                admission_rows.append(dict(
+                    form_id=str(uuid.uuid4()),
+                    purchase_id=purchase_ids[form.purchase_token],
+                    student_id=students_by_email.get(form.student.email) or students_by_number.get(form.student.enrollment_number),
+                    parent_id=parent_ids[form.parent.email],
+                    student_first_name=form.student.first_name,
+                    student_last_name=form.student.last_name,
+                    student_dob=form.student.date_of_birth,
+                    student_contact=form.student.contact_number,
+                    student_email=form.student.email,
+                    parent_first_name=form.parent.first_name,
+                    parent_last_name=form.parent.last_name,
+                    parent_relationship=form.parent.relationship,
+                    parent_contact=form.parent.contact_number,
+                    parent_email=form.parent.email,
+                    intended_grade=form.intended_grade,
+                    previous_school=form.previous_school,
+                    medical_conditions=form.medical_conditions,
+                    status=AdmissionStatus.PENDING,
+                    submission_date=datetime.utcnow()
+                ))
+            if admission_rows:
+                inserted = await session.execute(
+                    insert(AdmissionForm).returning(AdmissionForm.id, AdmissionForm.form_id, sort_by_parameter_order=True),
+                    admission_rows
+                )
+                for item, admission in zip(accepted, inserted.all()):
+                    results[item.tracking_id] = {"admission_id": admission.id, "form_id": admission.form_id}
+            await session.commit()
+        await mark_tokens_consumed(used_tokens)
+
+        logger.info(f"Persisted {len(results)} admission applications, rejected {len(errors)}")
+        return results, errors
+
+    async def _create_parents(self, parents: list, session) -> Dict[str, int]:
+        """Insert inactive parent accounts for the batch; returns email -> Parent.id"""
+        # bcrypt is CPU bound, so hash off the event loop
+        hashes = await generate_password_hashes_async([secrets.token_urlsafe(12) for _ in parents])
+        now = datetime.utcnow()
+        user_rows = await session.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [
+                dict(
+                    first_name=parent.first_name,
+                    last_name=parent.last_name,
+                    gender=Gender.PREFER_NOT_TO_SAY,
+                    contact_number=parent.contact_number,
+                    email=parent.email,
+                    username=parent.email,
+                    password_hash=password_hash,
+                    is_active=False,
+                    created_at=now,
+                    updated_at=now
+                )
+                for parent, password_hash in zip(parents, hashes)
+            ]
+        )
+        user_ids = user_rows.scalars().all()
+
+        parent_rows = await session.execute(
+            insert(Parent).returning(Parent.id, sort_by_parameter_order=True),
+            [
+                dict(user_id=user_id, relationship_type=parent.relationship)
+                for parent, user_id in zip(parents, user_ids)
+            ]
+        )
+        parent_ids = parent_rows.scalars().all()
+
+        role_id = await self._get_parent_role_id(session)
+        if role_id is not None:
+            await session.execute(insert(user_role), [dict(user_id=user_id, role_id=role_id) for user_id in user_ids])
+
+        return {parent.email: parent_id for parent, parent_id in zip(parents, parent_ids)}
+
+    async def _get_parent_role_id(self, session) -> Optional[int]:
+        if self._parent_role_id is None:
+            self._parent_role_id = await session.scalar(select(Role.id).where(Role.name == RoleEnum.PARENT))
+        return self._parent_role_id
+
+
+ingestion_queue = AdmissionIngestionQueue()
+Gauge("admission_ingestion_queue_depth", "Submissions waiting to be persisted", function=ingestion_queue.depth)
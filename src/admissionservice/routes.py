@@ -1,29 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from .schemas import (
     PurchaseAdmissionFormCreate,
     PurchaseAdmissionFormResponse,
     ApplicationFormCreate,
     ApplicationFormResponse,
-    StudentResponse,
+    WardListResponse,
     FeeListResponse,
-    AcademicRecordListResponse
+    AcademicRecordListResponse,
+    SubmissionAcceptedResponse,
+    SubmissionStatus,
+    SubmissionStatusResponse,
+    ParentDashboardResponse
 )
 from .services import AdmissionService
+from .ingestion import ingestion_queue, PURCHASE, APPLICATION
+from src.responses import PydanticJSONResponse
 from src.db.main import get_session
 from typing import List
-from fastapi import BackgroundTasks
+from fastapi.responses import Response
 
 admission_router = APIRouter()
 admission_service = AdmissionService()
 
 @admission_router.post("/purchase",response_model=PurchaseAdmissionFormResponse,status_code=status.HTTP_201_CREATED,
     responses={
+        202: {"model": SubmissionAcceptedResponse, "description": "Queued for processing (queued mode)"},
         400: {"description": "Invalid input"},
-        500: {"description": "Database error"}
+        500: {"description": "Database error"},
+        503: {"description": "Admission queue is full"}
     }
 )
-async def purchase_admission(form_data: PurchaseAdmissionFormCreate,background_tasks:BackgroundTasks,session: AsyncSession = Depends(get_session)):
+async def purchase_admission(form_data: PurchaseAdmissionFormCreate,request: Request,session: AsyncSession = Depends(get_session)):
     """
     Purchase an admission form
     
@@ -32,17 +40,23 @@ async def purchase_admission(form_data: PurchaseAdmissionFormCreate,background_t
     - **contact**: Contact number
     - **email**: Email address
     - **amount**: Payment amount
+    
+    In queued mode the purchase is acknowledged with 202 and a tracking id.
     """
-    return await admission_service.purchase_admission(form_data, background_tasks,session)
+    if ingestion_queue.is_running:
+        return _accepted(request, await ingestion_queue.submit(PURCHASE, form_data))
+    return await admission_service.purchase_admission(form_data, session)
 
 @admission_router.post("/apply",response_model=ApplicationFormResponse,status_code=status.HTTP_201_CREATED,
     responses={
+        202: {"model": SubmissionAcceptedResponse, "description": "Queued for processing (queued mode)"},
         400: {"description": "Invalid input"},
         404: {"description": "Purchase token not found"},
-        500: {"description": "Database error"}
+        500: {"description": "Database error"},
+        503: {"description": "Admission queue is full"}
     }
 )
-async def apply_admission(form_data: ApplicationFormCreate,session: AsyncSession = Depends(get_session)):
+async def apply_admission(form_data: ApplicationFormCreate,request: Request,session: AsyncSession = Depends(get_session)):
     """
     Submit admission application
     
@@ -51,24 +65,65 @@ async def apply_admission(form_data: ApplicationFormCreate,session: AsyncSession
     - Complete student information  
     - Complete parent/guardian information
     - Intended grade level
+    
+    In queued mode the application is acknowledged with 202 and a tracking id;
+    the purchase token is checked when it is persisted.
     """
+    if ingestion_queue.is_running:
+        return _accepted(request, await ingestion_queue.submit(APPLICATION, form_data))
     return await admission_service.apply_for_admission(form_data, session)
 
-@admission_router.get("/ward/{parent_id}",response_model=StudentResponse,
+@admission_router.get("/submissions/{tracking_id}",response_model=SubmissionStatusResponse,
     responses={
-        404: {"description": "Student not found"},
-        500: {"description": "Database error"}  
+        404: {"description": "Unknown or expired tracking id"}
     }
 )
-async def get_student_by_parent(parent_id: int,session: AsyncSession = Depends(get_session)):
-    """Get student details by parent ID"""
-    student = await admission_service.get_student_by_parent(parent_id, session)
-    if not student:
+async def get_submission_status(tracking_id: str):
+    """Get the processing status of a queued purchase or application"""
+    record = await ingestion_queue.get_status(tracking_id)
+    if not record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
+            detail="Submission not found"
         )
-    return student
+    return record
+
+def _accepted(request: Request, tracking_id: str) -> PydanticJSONResponse:
+    return PydanticJSONResponse(
+        SubmissionAcceptedResponse(
+            tracking_id=tracking_id,
+            status=SubmissionStatus.QUEUED,
+            status_url=str(request.url_for("get_submission_status", tracking_id=tracking_id))
+        ),
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+@admission_router.get("/ward/{parent_id}",response_model=WardListResponse,
+    responses={
+        404: {"description": "Parent or students not found"},
+        500: {"description": "Database error"}  
+    }
+)
+async def get_wards_by_parent(parent_id: int,session: AsyncSession = Depends(get_session)):
+    """Get every student of a parent, with class enrollments, by the parent's user ID"""
+    return await admission_service.get_wards_by_parent(parent_id, session)
+
+@admission_router.get("/dashboard/{parent_id}",response_model=ParentDashboardResponse,
+    responses={
+        404: {"description": "Parent not found"},
+        500: {"description": "Database error"}
+    }
+)
+async def get_parent_dashboard(parent_id: int):
+    """
+    Parent portal dashboard in one call
+    
+    - **wards**: every child linked to the parent
+    - **fees**: totals plus the outstanding fees, soonest due first
+    - **recent_records**: latest academic records across all wards
+    """
+    payload = await admission_service.get_parent_dashboard(parent_id)
+    return Response(content=payload, media_type="application/json")
 
 @admission_router.get("/fees/{parent_id}",response_model=FeeListResponse,
     responses={
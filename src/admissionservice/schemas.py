@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 class AdmissionStatus(str, Enum):
     PENDING = "PENDING"
@@ -10,17 +10,23 @@ class AdmissionStatus(str, Enum):
     WITHDRAWN = "WITHDRAWN"
 
 class FeeType(str, Enum):
-    TUITION = "tuition"
-    ADMISSION = "admission" 
-    EXAM = "exam"
-    ACTIVITY = "activity"
-    TRANSPORT = "transport"
+    TUITION = "TUITION"
+    ADMISSION = "ADMISSION" 
+    EXAM = "EXAM"
+    ACTIVITY = "ACTIVITY"
+    TRANSPORT = "TRANSPORT"
+    HOSTEL = "HOSTEL"
+    LIBRARY = "LIBRARY"
+    UNIFORM = "UNIFORM"
+    OTHER = "OTHER"
 
 class FeeStatus(str, Enum):
-    UNPAID = "unpaid"
-    PAID = "paid"
-    OVERDUE = "overdue"
-    PARTIAL = "partial"
+    UNPAID = "UNPAID"
+    PAID = "PAID"
+    OVERDUE = "OVERDUE"
+    PARTIAL = "PARTIAL"
+    WAIVED = "WAIVED"
+    REFUNDED = "REFUNDED"
 
 class Role(str, Enum):
     STUDENT = "STUDENT"
@@ -116,6 +122,21 @@ class StudentResponse(BaseModel):
             datetime: lambda v: v.isoformat()
         }
         
+class ClassEnrollmentSummary(BaseModel):
+    class_id: int
+    class_name: str
+    grade_level: str
+    academic_year: str
+    enrollment_date: datetime
+
+class WardResponse(StudentResponse):
+    grade_level: str
+    section: Optional[str] = None
+    enrollments: List[ClassEnrollmentSummary] = []
+
+class WardListResponse(BaseModel):
+    wards: List[WardResponse]
+
 class FeeResponse(BaseModel):
     id: int
     amount: float
@@ -156,4 +177,52 @@ class AcademicRecordListResponse(BaseModel):
     records: List[AcademicRecordResponse]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SubmissionStatus(str, Enum):
+    QUEUED = "QUEUED"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class SubmissionAcceptedResponse(BaseModel):
+    tracking_id: str
+    status: SubmissionStatus
+    status_url: str
+
+class SubmissionStatusResponse(BaseModel):
+    tracking_id: str
+    kind: str
+    status: SubmissionStatus
+    submitted_at: datetime
+    updated_at: datetime
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class WardProfile(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    date_of_birth: Optional[datetime] = None
+    email: EmailStr
+    enrollment_number: Optional[str] = None
+    grade_level: str
+    section: Optional[str] = None
+
+class FeeSummary(BaseModel):
+    total_billed: float
+    total_paid: float
+    total_outstanding: float
+    overdue_count: int
+    next_due_date: Optional[datetime] = None
+    outstanding: List[FeeResponse]
+
+class DashboardRecord(AcademicRecordResponse):
+    student_id: int
+
+class ParentDashboardResponse(BaseModel):
+    parent_id: int
+    generated_at: datetime
+    wards: List[WardProfile]
+    fees: FeeSummary
+    recent_records: List[DashboardRecord]
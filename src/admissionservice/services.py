@@ -1,23 +1,34 @@
 from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
-from sqlalchemy import select, exists, or_ # type: ignore
-from src.db.models import (PurchaseAdmissionForm,AdmissionForm,Student,Parent,User,Fee,AcademicRecord)
-from .schemas import (PurchaseAdmissionFormCreate,PurchaseAdmissionFormResponse,ApplicationFormCreate,ApplicationFormResponse,StudentInfo,ParentInfo, StudentResponse,FeeResponse,AcademicRecordResponse, AdmissionStatus)
+from sqlalchemy import select, exists, insert, literal, or_ # type: ignore
+from sqlalchemy.exc import IntegrityError
+from redis.exceptions import RedisError
+from src.db.models import (PurchaseAdmissionForm,AdmissionForm,Student,Parent,User,Fee,AcademicRecord,Gender,Role,RoleEnum,user_role)
+from .schemas import (PurchaseAdmissionFormCreate,PurchaseAdmissionFormResponse,ApplicationFormCreate,ApplicationFormResponse,ParentInfo,FeeResponse,AcademicRecordResponse, AdmissionStatus,
+                      FeeStatus, WardProfile, WardResponse, WardListResponse, ClassEnrollmentSummary, FeeSummary, DashboardRecord, ParentDashboardResponse)
+from .dashboard import get_cached_dashboard, cache_dashboard
 from fastapi import HTTPException, status
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
 import uuid
 import logging
 from typing import List, Optional
-from fastapi import BackgroundTasks
-from src.mail import send_serial_token
-from src.authservice.utils import generate_student_enrollment_number, generate_password_hash
+from src.outbox import EMAIL_SERIAL_TOKEN, enqueue_email
+from .tokens import (TOKEN_REJECTED, claim_purchase_token, mark_tokens_consumed, release_purchase_token,
+                     remember_purchase_tokens)
+from src.authservice.utils import generate_password_hash_async
+from src.db.projections import columns_for, rows_to
+from src.db.loading import STUDENT_AS_WARD
+from src.db.main import AsyncSessionLocal
+from src.config import Config
+from src.tracing import trace_methods
 import secrets
-from .schemas import Role
 
 logger = logging.getLogger(__name__)
 
+@trace_methods
 class AdmissionService:
     
-    async def purchase_admission(self,form_data: PurchaseAdmissionFormCreate,background_tasks: BackgroundTasks,session:AsyncSession) -> PurchaseAdmissionFormResponse:
+    async def purchase_admission(self,form_data: PurchaseAdmissionFormCreate,session:AsyncSession) -> PurchaseAdmissionFormResponse:
         """Process admission form purchase"""
         
         purchase = PurchaseAdmissionForm(
@@ -31,18 +42,13 @@ class AdmissionService:
             )
             
         session.add(purchase)
+        # Serial token email, committed together with the purchase
+        enqueue_email(session, EMAIL_SERIAL_TOKEN, purchase.email, serial_token=purchase.serial_token)
         await session.commit()
         await session.refresh(purchase)
-        
-        # Send serial token email
-        background_tasks.add_task(
-            send_serial_token,
-            email=purchase.email,
+        await remember_purchase_tokens([purchase.serial_token])
             
-        )
-        
-            
-        logger.info(f"New admission form purchased: {purchase.id}")
+        logger.info("New admission form purchased", extra={"purchase_id": purchase.id})
             
         return PurchaseAdmissionFormResponse(
                 id=purchase.id,
@@ -58,37 +64,56 @@ class AdmissionService:
             
       
     async def apply_for_admission(self, form_data: ApplicationFormCreate, session: AsyncSession) -> ApplicationFormResponse:
-        """Process admission application"""
+        """Process admission application in one transaction"""
+        # Replayed tokens are turned away by the cache; the database still has the final say
+        token_state, lease = await claim_purchase_token(form_data.purchase_token)
+        if token_state == TOKEN_REJECTED:
+            logger.warning(f"Purchase token rejected from cache: {form_data.purchase_token}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invalid or already used purchase token"
+            )
+
+        token_spent = False
         try:
-                purchase = await self._verify_purchase_token(form_data.purchase_token, session)
-                if not purchase:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="Purchase token not found or already used"
-                    )
-                    
-                # Check if student exists
-                student = await self._find_existing_student(form_data.student, session)
-                
-                # Validate or create parent
-                parent = await self._validate_or_create_parent(form_data.parent, session)
-                if not parent:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Invalid parent information"
-                    )
-                    
-                # Create admission form
-                admission_form = await self._create_admission_form(
-                    form_data, 
-                    purchase.id, 
-                    student.id if student else None,
-                    parent.id,
-                    session
-                )
-                
-                return await self._build_application_response(admission_form, form_data)
-                
+            for attempt in range(2):
+                try:
+                    refs = await self._lookup_application_refs(form_data, session)
+                    if refs.purchase_id is None:
+                        token_spent = True
+                        logger.warning(f"Invalid purchase token attempt: {form_data.purchase_token}")
+                        raise HTTPException(
+                            status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Invalid or already used purchase token"
+                        )
+                    if refs.parent_id is None and refs.parent_user_id is not None:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Parent email belongs to an account that is not a parent"
+                        )
+
+                    admission_form = await self._insert_admission_form(form_data, refs, session)
+                    await session.commit()
+                    token_spent = True
+                    break
+                except IntegrityError as e:
+                    await session.rollback()
+                    # The unique constraint on purchase_id is what claims the token
+                    if "purchase_id" in str(e.orig):
+                        token_spent = True
+                        logger.warning("Purchase token already used: %s", form_data.purchase_token)
+                        raise HTTPException(
+                            status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Invalid or already used purchase token"
+                        )
+                    if attempt:
+                        raise
+                    # Another request created this parent concurrently; the next lookup will find it
+                    logger.info("Parent %s created concurrently, retrying application", form_data.parent.email)
+
+            logger.info("Admission application submitted", extra={"form_id": admission_form.form_id})
+            return await self._build_application_response(admission_form, form_data)
+
         except HTTPException as he:
             logger.error(f"Application HTTP error: {he.detail}")
             raise
@@ -98,126 +123,107 @@ class AdmissionService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Application processing failed: {str(e)}"
             )
+        finally:
+            if token_spent:
+                await mark_tokens_consumed([form_data.purchase_token])
+            else:
+                await release_purchase_token(form_data.purchase_token, lease)
 
-    async def _verify_purchase_token(self, token: str, session: AsyncSession) -> PurchaseAdmissionForm:
-        """Verify purchase token is valid and unused"""
-        purchase = await session.execute(
-            select(PurchaseAdmissionForm).where(PurchaseAdmissionForm.serial_token == token).where(~exists().where(AdmissionForm.purchase_id == PurchaseAdmissionForm.id)))
-        purchase = purchase.scalars().first()
-        
-        if not purchase:
-            logger.warning(f"Invalid purchase token attempt: {token}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Invalid or already used purchase token"
-            )
-        return purchase
+    async def _lookup_application_refs(self, form_data: ApplicationFormCreate, session: AsyncSession):
+        """Resolve the purchase, an existing student and the parent account in one query"""
+        student_match = User.email == form_data.student.email
+        if form_data.student.enrollment_number:
+            student_match = or_(student_match, Student.enrollment_number == form_data.student.enrollment_number)
 
-    async def _find_existing_student(self,student_info: StudentInfo,session: AsyncSession)-> Optional[Student]:
-        """Find existing student by email or enrollment number"""
-        if not student_info.email:
-            return None
-            
-        query = select(Student).join(User).where(User.email == student_info.email)
-        
-        if student_info.enrollment_number:
-            query = query.where(or_(User.email == student_info.email,Student.enrollment_number == student_info.enrollment_number))
-            
-        result = await session.execute(query)
-        return result.scalars().first()
-
-    async def _validate_or_create_parent(self, parent_info: ParentInfo, session: AsyncSession) -> Parent:
-        """Validate or create parent record with better error handling"""
-        try:
-            # Check if parent exists
-            parent = await session.execute(
-                select(Parent)
-                .join(User)
-                .where(User.email == parent_info.email)
-            )
-            parent = parent.scalars().first()
-            
-            if parent:
-                return parent
-                
-            # Generate a temporary password for the parent
-            temp_password = secrets.token_urlsafe(12)
-            hashed_password = generate_password_hash(temp_password)
-            
-            # Create new parent user
-            parent_user = User(
-                first_name=parent_info.first_name,
-                last_name=parent_info.last_name,
-                contact_number=parent_info.contact_number,
-                email=parent_info.email,
-                username=parent_info.email,
-                password_hash=hashed_password,  # Use proper hashed password
-                role=Role.PARENT,  # Changed from "parent" to "guardian"
-                is_active=False,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            session.add(parent_user)
-            await session.flush()
-            
-            parent = Parent(
-                user_id=parent_user.id,
-                relationship_type=parent_info.relationship
-            )
-            session.add(parent)
-            await session.flush()
-            
-            # Log the temporary password for admin reference (remove in production)
-            logger.info(f"Temporary password for parent {parent_info.email}: {temp_password}")
-            
-            return parent
-            
-        except Exception as e:
-            logger.error(f"Parent creation failed: {str(e)}")
-            # Log the specific error for debugging
-            logger.error(f"Parent info: {parent_info}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Parent information could not be processed: {str(e)}"
+        result = await session.execute(
+            select(
+                select(PurchaseAdmissionForm.id)
+                .where(PurchaseAdmissionForm.serial_token == form_data.purchase_token)
+                .scalar_subquery().label("purchase_id"),
+                select(Student.id)
+                .join(User, Student.user_id == User.id)
+                .where(student_match)
+                .limit(1)
+                .scalar_subquery().label("student_id"),
+                select(User.id)
+                .where(User.email == form_data.parent.email)
+                .scalar_subquery().label("parent_user_id"),
+                select(Parent.id)
+                .join(User, Parent.user_id == User.id)
+                .where(User.email == form_data.parent.email)
+                .scalar_subquery().label("parent_id"),
             )
+        )
+        return result.one()
 
-    async def _create_admission_form(self,form_data: ApplicationFormCreate,purchase_id: int,student_id: Optional[int], parent_id: int,session: AsyncSession) -> AdmissionForm:
-        """Create new admission form record"""
-        try:
-            form = AdmissionForm(
-                form_id=str(uuid.uuid4()),
-                purchase_id=purchase_id,
-                student_id=student_id,
-                parent_id=parent_id,
-                student_first_name=form_data.student.first_name,
-                student_last_name=form_data.student.last_name,
-                student_dob=form_data.student.date_of_birth,
-                student_contact=form_data.student.contact_number,
-                student_email=form_data.student.email,
-                parent_first_name=form_data.parent.first_name,
-                parent_last_name=form_data.parent.last_name,
-                parent_relationship=form_data.parent.relationship,
-                parent_contact=form_data.parent.contact_number,
-                parent_email=form_data.parent.email,
-                intended_grade=form_data.intended_grade,
-                previous_school=form_data.previous_school,
-                medical_conditions=form_data.medical_conditions,
-                status=AdmissionStatus.PENDING,
-                submission_date=datetime.utcnow()
-            )
-        
-            session.add(form)
-            await session.commit()
-            await session.refresh(form)
-            return form
-        
-        except Exception as e:
-            logger.error(f"Form creation failed: {str(e)}")
-            raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid form data: {str(e)}"
+    async def _insert_admission_form(self, form_data: ApplicationFormCreate, refs, session: AsyncSession):
+        """Insert the admission form, creating the parent account in the same statement if needed"""
+        admission_forms = AdmissionForm.__table__
+        values = {
+            "form_id": str(uuid.uuid4()),
+            "purchase_id": refs.purchase_id,
+            "student_id": refs.student_id,
+            "student_first_name": form_data.student.first_name,
+            "student_last_name": form_data.student.last_name,
+            "student_dob": form_data.student.date_of_birth,
+            "student_contact": form_data.student.contact_number,
+            "student_email": form_data.student.email,
+            "parent_first_name": form_data.parent.first_name,
+            "parent_last_name": form_data.parent.last_name,
+            "parent_relationship": form_data.parent.relationship,
+            "parent_contact": form_data.parent.contact_number,
+            "parent_email": form_data.parent.email,
+            "intended_grade": form_data.intended_grade,
+            "previous_school": form_data.previous_school,
+            "medical_conditions": form_data.medical_conditions,
+            "status": AdmissionStatus.PENDING,
+            "submission_date": datetime.utcnow(),
+        }
+        returning = (
+            admission_forms.c.id, admission_forms.c.form_id, admission_forms.c.status, admission_forms.c.submission_date
         )
 
+        if refs.parent_id is not None:
+            statement = insert(admission_forms).values(parent_id=refs.parent_id, **values).returning(*returning)
+        else:
+            new_parent = await self._new_parent_cte(form_data.parent)
+            statement = insert(admission_forms).from_select(
+                ["parent_id", *values],
+                select(new_parent.c.id, *[literal(value, admission_forms.c[name].type) for name, value in values.items()])
+            ).returning(*returning)
+
+        result = await session.execute(statement)
+        return result.one()
+
+    async def _new_parent_cte(self, parent_info: ParentInfo):
+        """CTE that inserts an inactive parent user, its PARENT role link and the parent row"""
+        # Temporary password nobody knows; the parent activates the account through a reset
+        hashed_password = await generate_password_hash_async(secrets.token_urlsafe(12))
+        now = datetime.utcnow()
+
+        new_user = insert(User.__table__).values(
+            first_name=parent_info.first_name,
+            last_name=parent_info.last_name,
+            gender=Gender.PREFER_NOT_TO_SAY,
+            contact_number=parent_info.contact_number,
+            email=parent_info.email,
+            username=parent_info.email,
+            password_hash=hashed_password,
+            is_active=False,
+            created_at=now,
+            updated_at=now
+        ).returning(User.__table__.c.id).cte("new_user")
+
+        role_link = insert(user_role).from_select(
+            ["user_id", "role_id"],
+            select(new_user.c.id, Role.__table__.c.id).where(Role.__table__.c.name == RoleEnum.PARENT)
+        ).cte("new_user_role")
+
+        return insert(Parent.__table__).from_select(
+            ["user_id", "relationship_type"],
+            select(new_user.c.id, literal(parent_info.relationship, Parent.__table__.c.relationship_type.type))
+        ).returning(Parent.__table__.c.id).add_cte(role_link).cte("new_parent")
+
     async def _build_application_response(self,admission_form: AdmissionForm,form_data: ApplicationFormCreate) -> ApplicationFormResponse:
         """Build the application response"""
         return ApplicationFormResponse(
@@ -232,74 +238,19 @@ class AdmissionService:
             medical_conditions=form_data.medical_conditions
         )
 
-    async def get_student_by_parent(self, parent_id: int, session: AsyncSession) -> StudentResponse:
-        """Retrieve student by parent ID with proper error handling"""
+    async def get_wards_by_parent(self, parent_user_id: int, session: AsyncSession) -> WardListResponse:
+        """Retrieve every student of a parent (by the parent's User.id) in a fixed number of queries"""
         try:
-            # Option 1: If parent_id is actually User.id (most likely scenario)
-            # First get the Parent record from the User.id
-            parent_result = await session.execute(
-                select(Parent).where(Parent.user_id == parent_id)
-            )
-            parent = parent_result.scalars().first()
-            
-            if not parent:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Parent not found"
-                )
-
-            # Now get student using the actual Parent.id
             result = await session.execute(
                 select(Student)
-                .join(User, Student.user_id == User.id)
-                .where(Student.parent_id == parent.id)
-            )
-            
-            student = result.scalars().first()
-            
-            if not student:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="No student found for this parent"
-                )
-                
-            return StudentResponse(
-                id=student.id,
-                first_name=student.user.first_name,
-                last_name=student.user.last_name,
-                date_of_birth=student.user.date_of_birth,
-                contact_number=student.user.contact_number,
-                email=student.user.email,
-                enrollment_number=student.enrollment_number or "Not assigned",
-                created_at=student.user.created_at,
-                updated_at=student.user.updated_at
-            )
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"Error fetching student by parent {parent_id}: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to retrieve student information: {str(e)}"
-            )
-
-    # Alternative approach using a single query with proper joins:
-    async def get_student_by_parent_alternative(self, parent_user_id: int, session: AsyncSession) -> StudentResponse:
-        """Retrieve student by parent user ID using a single query with joins"""
-        try:
-            result = await session.execute(
-                select(Student)
-                .join(User, Student.user_id == User.id)  # Join Student to User
-                .join(Parent, Student.parent_id == Parent.id)  # Join Student to Parent
-                .join(User.alias('parent_user'), Parent.user_id == User.alias('parent_user').id)  # Join Parent to Parent's User
+                .options(*STUDENT_AS_WARD)
+                .join(Parent, Student.parent_id == Parent.id)
                 .where(Parent.user_id == parent_user_id)
+                .order_by(Student.id)
             )
-            
-            student = result.scalars().first()
-            
-            if not student:
-                # Check if parent exists first for better error messaging
+            students = result.scalars().all()
+
+            if not students:
                 parent_exists = await session.execute(
                     select(exists().where(Parent.user_id == parent_user_id))
                 )
@@ -308,52 +259,54 @@ class AdmissionService:
                         status_code=status.HTTP_404_NOT_FOUND,
                         detail="Parent not found"
                     )
-                else:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail="No student found for this parent"
-                    )
-                
-            return StudentResponse(
-                id=student.id,
-                first_name=student.user.first_name,
-                last_name=student.user.last_name,
-                date_of_birth=student.user.date_of_birth,
-                contact_number=student.user.contact_number,
-                email=student.user.email,
-                enrollment_number=student.enrollment_number or "Not assigned",
-                created_at=student.user.created_at,
-                updated_at=student.user.updated_at
-            )
-            
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No student found for this parent"
+                )
+
+            return WardListResponse(wards=[
+                WardResponse(
+                    id=student.id,
+                    first_name=student.user.first_name,
+                    last_name=student.user.last_name,
+                    date_of_birth=student.user.date_of_birth,
+                    contact_number=student.user.contact_number,
+                    email=student.user.email,
+                    enrollment_number=student.enrollment_number or "Not assigned",
+                    created_at=student.user.created_at,
+                    updated_at=student.user.updated_at,
+                    grade_level=student.grade_level,
+                    section=student.section,
+                    enrollments=[
+                        ClassEnrollmentSummary(
+                            class_id=enrollment.class_id,
+                            class_name=enrollment.class_.name,
+                            grade_level=enrollment.class_.grade_level,
+                            academic_year=enrollment.class_.academic_year,
+                            enrollment_date=enrollment.enrollment_date
+                        )
+                        for enrollment in student.class_enrollments
+                    ]
+                )
+                for student in students
+            ])
+
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Error fetching student by parent user {parent_user_id}: {str(e)}", exc_info=True)
+            logger.error(f"Error fetching wards for parent user {parent_user_id}: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to retrieve student information: {str(e)}"
             )
-            
+
     async def get_fees_by_parent(self,parent_id: int,session: AsyncSession) -> List[FeeResponse]:
         """Retrieve all fees for parent"""
         try:
-            result = await session.execute(select(Fee).where(Fee.parent_id == parent_id).order_by(Fee.due_date.desc()))
-            
-            fees = result.scalars().all()
-            
-            return [
-                FeeResponse(
-                    id=fee.id,
-                    amount=fee.amount,
-                    fee_type=fee.fee_type,
-                    due_date=fee.due_date,
-                    status=fee.status,
-                    payment_date=fee.payment_date,
-                    transaction_reference=fee.transaction_reference
-                )
-                for fee in fees
-            ]
+            result = await session.execute(
+                select(*columns_for(FeeResponse, Fee)).where(Fee.parent_id == parent_id).order_by(Fee.due_date.desc())
+            )
+            return rows_to(FeeResponse, result)
             
         except Exception as e:
             logger.error(f"Error fetching fees: {str(e)}")
@@ -369,7 +322,7 @@ class AdmissionService:
             student_exists = await session.execute(
                 select(Student.id).where(Student.id == student_id).where(Student.parent_id== parent_id).exists().select())
             
-            if not await session.scalar(student_exists):
+            if not student_exists.scalar():
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Not authorized to access these records"
@@ -377,22 +330,11 @@ class AdmissionService:
                 
             # Get records
             result = await session.execute(
-                select(AcademicRecord).where(AcademicRecord.student_id == student_id).order_by(AcademicRecord.recorded_date.desc())
+                select(*columns_for(AcademicRecordResponse, AcademicRecord))
+                .where(AcademicRecord.student_id == student_id)
+                .order_by(AcademicRecord.recorded_date.desc())
             )
-            records = result.scalars().all()
-            
-            return [
-                AcademicRecordResponse(
-                    id=record.id,
-                    subject=record.subject,
-                    grade=record.grade,
-                    term=record.term,
-                    academic_year=record.academic_year,
-                    comments=record.comments,
-                    recorded_date=record.recorded_date
-                )
-                for record in records
-            ]
+            return rows_to(AcademicRecordResponse, result)
             
         except HTTPException:
             raise
@@ -401,4 +343,96 @@ class AdmissionService:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to retrieve academic records"
-            )
\ No newline at end of file
+            )
+
+    async def get_parent_dashboard(self, parent_id: int) -> str:
+        """Wards, fee summary and recent records for a parent as rendered JSON, served from cache when fresh"""
+        try:
+            cached = await get_cached_dashboard(parent_id)
+        except RedisError as e:
+            logger.warning(f"Dashboard cache unavailable, reading from the database: {str(e)}")
+            cached = None
+        if cached:
+            return cached
+
+        try:
+            # Independent sessions so the three reads run concurrently on separate connections
+            wards, fees, records = await asyncio.gather(
+                self._dashboard_wards(parent_id),
+                self._dashboard_fees(parent_id),
+                self._dashboard_records(parent_id)
+            )
+        except Exception as e:
+            logger.error(f"Error building dashboard for parent {parent_id}: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to build parent dashboard"
+            )
+
+        if wards is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parent not found"
+            )
+
+        payload = ParentDashboardResponse(
+            parent_id=parent_id,
+            generated_at=datetime.now(timezone.utc),
+            wards=wards,
+            fees=fees,
+            recent_records=records
+        ).model_dump_json()
+        try:
+            await cache_dashboard(parent_id, payload, [ward.id for ward in wards])
+        except Exception as e:
+            logger.warning(f"Could not cache dashboard for parent {parent_id}: {str(e)}")
+        return payload
+
+    async def _dashboard_wards(self, parent_id: int) -> Optional[List[WardProfile]]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(*columns_for(
+                    WardProfile, Student,
+                    first_name=User.first_name,
+                    last_name=User.last_name,
+                    date_of_birth=User.date_of_birth,
+                    email=User.email
+                ))
+                .join(User, Student.user_id == User.id)
+                .where(Student.parent_id == parent_id)
+                .order_by(Student.id)
+            )
+            rows = result.all()
+            # Only a parent without wards costs a second query
+            if not rows and not await session.scalar(select(exists().where(Parent.id == parent_id))):
+                return None
+            return rows_to(WardProfile, rows)
+
+    async def _dashboard_fees(self, parent_id: int) -> FeeSummary:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(*columns_for(FeeResponse, Fee)).where(Fee.parent_id == parent_id).order_by(Fee.due_date)
+            )
+            fees = rows_to(FeeResponse, result)
+
+        settled = (FeeStatus.PAID, FeeStatus.WAIVED, FeeStatus.REFUNDED)
+        outstanding = [fee for fee in fees if fee.status not in settled]
+        return FeeSummary(
+            total_billed=sum(fee.amount for fee in fees),
+            total_paid=sum(fee.amount for fee in fees if fee.status == FeeStatus.PAID),
+            total_outstanding=sum(fee.amount for fee in outstanding),
+            overdue_count=sum(1 for fee in fees if fee.status == FeeStatus.OVERDUE),
+            next_due_date=outstanding[0].due_date if outstanding else None,
+            outstanding=outstanding
+        )
+
+    async def _dashboard_records(self, parent_id: int) -> List[DashboardRecord]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(*columns_for(DashboardRecord, AcademicRecord))
+                .join(Student, AcademicRecord.student_id == Student.id)
+                .where(Student.parent_id == parent_id)
+                .order_by(AcademicRecord.recorded_date.desc())
+                .limit(Config.DASHBOARD_RECENT_RECORDS)
+            )
+            return rows_to(DashboardRecord, result)
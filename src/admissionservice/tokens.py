@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from src.config import Config
+from src.db.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+# Results of claim_purchase_token
+TOKEN_UNKNOWN = 0   # not cached: the database decides
+TOKEN_CLAIMED = 1   # valid and now claimed by the caller
+TOKEN_REJECTED = -1  # consumed, or claimed by an application still in progress
+
+_VALID = "valid"
+_CONSUMED = "consumed"
+
+# valid -> claimed:<lease expiry ms>, also taking over a claim whose lease has run out
+_CLAIM_LUA = """
+local state = redis.call('GET', KEYS[1])
+if not state then
+    return 0
+end
+if state == 'valid' or (string.sub(state, 1, 8) == 'claimed:' and tonumber(string.sub(state, 9)) < tonumber(ARGV[1])) then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return -1
+"""
+
+# claimed -> valid, only if the claim is still the caller's
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], 'valid', 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_scripts: Dict[str, object] = {}
+
+
+def _token_key(token: str) -> str:
+    return f"admission:token:{token}"
+
+
+def _run(name: str, source: str, keys, args):
+    script = _scripts.get(name)
+    if script is None:
+        script = _scripts[name] = redis_service.client.register_script(source)
+    return script(keys=keys, args=args, client=redis_service.client)
+
+
+def _set_states(tokens: List[str], state: str) -> None:
+    pipe = redis_service.client.pipeline(transaction=False)
+    for token in tokens:
+        pipe.setex(_token_key(token), Config.ADMISSION_TOKEN_CACHE_TTL_SECONDS, state)
+    pipe.execute()
+
+
+# Every Redis round trip below runs in a worker thread, off the event loop
+
+async def remember_purchase_tokens(tokens: Iterable[str]) -> None:
+    """Cache newly purchased tokens as valid"""
+    try:
+        await asyncio.to_thread(_set_states, list(tokens), _VALID)
+    except RedisError as e:
+        logger.warning(f"Could not cache purchase tokens: {str(e)}")
+
+
+async def claim_purchase_token(token: str) -> Tuple[int, Optional[str]]:
+    """Atomically flip a cached valid token to claimed; returns the result and the claim to release"""
+    now_ms = int(time.time() * 1000)
+    lease = f"claimed:{now_ms + Config.ADMISSION_TOKEN_CLAIM_SECONDS * 1000}"
+    try:
+        result = int(await asyncio.to_thread(_run, "claim", _CLAIM_LUA, [_token_key(token)],
+                                             [now_ms, lease, Config.ADMISSION_TOKEN_CACHE_TTL_SECONDS]))
+    except RedisError as e:
+        logger.warning(f"Purchase token cache unavailable, checking the database: {str(e)}")
+        return TOKEN_UNKNOWN, None
+    return result, lease if result == TOKEN_CLAIMED else None
+
+
+async def release_purchase_token(token: str, lease: Optional[str]) -> None:
+    """Make a claimed token valid again after an application failed before using it"""
+    if lease is None:
+        return
+    try:
+        await asyncio.to_thread(_run, "release", _RELEASE_LUA, [_token_key(token)],
+                                [lease, Config.ADMISSION_TOKEN_CACHE_TTL_SECONDS])
+    except RedisError as e:
+        # The claim lapses on its own when the lease runs out
+        logger.warning(f"Could not release purchase token claim: {str(e)}")
+
+
+async def mark_tokens_consumed(tokens: Iterable[str]) -> None:
+    """Cache tokens the database reported as used or unknown so replays skip the database"""
+    try:
+        await asyncio.to_thread(_set_states, list(tokens), _CONSUMED)
+    except RedisError as e:
+        logger.warning(f"Could not cache consumed purchase tokens: {str(e)}")
+
+
+async def is_token_rejected(token: str) -> bool:
+    """Read-only check used before queueing an application"""
+    try:
+        state = await asyncio.to_thread(redis_service.client.get, _token_key(token))
+    except RedisError:
+        return False
+    if state == _CONSUMED:
+        return True
+    if state and state.startswith("claimed:"):
+        return int(state.split(":", 1)[1]) >= int(time.time() * 1000)
+    return False
@@ -4,6 +4,7 @@ from src.config import Config
 from src.db.redis import redis_service
 from typing import Optional
 from functools import wraps
+from src.tracing import start_span
 
 async def get_token_from_header(request: Request) -> Optional[str]:
     """Extract JWT token from Authorization header"""
@@ -32,6 +33,10 @@ async def verify_and_decode_token(token: str) -> Optional[dict]:
 
 async def get_current_user(request: Request) -> dict:
     """Dependency to get current user from valid JWT token"""
+    with start_span("get_current_user"):
+        return await _get_current_user(request)
+
+async def _get_current_user(request: Request) -> dict:
     token = await get_token_from_header(request)
     if not token:
         raise HTTPException(
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, List
+
+from sqlalchemy import func, select
+
+from src.authservice.utils import encode_enrollment_number
+from src.config import Config
+from src.db.main import async_engine
+from src.db.models import student_enrollment_number_seq
+
+logger = logging.getLogger(__name__)
+
+
+class EnrollmentNumberAllocator:
+    """Hands out unique enrollment numbers from blocks of reserved sequence values.
+
+    Each process reserves ENROLLMENT_BLOCK_SIZE values per round trip from the
+    Postgres sequence and encodes them locally. The sequence never returns a
+    value twice, so no existing numbers need loading; values still reserved
+    when a process exits are skipped, leaving gaps.
+    """
+
+    def __init__(self):
+        self._reserved: Deque[int] = deque()
+        self._lock = asyncio.Lock()
+
+    async def _reserve_from_sequence(self, count: int) -> List[int]:
+        query = select(student_enrollment_number_seq.next_value()).select_from(func.generate_series(1, count))
+        async with async_engine.connect() as conn:
+            result = await conn.execute(query)
+            values = list(result.scalars())
+            await conn.commit()
+        return values
+
+    async def _reserve(self, count: int) -> None:
+        values = await self._reserve_from_sequence(count)
+        self._reserved.extend(values)
+        logger.debug(f"Reserved {count} enrollment sequence values")
+
+    async def allocate_many(self, count: int) -> List[str]:
+        """Return `count` unique enrollment numbers, reserving more values if needed"""
+        async with self._lock:
+            missing = count - len(self._reserved)
+            if missing > 0:
+                await self._reserve(max(missing, Config.ENROLLMENT_BLOCK_SIZE))
+            values = [self._reserved.popleft() for _ in range(count)]
+        return [encode_enrollment_number(value, Config.ENROLLMENT_NUMBER_LENGTH) for value in values]
+
+    async def allocate(self) -> str:
+        """Return one unique enrollment number"""
+        return (await self.allocate_many(1))[0]
+
+
+enrollment_numbers = EnrollmentNumberAllocator()
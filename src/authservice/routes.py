@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
@@ -99,7 +99,7 @@ async def signup(user_data: UserCreate,session: AsyncSession = Depends(get_sessi
         500: {"description": "Internal server error"}
     }
 )
-async def admin_create_user(user_data: AdminCreateUser,background_tasks:BackgroundTasks,current_user: Dict[str, Any] = Depends(get_current_user),session: AsyncSession = Depends(get_session)
+async def admin_create_user(user_data: AdminCreateUser,current_user: Dict[str, Any] = Depends(get_current_user),session: AsyncSession = Depends(get_session)
 ) -> UserResponse:
     """
     Create user account with admin privileges
@@ -135,7 +135,6 @@ async def admin_create_user(user_data: AdminCreateUser,background_tasks:Backgrou
             
         new_user = await auth_service.create_user_by_admin(
             user_data, 
-            background_tasks, 
             session
         )
         return new_user
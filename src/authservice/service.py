@@ -1,13 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from datetime import datetime
 from typing import Optional, Dict, Any
-from fastapi import BackgroundTasks, HTTPException, status
+from fastapi import HTTPException, status
 from pydantic import ValidationError
 import logging
 
 from src.db.models import User, Role, RoleEnum
+from src.db.loading import USER_WITH_ROLES
 from .schemas import UserCreate, AdminCreateUser, ChangePasswordModel, UpdateProfileModel
 from .utils import (
     generate_password_hash,
@@ -16,12 +16,14 @@ from .utils import (
     create_access_token,
     create_refresh_token
 )
-from src.mail import send_welcome_email
+from src.outbox import EMAIL_WELCOME, enqueue_email
 from src.db.redis import redis_service
 from src.config import Config
+from src.tracing import trace_methods
 
 logger = logging.getLogger(__name__)
 
+@trace_methods
 class AuthService:
     
     async def get_user_by_email(self, email: str, session: AsyncSession) -> Optional[User]:
@@ -29,7 +31,7 @@ class AuthService:
         try:
             result = await session.execute(
                 select(User)
-                .options(selectinload(User.roles))
+                .options(*USER_WITH_ROLES)
                 .where(User.email == email)
             )
             return result.scalars().first()
@@ -42,7 +44,7 @@ class AuthService:
         try:
             result = await session.execute(
                 select(User)
-                .options(selectinload(User.roles))
+                .options(*USER_WITH_ROLES)
                 .where(User.id == user_id)
             )
             return result.scalars().first()
@@ -60,12 +62,12 @@ class AuthService:
     async def create_user(self, user_data: UserCreate, session: AsyncSession) -> User:
         """Create a new user account with specified role"""
         try:
-            logger.info(f"Starting user creation for email: {user_data.email}")
+            logger.debug("Starting user creation for email: %s", user_data.email)
             
             # Check if user already exists
             existing_user = await self.get_user_by_email(user_data.email, session)
             if existing_user:
-                logger.warning(f"User with email {user_data.email} already exists")
+                logger.warning("User with email %s already exists", user_data.email)
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="User with this email already exists"
@@ -76,13 +78,13 @@ class AuthService:
                 select(User).where(User.username == user_data.username)
             )
             if existing_username.scalars().first():
-                logger.warning(f"Username {user_data.username} already exists")
+                logger.warning("Username %s already exists", user_data.username)
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Username already exists"
                 )
 
-            logger.info(f"Looking for role: {user_data.role}")
+            logger.debug("Looking for role: %s", user_data.role)
             
             # Try to get the role from the database
             result = await session.execute(
@@ -92,7 +94,7 @@ class AuthService:
 
             # If role does not exist, create it
             if not role:
-                logger.info(f"Role {user_data.role} not found, creating new role")
+                logger.info("Role %s not found, creating new role", user_data.role)
                 role = Role(
                     name=user_data.role,
                     description=f"System {user_data.role.value} role",
@@ -100,7 +102,7 @@ class AuthService:
                 )
                 session.add(role)
                 await session.flush()
-                logger.info(f"Created new role: {role.name}")
+                logger.info("Created new role: %s", role.name)
 
             # Prepare user data
             user_data_dict = user_data.model_dump(
@@ -112,7 +114,7 @@ class AuthService:
             if 'contact_number' in user_data_dict and user_data_dict['contact_number'] is None:
                 del user_data_dict['contact_number']
 
-            logger.info(f"Creating user with data: {list(user_data_dict.keys())}")
+            logger.debug("Creating user with fields: %s", list(user_data_dict))
 
             # Create new user
             new_user = User(
@@ -126,7 +128,7 @@ class AuthService:
             session.add(new_user)
             await session.flush()  # This assigns an ID to the user
             
-            logger.info(f"User created with ID: {new_user.id}")
+            logger.debug("User created with ID: %s", new_user.id)
 
             # Now assign the role
             # new_user.roles.append(role)
@@ -137,7 +139,7 @@ class AuthService:
             # Refresh to get the complete user with relationships
             await session.refresh(new_user, ['roles'])
             
-            logger.info(f"User creation successful for email: {user_data.email}, ID: {new_user.id}")
+            logger.info("User creation successful for email: %s", user_data.email, extra={"user_id": new_user.id})
             return new_user
 
         except HTTPException:
@@ -160,7 +162,6 @@ class AuthService:
             )
     
     async def create_user_by_admin(self, user_data: AdminCreateUser, 
-                                 background_tasks: BackgroundTasks, 
                                  session: AsyncSession) -> User:
         """Admin creates a user with specified role and generated password"""
         try:
@@ -201,16 +202,12 @@ class AuthService:
             await session.flush()  
             
             new_user.roles.append(user_role)
+            # Welcome email goes out only if the user is actually created
+            enqueue_email(session, EMAIL_WELCOME, new_user.email, password=plain_password)
             
             await session.commit()
             await session.refresh(new_user, ['roles'])
             
-            background_tasks.add_task(
-                self._send_welcome_email_task,
-                email=new_user.email,
-                password=plain_password
-            )
-            
             return new_user
 
         except HTTPException:
@@ -230,19 +227,6 @@ class AuthService:
                 detail=f"User creation failed: {str(e)}"
             )
     
-    def _send_welcome_email_task(self, email: str, password: str):
-        """Synchronous wrapper for sending welcome email in background task"""
-        import asyncio
-        try:
-            # Create new event loop for background task if needed
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        # Run the async email function
-        loop.run_until_complete(send_welcome_email(email, password))
-    
     async def change_password(self, user_data: ChangePasswordModel, user_id: int, session: AsyncSession) -> User:
         """Change user password and invalidate all existing tokens"""
         try:
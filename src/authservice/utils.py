@@ -1,3 +1,6 @@
+import asyncio
+import os
+import time
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Optional
@@ -8,9 +11,10 @@ from src.config import Config
 from src.db.redis import redis_service
 import secrets
 import string
-from typing import Optional, Set,Callable
+from typing import List, Optional, Set,Callable
 from functools import wraps
 from fastapi import HTTPException, status, Depends
+from src.metrics import Gauge, Histogram
 
 # Password hashing context
 passwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -19,6 +23,33 @@ def generate_password_hash(password: str) -> str:
     """Generate secure password hash"""
     return passwd_context.hash(password)
 
+# bcrypt runs on the event loop's default thread pool (asyncio.to_thread)
+bcrypt_jobs_in_flight = Gauge("bcrypt_jobs_in_flight", "Password hashing jobs queued or running in worker threads")
+bcrypt_job_seconds = Histogram(
+    "bcrypt_job_seconds", "Wall time of a password hashing job, including waiting for a thread",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+Gauge("bcrypt_pool_threads", "Size of the default thread pool used for hashing",
+      function=lambda: min(32, (os.cpu_count() or 1) + 4))
+
+
+async def _run_bcrypt(function, *args):
+    bcrypt_jobs_in_flight.inc()
+    start = time.perf_counter()
+    try:
+        return await asyncio.to_thread(function, *args)
+    finally:
+        bcrypt_jobs_in_flight.dec()
+        bcrypt_job_seconds.observe(time.perf_counter() - start)
+
+async def generate_password_hash_async(password: str) -> str:
+    """Generate a password hash in a worker thread so bcrypt does not block the event loop"""
+    return await _run_bcrypt(passwd_context.hash, password)
+
+async def generate_password_hashes_async(passwords: List[str]) -> List[str]:
+    """Hash several passwords in one worker thread job"""
+    return await _run_bcrypt(lambda: [passwd_context.hash(password) for password in passwords])
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against stored hash"""
     return passwd_context.verify(plain_password, hashed_password)
@@ -29,61 +60,44 @@ def generate_password(length: int = 12) -> str:
 
 
 
-def generate_student_enrollment_number(
-    length: int = 10,
-    existing_numbers: Optional[Set[str]] = None,
-    max_attempts: int = 10
-) -> str:
+# Character set without confusing characters (no 0/O, 1/I/L etc.)
+CLEAN_ALPHABET = (
+    string.ascii_uppercase.replace("O", "").replace("I", "").replace("L", "") +
+    string.digits.replace("0", "").replace("1", "")
+)
+
+# Multiplier and offset for the enrollment number permutation. The multiplier
+# must not be a multiple of len(CLEAN_ALPHABET) (31); changing either value after
+# numbers have been issued can produce duplicates of existing numbers.
+_ENROLLMENT_MULTIPLIER = 0x9E3779B97F4A7C15
+_ENROLLMENT_OFFSET = 0x2545F491
+
+
+def encode_enrollment_number(value: int, length: int = 10) -> str:
     """
-    Generates a student enrollment number in STU-XXXXX format.
-    
-    Enhanced version that:
-    - Uses only uppercase letters and digits (no confusing characters)
-    - Guarantees uniqueness against existing numbers
-    - Has configurable length
-    - Includes safety limits
-    
-    Args:
-        length: Length of random part (default 8, min 6)
-        existing_numbers: Set of existing numbers to avoid
-        max_attempts: Maximum generation attempts (default 10)
-        
-    Returns:
-        Enrollment number in format "STU-XXXXXX"
-        
+    Encodes a sequence value as a "STU-XXXXXXXXXX" enrollment number.
+
+    The mapping is a bijection on [0, len(CLEAN_ALPHABET) ** length), so distinct
+    values always give distinct numbers, while consecutive values do not give
+    consecutive-looking numbers.
+
     Raises:
-        ValueError: If invalid length
-        RuntimeError: If can't generate unique number
-        
-    Example:
-        >>> generate_student_enrollment_number()
-        'STU-A1B2C3D4'
+        ValueError: If invalid length or the value does not fit in `length` characters
     """
-    # Validation
     if length < 6:
         raise ValueError("Length must be at least 6 characters")
-    if existing_numbers is None:
-        existing_numbers = set()
-    
-    # Character set without confusing characters (no 0/O, 1/I/L etc.)
-    clean_alphabet = (
-        string.ascii_uppercase.replace("O", "").replace("I", "").replace("L", "") + 
-        string.digits.replace("0", "").replace("1", "")
-    )
-    
-    for _ in range(max_attempts):
-        # Generate random part
-        random_part = ''.join(secrets.choice(clean_alphabet) for _ in range(length))
-        enrollment_number = f"STU-{random_part}"
-        
-        # Check uniqueness
-        if enrollment_number not in existing_numbers:
-            return enrollment_number
-    
-    raise RuntimeError(
-        f"Failed to generate unique enrollment number after {max_attempts} attempts. "
-        "Consider increasing length or clearing existing numbers."
-    )
+    base = len(CLEAN_ALPHABET)
+    space = base ** length
+    if not 0 <= value < space:
+        raise ValueError(f"Enrollment sequence value {value} is out of range for length {length}")
+
+    scrambled = (value * _ENROLLMENT_MULTIPLIER + _ENROLLMENT_OFFSET) % space
+    characters = []
+    for _ in range(length):
+        scrambled, digit = divmod(scrambled, base)
+        characters.append(CLEAN_ALPHABET[digit])
+    return "STU-" + "".join(reversed(characters))
+
 
 async def create_access_token(user: dict, expiry: Optional[timedelta] = None, refresh: bool = False) -> str:
     """Create JWT access token and store in Redis"""
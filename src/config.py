@@ -21,12 +21,118 @@ class Settings(BaseSettings):
     USE_CREDENTIALS :bool = True
     VALIDATE_CERTS :bool = True
     
+    # Pooled SMTP sessions: connections per process, messages per connection before it is
+    # replaced, idle time after which a connection is not reused, and socket timeout
+    MAIL_POOL_SIZE : int = 5
+    MAIL_POOL_MAX_MESSAGES : int = 100
+    MAIL_POOL_IDLE_SECONDS : float = 60.0
+    MAIL_TIMEOUT_SECONDS : float = 30.0
+    
     
     REDIS_HOST :str
     REDIS_PORT : int
     REDIS_DB : int
     REDIS_PASSWORD : str = ""
     
+    # Per-request SQL instrumentation; a threshold of 0 disables N+1 detection
+    SQL_N_PLUS_ONE_THRESHOLD : int = 10
+    SQL_N_PLUS_ONE_RAISE : bool = False
+    
+    # Slow-query log; a threshold of 0 disables it
+    SQL_SLOW_QUERY_MS : float = 500.0
+    SQL_EXPLAIN_SAMPLE_RATE : float = 0.1
+    SQL_EXPLAIN_BUFFER_SIZE : int = 50
+    SQL_EXPLAIN_MAX_CONCURRENT : int = 2
+    
+    # Make relationships not eagerly loaded by a query raise on access (enable in tests)
+    SQL_RAISELOAD : bool = False
+    
+    # Logging: level, "json" or "text" lines, records buffered for the writer thread, share of
+    # INFO/DEBUG records kept (decided per request), and SQL statement logging
+    LOG_LEVEL : str = "INFO"
+    LOG_FORMAT : str = "json"
+    LOG_QUEUE_SIZE : int = 10000
+    LOG_INFO_SAMPLE_RATE : float = 1.0
+    LOG_DEBUG_SAMPLE_RATE : float = 1.0
+    SQL_ECHO : bool = False
+    
+    # Prometheus metrics: how often each worker pushes its numbers to Redis, the event-loop
+    # lag probe interval, and an optional bearer token required to scrape /metrics
+    METRICS_ENABLED : bool = True
+    METRICS_FLUSH_SECONDS : float = 5.0
+    EVENT_LOOP_LAG_INTERVAL_SECONDS : float = 0.5
+    METRICS_TOKEN : str = ""
+    
+    # Tracing (see src/tracing.py): share of requests traced, and where OTLP/JSON spans go
+    # (an OTLP/HTTP collector URL and/or a file of JSON lines)
+    TRACING_ENABLED : bool = False
+    TRACE_SAMPLE_RATE : float = 0.01
+    TRACE_SERVICE_NAME : str = "school-management-system"
+    TRACE_EXPORT_ENDPOINT : str = ""
+    TRACE_EXPORT_FILE : str = ""
+    TRACE_EXPORT_BATCH_SIZE : int = 512
+    TRACE_EXPORT_INTERVAL_SECONDS : float = 5.0
+    TRACE_QUEUE_SIZE : int = 10000
+    
+    # Request profiling (see src/profiling.py): off unless enabled; then triggered by a
+    # SUPER_ADMIN's X-Profile header or a sampling rate. Mode is "sampling" or "cprofile"
+    PROFILING_ENABLED : bool = False
+    PROFILE_SAMPLE_RATE : float = 0.0
+    PROFILE_MODE : str = "sampling"
+    PROFILE_INTERVAL_MS : float = 5.0
+    PROFILE_MAX_STACKS : int = 2000
+    PROFILE_TTL_SECONDS : int = 86400
+    PROFILE_KEEP : int = 100
+    
+    # Queued admission ingestion: purchase/apply are acknowledged with 202 and persisted in batches
+    ADMISSION_QUEUE_ENABLED : bool = False
+    ADMISSION_QUEUE_MAX_DEPTH : int = 5000
+    ADMISSION_QUEUE_WORKERS : int = 4
+    ADMISSION_QUEUE_BATCH_SIZE : int = 100
+    ADMISSION_QUEUE_FLUSH_MS : float = 50.0
+    ADMISSION_SUBMISSION_TTL_SECONDS : int = 86400
+    
+    # Purchase-token state cached in Redis: how long a state is kept, and how long an
+    # application may hold a claimed token before another can take it over
+    ADMISSION_TOKEN_CACHE_TTL_SECONDS : int = 2592000
+    ADMISSION_TOKEN_CLAIM_SECONDS : int = 30
+    
+    # Idempotency-Key handling for retry-prone POST routes
+    IDEMPOTENCY_TTL_SECONDS : int = 86400
+    IDEMPOTENCY_LOCK_SECONDS : int = 60
+    IDEMPOTENCY_WAIT_SECONDS : float = 10.0
+    
+    # Email outbox worker: rows claimed per poll, concurrent sends, retry policy and claim lease
+    OUTBOX_BATCH_SIZE : int = 50
+    OUTBOX_CONCURRENCY : int = 10
+    OUTBOX_POLL_SECONDS : float = 2.0
+    OUTBOX_MAX_ATTEMPTS : int = 8
+    OUTBOX_BACKOFF_SECONDS : float = 30.0
+    OUTBOX_BACKOFF_MAX_SECONDS : float = 3600.0
+    OUTBOX_SEND_TIMEOUT_SECONDS : float = 30.0
+    OUTBOX_LEASE_SECONDS : int = 300
+    
+    # Notification digests: non-urgent emails are held and sent as one email per recipient
+    # for every window of this many seconds (0 sends each email on its own)
+    NOTIFICATION_DIGEST_WINDOW_SECONDS : int = 0
+    NOTIFICATION_DIGEST_CHECK_SECONDS : float = 60.0
+    
+    # Reviewer work queue: how long a claimed form stays reserved, and the largest claim
+    ADMISSION_CLAIM_LEASE_MINUTES : int = 30
+    ADMISSION_CLAIM_MAX_BATCH : int = 50
+    
+    # Parent dashboard: cached payload lifetime (0 disables caching) and records shown
+    DASHBOARD_CACHE_TTL_SECONDS : int = 300
+    DASHBOARD_RECENT_RECORDS : int = 10
+    
+    # Enrollment numbers: sequence values each process reserves per round trip, and the encoded length
+    ENROLLMENT_BLOCK_SIZE : int = 100
+    ENROLLMENT_NUMBER_LENGTH : int = 10
+    
+    # Cohort onboarding: approved forms per transaction, default fee due period, job status lifetime
+    ONBOARDING_BATCH_SIZE : int = 500
+    ONBOARDING_FEE_DUE_DAYS : int = 30
+    ONBOARDING_JOB_TTL_SECONDS : int = 604800
     
     
     
@@ -0,0 +1,187 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.config import Config
+from src.metrics import Counter as MetricCounter, Gauge, Histogram
+from src.tracing import CLIENT, start_span
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"(\$\d+|%\(\w+\)s|(?<!:):\w+|\?)")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+
+
+class NPlusOneError(RuntimeError):
+    """Raised when the same statement shape repeats too often within one request"""
+
+
+class QueryStats:
+    """Per-request SQL counters, mutated by the engine event hooks"""
+
+    def __init__(self, route: Optional[str] = None):
+        self.route = route
+        self.statements = 0
+        self.rows = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+        self.flagged: set = set()
+
+    def server_timing(self) -> str:
+        """Render the totals as a Server-Timing header value"""
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.statements} queries, {self.rows} rows"'
+
+
+class _Totals:
+    """Process-wide counters exported by the metrics endpoint"""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.duration = 0.0
+        self.n_plus_one = 0
+
+
+db_totals = _Totals()
+
+MetricCounter("db_statements_total", "SQL statements executed", function=lambda: db_totals.statements)
+MetricCounter("db_rows_total", "Rows returned or affected by SQL statements", function=lambda: db_totals.rows)
+MetricCounter("db_statement_seconds_total", "Time spent executing SQL statements", function=lambda: db_totals.duration)
+MetricCounter("db_n_plus_one_total", "Requests flagged for a repeated statement shape", function=lambda: db_totals.n_plus_one)
+
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds", "Time to get a pooled connection, including waiting for one and connecting"
+)
+db_pool_checkouts_total = MetricCounter("db_pool_checkouts_total", "Connections checked out of the pool")
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_request_stats(route: Optional[str] = None):
+    """Begin collecting stats for the current request; returns a reset token"""
+    return _current_stats.set(QueryStats(route))
+
+
+def reset_request_stats(token) -> None:
+    _current_stats.reset(token)
+
+
+def get_request_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a SQL statement to its shape: literals and bind parameters become '?'"""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _BIND_PARAM.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    return _IN_LIST.sub("IN (?)", shape)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - getattr(context, "_query_start", time.perf_counter())
+    rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+
+    db_totals.statements += 1
+    db_totals.rows += rows
+    db_totals.duration += elapsed
+
+    stats = _current_stats.get()
+    if stats is None:
+        return
+
+    stats.statements += 1
+    stats.rows += rows
+    stats.duration += elapsed
+
+    threshold = Config.SQL_N_PLUS_ONE_THRESHOLD
+    if threshold <= 0:
+        return
+
+    shape = normalize_statement(statement)
+    stats.shapes[shape] += 1
+    if stats.shapes[shape] > threshold and shape not in stats.flagged:
+        stats.flagged.add(shape)
+        db_totals.n_plus_one += 1
+        message = (
+            f"Possible N+1: statement ran {stats.shapes[shape]} times "
+            f"in {stats.route or 'unknown route'}: {shape}"
+        )
+        if Config.SQL_N_PLUS_ONE_RAISE:
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+def install_query_instrumentation(engine: AsyncEngine) -> None:
+    """Attach the counting hooks to the engine's underlying sync engine"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = start_span(f"db {operation}", CLIENT, {
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:1000],
+    })
+
+
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.set_attribute("db.rows", cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0)
+        span.end()
+
+
+def _fail_statement_span(exception_context):
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.set_error(f"{type(exception_context.original_exception).__name__}: {exception_context.original_exception}")
+        span.end()
+
+
+def install_query_tracing(engine: AsyncEngine) -> None:
+    """A client span per SQL statement, child of whatever span is current"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _start_statement_span):
+        event.listen(sync_engine, "before_cursor_execute", _start_statement_span)
+        event.listen(sync_engine, "after_cursor_execute", _end_statement_span)
+        event.listen(sync_engine, "handle_error", _fail_statement_span)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool that records, and traces, how long each checkout waited"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            with start_span("db pool checkout"):
+                return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - start)
+
+
+def install_pool_metrics(engine: AsyncEngine) -> None:
+    """Count checkouts and report pool occupancy; the pool is looked up on each read since dispose() replaces it"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "checkout", lambda *args: db_pool_checkouts_total.inc())
+    Gauge("db_pool_checked_out", "Connections currently in use", function=lambda: sync_engine.pool.checkedout())
+    Gauge("db_pool_size", "Configured pool size", function=lambda: sync_engine.pool.size())
+    Gauge("db_pool_overflow", "Connections open beyond the pool size", function=lambda: sync_engine.pool.overflow())
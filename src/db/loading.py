@@ -0,0 +1,56 @@
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, load_only, raiseload, selectinload
+
+from src.db.models import Class, ClassEnrollment, Student, User
+
+logger = logging.getLogger(__name__)
+
+# Named loader profiles. Service queries pass one with ``.options(*PROFILE)`` so
+# every relationship they read afterwards is loaded up front, in a known number
+# of round trips, instead of lazily on attribute access.
+
+# User plus role names, as needed for JWT claims and role checks (2 queries)
+USER_WITH_ROLES = (
+    selectinload(User.roles),
+)
+
+# Student with the profile fields of its user account in the same query, plus
+# its class enrollments and classes in one more query however many students load
+STUDENT_AS_WARD = (
+    load_only(Student.enrollment_number, Student.grade_level, Student.section),
+    joinedload(Student.user, innerjoin=True).load_only(
+        User.first_name,
+        User.last_name,
+        User.date_of_birth,
+        User.contact_number,
+        User.email,
+        User.created_at,
+        User.updated_at,
+    ),
+    selectinload(Student.class_enrollments).options(
+        load_only(ClassEnrollment.class_id, ClassEnrollment.enrollment_date),
+        joinedload(ClassEnrollment.class_, innerjoin=True).load_only(
+            Class.name, Class.grade_level, Class.academic_year
+        ),
+    ),
+)
+
+
+def _apply_raiseload(orm_execute_state) -> None:
+    """Make relationships not named by a loader option raise instead of lazy loading"""
+    if (
+        orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.is_relationship_load
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+def install_raiseload_guard(enabled: bool) -> None:
+    """Default every relationship on ORM selects to raiseload, for use in tests"""
+    if not enabled:
+        return
+    event.listen(Session, "do_orm_execute", _apply_raiseload)
+    logger.info("raiseload guard enabled: unloaded relationships will raise on access")
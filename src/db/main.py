@@ -1,6 +1,9 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from src.config import Config
+from src.db.instrumentation import (TimedQueuePool, install_pool_metrics, install_query_instrumentation,
+                                    install_query_tracing)
+from src.db.slow_queries import install_slow_query_log
 
 # Create SQLAlchemy declarative base
 Base = declarative_base()
@@ -10,11 +13,19 @@ database_url = Config.DATABASE_URL.replace(r'\x3a', ':') if r'\x3a' in Config.DA
 
 async_engine = create_async_engine(
     database_url,
-    echo=True,
+    # SQL_ECHO is applied as a logger level by src.log_config; echo=True would add a blocking stdout handler
+    echo=False,
     future=True,
+    poolclass=TimedQueuePool,
     connect_args={"ssl": True} if "postgres" in database_url.lower() else {}
 )
 
+install_query_instrumentation(async_engine)
+install_pool_metrics(async_engine)
+install_slow_query_log(async_engine, threshold_ms=Config.SQL_SLOW_QUERY_MS)
+if Config.TRACING_ENABLED:
+    install_query_tracing(async_engine)
+
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
     class_=AsyncSession,
@@ -23,6 +34,9 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 from src.db.models import *  # Import all models here
+from src.db.loading import install_raiseload_guard
+
+install_raiseload_guard(Config.SQL_RAISELOAD)
 
 async def init_db():
     """Initialize database tables"""
@@ -12,7 +12,11 @@ from sqlalchemy import (
     Enum as SQLEnum, 
     Column,
     Text,
-    Boolean
+    Boolean,
+    Index,
+    JSON,
+    Sequence,
+    text
 )
 from sqlalchemy.orm import relationship, declarative_base, Mapped, mapped_column
 from sqlalchemy import Table
@@ -152,6 +156,12 @@ class SubmissionStatus(str, Enum):
     LATE = "LATE"
     GRADED = "GRADED"
 
+class OutboxStatus(str, Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
 class Gender(str, Enum):
     MALE = "MALE"
     FEMALE = "FEMALE"
@@ -266,6 +276,9 @@ class Student(Base):
     admission_forms: Mapped[List[AdmissionForm]] = relationship(back_populates="student")
     submissions: Mapped[List[Submission]] = relationship(back_populates="student")
 
+# Source of enrollment numbers; values are encoded by encode_enrollment_number
+student_enrollment_number_seq = Sequence("student_enrollment_number_seq", metadata=Base.metadata)
+
 class Teacher(Base):
     """Enhanced teacher model with department support"""
     __tablename__ = "teachers"
@@ -358,7 +371,7 @@ class AdmissionForm(Base):
     form_id: Mapped[str] = mapped_column(String(36), unique=True, index=True, default=lambda: str(uuid.uuid4()))
     student_id: Mapped[Optional[int]] = mapped_column(ForeignKey("students.id"))
     parent_id: Mapped[int] = mapped_column(ForeignKey("parents.id"))
-    purchase_id: Mapped[Optional[int]] = mapped_column(ForeignKey("purchase_admission_forms.id"))
+    purchase_id: Mapped[Optional[int]] = mapped_column(ForeignKey("purchase_admission_forms.id"), unique=True)
     
     student_first_name: Mapped[str] = mapped_column(String(50), nullable=False)
     student_last_name: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -378,6 +391,16 @@ class AdmissionForm(Base):
     status: Mapped[AdmissionStatus] = mapped_column(SQLEnum(AdmissionStatus), default=AdmissionStatus.PENDING)
     submission_date: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=current_time)
     processed_by_id: Mapped[Optional[int]] = mapped_column(ForeignKey("admins.id"))
+    claimed_by_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
+    claim_expires_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    
+    # Reviewer work queue: oldest claimable forms first
+    __table_args__ = (
+        Index(
+            "ix_admission_forms_review_queue", "submission_date", "id",
+            postgresql_where=text("status IN ('PENDING', 'UNDER_REVIEW')")
+        ),
+    )
     
     student: Mapped[Optional[Student]] = relationship(back_populates="admission_forms")
     parent: Mapped[Parent] = relationship(back_populates="admission_forms")
@@ -517,4 +540,40 @@ class Submission(Base):
     feedback: Mapped[Optional[str]] = mapped_column(Text)
     
     student: Mapped[Student] = relationship(back_populates="submissions")
-    assignment: Mapped[Assignment] = relationship(back_populates="submissions")
\ No newline at end of file
+    assignment: Mapped[Assignment] = relationship(back_populates="submissions")
+
+class EmailOutbox(Base):
+    """Emails written in the same transaction as the change they announce, sent by the outbox worker"""
+    __tablename__ = "email_outbox"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON)
+    status: Mapped[OutboxStatus] = mapped_column(SQLEnum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=current_time, nullable=False)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=current_time)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    # W3C traceparent of the span that queued the email, continued by the outbox worker
+    traceparent: Mapped[Optional[str]] = mapped_column(String(55))
+    
+    # Delivery queue: due emails that are waiting or whose sender died mid-send
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_due", "next_attempt_at", "id",
+            postgresql_where=text("status IN ('PENDING', 'SENDING')")
+        ),
+    )
+
+class NotificationDigestItem(Base):
+    """Notification held back to be sent in the recipient's next digest email"""
+    __tablename__ = "notification_digest_items"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    recipient: Mapped[str] = mapped_column(String(100), nullable=False)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=current_time, index=True)
@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+def columns_for(schema: Type[BaseModel], model: Any, **extra: Any) -> List[Any]:
+    """Column attributes of ``model`` named by the fields of ``schema``.
+
+    Selecting these instead of the entity returns plain rows, so nothing is
+    added to the identity map or tracked for changes. Fields that live on
+    another table can be supplied as keyword arguments, e.g.
+    ``first_name=User.first_name``.
+    """
+    mapped = inspect(model).column_attrs.keys()
+    columns = []
+    for name in schema.model_fields:
+        if name in extra:
+            columns.append(extra[name].label(name))
+        elif name in mapped:
+            columns.append(getattr(model, name))
+    return columns
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def rows_to(schema: Type[SchemaT], rows: Iterable[Any]) -> List[SchemaT]:
+    """Validate result rows into response schemas in a single pydantic-core pass"""
+    return _list_adapter(schema).validate_python(list(rows), from_attributes=True)
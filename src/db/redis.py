@@ -1,10 +1,43 @@
+import time
 import redis
+from redis.client import Pipeline
 from src.config import Config
+from src.metrics import Histogram
+from src.tracing import CLIENT, start_span
 from datetime import timedelta
 
+redis_command_seconds = Histogram("redis_command_seconds", "Redis round trip time by command", ("command",))
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        start = time.perf_counter()
+        try:
+            with start_span("redis PIPELINE", CLIENT, {"db.system": "redis", "db.redis.commands": len(self.command_stack)}):
+                return super().execute(raise_on_error)
+        finally:
+            redis_command_seconds.observe(time.perf_counter() - start, "PIPELINE")
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that records the latency of every command, and traces it"""
+
+    def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        start = time.perf_counter()
+        try:
+            with start_span(f"redis {command}", CLIENT, {"db.system": "redis"}):
+                return super().execute_command(*args, **options)
+        finally:
+            redis_command_seconds.observe(time.perf_counter() - start, command)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
 class RedisService:
     def __init__(self):
-        self.client = redis.Redis(
+        self.client = InstrumentedRedis(
             host=Config.REDIS_HOST,
             port=Config.REDIS_PORT,
             db=Config.REDIS_DB,
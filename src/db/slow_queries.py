@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import Config
+from src.db.instrumentation import get_request_stats, normalize_statement, start_request_stats
+
+logger = logging.getLogger(__name__)
+
+_SRC_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DB_PACKAGE = os.path.join(_SRC_ROOT, "db")
+
+_explaining: ContextVar[bool] = ContextVar("explaining", default=False)
+_pending_explains: set = set()
+
+explain_buffer: deque = deque(maxlen=Config.SQL_EXPLAIN_BUFFER_SIZE)
+
+# ANALYZE executes the statement again: these must only be planned, never re-run
+_SIDE_EFFECTS = re.compile(
+    r"\b(nextval|setval|pg_advisory_\w+|pg_notify|pg_terminate_backend|pg_cancel_backend|dblink\w*|lo_\w+)\s*\("
+    r"|\b(INSERT|UPDATE|DELETE|MERGE)\b",
+    re.IGNORECASE
+)
+
+
+def _parameter_shape(parameters: Any) -> Any:
+    """Describe bind parameters by type only, so values never reach the log"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return [_parameter_shape(parameters[0]), f"x{len(parameters)}"]
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _iter_frames():
+    """Walk the sync stack, then continue into the coroutine chain that awaits it"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    parent = getcurrent().parent
+    frame = parent.gr_frame if parent is not None else None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _calling_function() -> Optional[str]:
+    """Find the first application function outside src/db that issued the statement"""
+    for frame in _iter_frames():
+        filename = frame.f_code.co_filename
+        if filename.startswith(_SRC_ROOT) and not filename.startswith(_DB_PACKAGE):
+            module = frame.f_globals.get("__name__", "?")
+            return f"{module}.{frame.f_code.co_name}"
+    return None
+
+
+async def _capture_explain(engine: AsyncEngine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+    """Run EXPLAIN (ANALYZE, BUFFERS) on a separate connection and keep the plan
+
+    Statements with side effects get a plain EXPLAIN, so they are not executed twice.
+    """
+    _explaining.set(True)
+    start_request_stats(None)
+    entry["analyzed"] = not _SIDE_EFFECTS.search(statement)
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if entry["analyzed"] else "FORMAT JSON"
+    try:
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)
+            entry["plan"] = result.scalar()
+            await conn.rollback()
+        explain_buffer.append(entry)
+    except Exception as e:
+        logger.warning("EXPLAIN capture failed for %s: %s", entry["statement"], e)
+
+
+def _schedule_explain(engine: AsyncEngine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+    if len(_pending_explains) >= Config.SQL_EXPLAIN_MAX_CONCURRENT:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_capture_explain(engine, entry, statement, parameters))
+    _pending_explains.add(task)
+    task.add_done_callback(_pending_explains.discard)
+
+
+def install_slow_query_log(engine: AsyncEngine, threshold_ms: float) -> None:
+    """Log statements slower than threshold_ms and sample their query plans"""
+    if threshold_ms <= 0:
+        return
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - context._slow_query_start) * 1000
+        if duration_ms < threshold_ms or _explaining.get():
+            return
+
+        stats = get_request_stats()
+        entry = {
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "route": stats.route if stats else None,
+            "function": _calling_function(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": normalize_statement(statement),
+            "parameters": _parameter_shape(parameters),
+        }
+        logger.warning(
+            "Slow query %.1fms route=%s function=%s params=%s sql=%s",
+            duration_ms, entry["route"], entry["function"], entry["parameters"], entry["statement"]
+        )
+
+        if (
+            conn.dialect.name == "postgresql"
+            and not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and "FOR UPDATE" not in statement.upper()
+            and random.random() < Config.SQL_EXPLAIN_SAMPLE_RATE
+        ):
+            _schedule_explain(engine, entry, statement, parameters)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def get_explain_samples() -> List[Dict[str, Any]]:
+    """Most recent captured plans, newest first"""
+    return list(reversed(explain_buffer))
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+from markupsafe import Markup
+
+from src.outbox import (
+    EMAIL_ADMISSION_APPROVED, EMAIL_ADMISSION_DECLINED, EMAIL_DIGEST, EMAIL_SERIAL_TOKEN, EMAIL_WELCOME
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).parent / "templates" / "email"
+
+# Email kind -> (subject template, body template file)
+EMAIL_TEMPLATES: Dict[str, Tuple[str, str]] = {
+    EMAIL_WELCOME: ("Your New Account Credentials", "welcome.html"),
+    EMAIL_SERIAL_TOKEN: ("Your Serial Token", "serial_token.html"),
+    EMAIL_ADMISSION_APPROVED: ("Admission Approved", "admission_approved.html"),
+    EMAIL_ADMISSION_DECLINED: ("Admission Application Update", "admission_declined.html"),
+    EMAIL_DIGEST: ("{{ items|length }} Updates From the School", "digest.html"),
+}
+
+# Batches at least this large are rendered in a worker thread
+_THREAD_THRESHOLD = 200
+
+
+class TemplateRegistry:
+    """Email templates compiled once and kept for the life of the process.
+
+    Templates are never reloaded from disk, and a variable missing from the
+    context is an error rather than an empty string.
+    """
+
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        self._env = Environment(
+            loader=FileSystemLoader(str(directory)),
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,
+            auto_reload=False,
+        )
+        self._compiled: Dict[str, Tuple[Template, Template]] = {}
+
+    def load(self) -> None:
+        """Compile every registered template; a broken template fails here instead of at send time"""
+        for kind, (subject, filename) in EMAIL_TEMPLATES.items():
+            self._compiled[kind] = (self._env.from_string(subject), self._env.get_template(filename))
+        logger.info(f"Compiled {len(self._compiled)} email templates")
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in EMAIL_TEMPLATES
+
+    def _templates(self, kind: str) -> Tuple[Template, Template]:
+        if not self._compiled:
+            self.load()
+        try:
+            return self._compiled[kind]
+        except KeyError:
+            raise KeyError(f"No email template registered for {kind!r}")
+
+    def _render_digest(self, context: Mapping[str, Any]) -> Tuple[str, str]:
+        """A digest is each item's own body under one subject; a single item is sent as itself"""
+        items = context["items"]
+        if len(items) == 1:
+            return self.render(items[0]["kind"], items[0]["payload"] or {})
+        sections = [Markup(self._templates(item["kind"])[1].render(item["payload"] or {})) for item in items]
+        subject, body = self._templates(EMAIL_DIGEST)
+        return subject.render(items=items), body.render(items=items, sections=sections)
+
+    def render(self, kind: str, context: Mapping[str, Any]) -> Tuple[str, str]:
+        """Subject and HTML body for one message"""
+        if kind == EMAIL_DIGEST:
+            return self._render_digest(context)
+        subject, body = self._templates(kind)
+        return subject.render(context), body.render(context)
+
+    def render_many(self, kind: str, contexts: Sequence[Mapping[str, Any]]) -> List[Tuple[str, str]]:
+        """Render one template for many contexts"""
+        if kind == EMAIL_DIGEST:
+            return [self._render_digest(context) for context in contexts]
+        subject, body = self._templates(kind)
+        return [(subject.render(context), body.render(context)) for context in contexts]
+
+    async def render_batch(self, kind: str, contexts: Sequence[Mapping[str, Any]]) -> List[Tuple[str, str]]:
+        """render_many that keeps large batches off the event loop"""
+        if len(contexts) < _THREAD_THRESHOLD:
+            return self.render_many(kind, contexts)
+        return await asyncio.to_thread(self.render_many, kind, contexts)
+
+
+email_templates = TemplateRegistry()
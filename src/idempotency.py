@@ -0,0 +1,137 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Dict, Optional
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+
+from src.config import Config
+from src.db.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# POST routes where a retried request must not run twice
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/v\d+/admission/(purchase|apply)$"),
+    re.compile(r"^/v\d+/auth/admin/users$"),
+    re.compile(r"^/v\d+/admin/(verify|decline)-admission/\d+$"),
+    re.compile(r"^/v\d+/admin/admissions/(decisions|claim|onboard)$"),
+]
+
+_REPLAYED_HEADERS = ("content-type", "location", "retry-after")
+_POLL_INTERVAL = 0.05
+
+
+def is_idempotent_route(method: str, path: str) -> bool:
+    return method == "POST" and any(pattern.match(path) for pattern in IDEMPOTENT_ROUTES)
+
+
+def _redis_key(request: Request, key: str) -> str:
+    """Scope the client's key to its credentials and route so keys cannot collide across users"""
+    caller = hashlib.sha256(request.headers.get("authorization", "").encode()).hexdigest()[:16]
+    return f"idempotency:{caller}:{request.method}:{request.url.path}:{key}"
+
+
+async def _load(redis_key: str) -> Optional[Dict[str, Any]]:
+    raw = await asyncio.to_thread(redis_service.client.get, redis_key)
+    return json.loads(raw) if raw else None
+
+
+async def _release(redis_key: str) -> None:
+    # Runs to completion in its thread even if the awaiting request is cancelled
+    await asyncio.to_thread(redis_service.client.delete, redis_key)
+
+
+def _replay(record: Dict[str, Any]) -> Response:
+    response = Response(
+        content=base64.b64decode(record["body"]),
+        status_code=record["status"],
+        headers=record["headers"],
+    )
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _mismatch() -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": f"{IDEMPOTENCY_HEADER} was already used with a different request"},
+    )
+
+
+async def _execute(request: Request, call_next, redis_key: str, fingerprint: str) -> Response:
+    """Run the request while holding the in-flight marker, then store its response"""
+    try:
+        response = await call_next(request)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+    except BaseException:
+        # Includes a client disconnect or cancellation, so retries are not locked out
+        await _release(redis_key)
+        raise
+
+    if response.status_code >= 500:
+        # Server errors are not final; let the client retry for real
+        await _release(redis_key)
+    else:
+        record = {
+            "state": "done",
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name in _REPLAYED_HEADERS},
+            "body": base64.b64encode(body).decode(),
+        }
+        await asyncio.to_thread(redis_service.client.setex, redis_key, Config.IDEMPOTENCY_TTL_SECONDS, json.dumps(record))
+
+    replay = Response(content=body, status_code=response.status_code)
+    # Raw headers keep repeated ones, e.g. several Set-Cookie lines
+    replay.raw_headers = list(response.raw_headers)
+    return replay
+
+
+async def idempotency_middleware(request: Request, call_next) -> Response:
+    """Execute each Idempotency-Key once; retries replay the stored response.
+
+    A duplicate arriving while the first request is still running waits for
+    its result instead of executing again. Reusing a key with a different body
+    is rejected with 422.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key or not is_idempotent_route(request.method, request.url.path):
+        return await call_next(request)
+
+    redis_key = _redis_key(request, key)
+    fingerprint = hashlib.sha256(await request.body()).hexdigest()
+    in_flight = json.dumps({"state": "in_flight", "fingerprint": fingerprint})
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + Config.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        acquired = await asyncio.to_thread(
+            redis_service.client.set, redis_key, in_flight, nx=True, ex=Config.IDEMPOTENCY_LOCK_SECONDS
+        )
+        if acquired:
+            return await _execute(request, call_next, redis_key, fingerprint)
+
+        record = await _load(redis_key)
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                return _mismatch()
+            if record["state"] == "done":
+                logger.info(f"Replaying stored response for {request.method} {request.url.path}")
+                return _replay(record)
+
+        # In flight elsewhere, or it just failed and released the key: wait and look again
+        if loop.time() >= deadline:
+            return JSONResponse(
+                status_code=status.HTTP_409_CONFLICT,
+                content={"detail": f"A request with this {IDEMPOTENCY_HEADER} is still being processed"},
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(_POLL_INTERVAL)
@@ -0,0 +1,130 @@
+"""Structured, non-blocking logging.
+
+Log calls on the event loop only build the record and put it on a bounded
+queue; a QueueListener thread formats it as JSON (or text) and writes it to
+stdout. A slow or blocked stdout therefore never stalls request handling.
+When the queue is full, records are dropped and counted instead of waiting.
+
+Every record carries the request id of the request that logged it (from the
+X-Request-ID header, or generated). INFO and DEBUG records can be sampled
+with LOG_INFO_SAMPLE_RATE / LOG_DEBUG_SAMPLE_RATE. The decision is made per
+request, so a sampled request keeps all of its lines. Warnings and errors are
+always kept.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from src.config import Config
+from src.metrics import Counter
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed with extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+# Loggers that write to their own handlers unless told otherwise
+_REDIRECTED_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access", "sqlalchemy.engine.Engine")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_dropped = Counter("log_records_dropped_total", "Log records discarded because the log queue was full")
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class RequestSampler(logging.Filter):
+    """Attach the request id, and keep only a share of INFO/DEBUG records"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = Config.LOG_INFO_SAMPLE_RATE if record.levelno >= logging.INFO else Config.LOG_DEBUG_SAMPLE_RATE
+        if rate >= 1.0:
+            return True
+        if request_id is None:
+            return random.random() < rate
+        return zlib.crc32(request_id.encode()) / 0xFFFFFFFF < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full and leaves formatting to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now: they may be mutated after the call returns. Tracebacks are
+        # rendered here too, since they refer to frames of this thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped.inc()
+
+
+def setup_logging() -> None:
+    """Route all logging through the queue; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if Config.LOG_FORMAT == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s"))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestSampler())
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(Config.LOG_LEVEL)
+
+    for name in _REDIRECTED_LOGGERS:
+        redirected = logging.getLogger(name)
+        redirected.handlers = []
+        redirected.propagate = True
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if Config.SQL_ECHO else logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out whatever is still queued and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
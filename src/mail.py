@@ -1,76 +1,43 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
 from src.config import Config
-from fastapi import BackgroundTasks
+from src.email_templates import email_templates
+from src.smtp_pool import smtp_pool
+from src.outbox import EMAIL_ADMISSION_APPROVED, EMAIL_ADMISSION_DECLINED, EMAIL_SERIAL_TOKEN, EMAIL_WELCOME
 
-# Configure email settings
-conf = ConnectionConfig(
-     MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_PORT=Config.MAIL_PORT,
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
-    MAIL_STARTTLS=Config.MAIL_STARTTLS,
-    MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
-    USE_CREDENTIALS=Config.USE_CREDENTIALS,
-    VALIDATE_CERTS=Config.VALIDATE_CERTS,
-    #TEMPLATE_FOLDER='templates'  # Optional for HTML emails
-)
+logger = logging.getLogger(__name__)
 
-# Create FastMail instance
-fm = FastMail(conf)
+def build_message(recipient: str, subject: str, html: str) -> EmailMessage:
+    """HTML email from the configured sender"""
+    message = EmailMessage()
+    message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM))
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(html, subtype="html")
+    return message
+
+async def send_email(email: str, subject: str, html: str):
+    """Send an already rendered email over the pooled SMTP connections"""
+    await smtp_pool.send(build_message(email, subject, html))
+
+async def send_templated_email(kind: str, email: str, **context):
+    """Render a registered template and send it"""
+    subject, html = email_templates.render(kind, context)
+    await send_email(email, subject, html)
 
 async def send_welcome_email(email: str, password: str):
     """Send welcome email with credentials"""
-    message = MessageSchema(
-        recipients=[email],
-        subject="Your New Account Credentials",
-        body=f"""
-        <h1>Welcome to Our Platform!</h1>
-        <p>Your temporary password: <strong>{password}</strong></p>
-        <p>Please change it after your first login.</p>
-        """,
-        subtype="html"
-    )
-    await fm.send_message(message)
+    await send_templated_email(EMAIL_WELCOME, email, password=password)
     
 async def send_serial_token(email: str, serial_token: str):
     """Send serial token email"""
-    message = MessageSchema(
-        recipients=[email],
-        subject="Your Serial Token",
-        body=f"""
-        <h1>Your Serial Token</h1>
-        <p>Your serial token: <strong>{serial_token}</strong></p>
-        """,
-        subtype="html"
-    )
-    await fm.send_message(message)    
+    await send_templated_email(EMAIL_SERIAL_TOKEN, email, serial_token=serial_token)
     
 async def send_approve_admission_email(email: str, admission_id: int):
     """Send admission approval email"""
-    message = MessageSchema(
-        recipients=[email],
-        subject="Admission Approved",
-        body=f"""
-        <h1>Congratulations!</h1>
-        <p>Your admission with ID: <strong>{admission_id}</strong> has been approved.</p>
-        <p>You can now proceed with the registration process. Please log in to your account for the next steps.</p>
-        """,
-        subtype="html"
-    )
-    await fm.send_message(message)
+    await send_templated_email(EMAIL_ADMISSION_APPROVED, email, admission_id=admission_id)
 
 async def send_decline_admission_email(email: str, admission_id: int):
     """Send admission decline email"""
-    message = MessageSchema(
-        recipients=[email],
-        subject="Admission Application Update",
-        body=f"""
-        <h1>Admission Update</h1>
-        <p>We regret to inform you that your admission application with ID: <strong>{admission_id}</strong> has been declined.</p>
-        <p>Please contact our admissions office for more information or to discuss your options.</p>
-        """,
-        subtype="html"
-    )
-    await fm.send_message(message)
\ No newline at end of file
+    await send_templated_email(EMAIL_ADMISSION_DECLINED, email, admission_id=admission_id)
@@ -0,0 +1,334 @@
+"""Prometheus metrics aggregated across worker processes.
+
+Each process records into plain dicts, under a per-metric lock because Redis
+and bcrypt timings are also recorded from worker threads. Recording does no I/O. Every METRICS_FLUSH_SECONDS a background task adds the
+increments since the last flush to one shared Redis hash (HINCRBYFLOAT), so
+counters and histograms are summed over all API and outbox workers and keep
+counting across restarts. Flushes and scrapes talk to Redis from a worker
+thread so the event loop is never blocked on it.
+
+Gauges describe a single process. They are written to a per-process hash that
+expires soon after the process stops flushing, and carry a ``worker`` label.
+Gauges created with ``local=True`` are computed by the scraping process only
+(database backlog counts, for example) and are never flushed.
+"""
+import asyncio
+import bisect
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+_TOTALS_KEY = "metrics:totals"
+_WORKERS_KEY = "metrics:workers"
+
+# Seconds; suits HTTP handlers, pool checkouts and Redis/bcrypt calls alike
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name: str, labelnames: Sequence[str], labels: Sequence[str]) -> str:
+    """Exposition-format series name, also used as the Redis hash field"""
+    if not labelnames:
+        return name
+    pairs = ",".join(f'{key}="{_escape(str(value))}"' for key, value in zip(labelnames, labels))
+    return f"{name}{{{pairs}}}"
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Held while recording and while copying values out for samples()
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def series_names(self) -> Tuple[str, ...]:
+        return (self.name,)
+
+    def samples(self) -> Iterator[Tuple[str, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count; `function` reads a cumulative total kept elsewhere in the process"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, float]]:
+        if self._function is not None:
+            yield self.name, float(self._function())
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield _series(self.name, self.labelnames, labels), value
+
+
+class Gauge(_Metric):
+    """Point-in-time value of this process; `function` is evaluated at flush and scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None, local: bool = False):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+        self.local = local
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def samples(self) -> Iterator[Tuple[str, float]]:
+        labelnames = self.labelnames if self.local else self.labelnames + ("worker",)
+        extra = () if self.local else (registry.worker,)
+        if self._function is not None:
+            try:
+                value = float(self._function())
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} unavailable: {str(e)}")
+            else:
+                yield _series(self.name, labelnames, extra), value
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield _series(self.name, labelnames, labels + extra), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self._bounds = tuple(sorted(buckets))
+        # labels -> per-bucket counts (last one is +Inf), then sum and count
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        bucket = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0.0] * (len(self._bounds) + 3)
+            state[bucket] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def series_names(self) -> Tuple[str, ...]:
+        return (f"{self.name}_bucket", f"{self.name}_sum", f"{self.name}_count")
+
+    def samples(self) -> Iterator[Tuple[str, float]]:
+        bucket_labels = self.labelnames + ("le",)
+        bounds = [_format(bound) for bound in self._bounds] + ["+Inf"]
+        with self._lock:
+            values = [(labels, list(state)) for labels, state in self._values.items()]
+        for labels, state in values:
+            cumulative = 0.0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                yield _series(f"{self.name}_bucket", bucket_labels, labels + (bound,)), cumulative
+            yield _series(f"{self.name}_sum", self.labelnames, labels), state[-2]
+            yield _series(f"{self.name}_count", self.labelnames, labels), state[-1]
+
+
+def _sort_key(series: str) -> tuple:
+    """Keep each histogram's series together with its buckets in ascending order"""
+    name, _, labels = series.partition("{")
+    le = float("inf")
+    if 'le="' in labels:
+        head, _, rest = labels.partition('le="')
+        bound, _, tail = rest.partition('"')
+        le = float(bound)
+        labels = head + tail
+    return labels.rstrip("}").rstrip(","), name.endswith("_count"), name.endswith("_sum"), le
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._flushed: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._flush_lock = asyncio.Lock()
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def _shared_samples(self) -> Dict[str, float]:
+        return {
+            series: value
+            for metric in self._metrics if metric.kind != "gauge"
+            for series, value in metric.samples()
+        }
+
+    def _gauge_samples(self, local: bool) -> Dict[str, float]:
+        return {
+            series: value
+            for metric in self._metrics if metric.kind == "gauge" and metric.local == local
+            for series, value in metric.samples()
+        }
+
+    def _write(self, deltas: Dict[str, float], gauges: Dict[str, float]) -> None:
+        # Imported here: the Redis client is itself instrumented with these metrics
+        from src.db.redis import redis_service
+
+        ttl = max(int(Config.METRICS_FLUSH_SECONDS * 3), 1)
+        gauge_key = f"metrics:gauges:{self.worker}"
+        # MULTI/EXEC, so the increments are applied all together or not at all
+        pipe = redis_service.client.pipeline(transaction=True)
+        for series, delta in deltas.items():
+            pipe.hincrbyfloat(_TOTALS_KEY, series, delta)
+        pipe.delete(gauge_key)
+        if gauges:
+            pipe.hset(gauge_key, mapping=gauges)
+            pipe.expire(gauge_key, ttl)
+        now = time.time()
+        pipe.zadd(_WORKERS_KEY, {self.worker: now})
+        pipe.zremrangebyscore(_WORKERS_KEY, 0, now - ttl)
+        pipe.execute()
+
+    async def flush(self) -> None:
+        """Send this process's increments since the last flush, and its gauges, to Redis"""
+        async with self._flush_lock:
+            current = self._shared_samples()
+            gauges = self._gauge_samples(local=False)
+            deltas = {
+                series: value - self._flushed.get(series, 0.0)
+                for series, value in current.items()
+                if value != self._flushed.get(series, 0.0)
+            }
+            try:
+                await asyncio.to_thread(self._write, deltas, gauges)
+            except RedisError as e:
+                # Unsent increments stay pending until the next flush
+                logger.warning(f"Could not flush metrics: {str(e)}")
+                return
+            self._flushed = current
+
+    def _read(self) -> Dict[str, float]:
+        from src.db.redis import redis_service
+
+        client = redis_service.client
+        values = {series: float(value) for series, value in client.hgetall(_TOTALS_KEY).items()}
+        cutoff = time.time() - max(Config.METRICS_FLUSH_SECONDS * 3, 1)
+        workers = client.zrangebyscore(_WORKERS_KEY, cutoff, "+inf")
+        pipe = client.pipeline(transaction=False)
+        for worker in workers:
+            pipe.hgetall(f"metrics:gauges:{worker}")
+        for gauges in pipe.execute():
+            values.update((series, float(value)) for series, value in gauges.items())
+        return values
+
+    async def _collect(self) -> Dict[str, float]:
+        """Series from every live process, or only this one when Redis is unavailable"""
+        await self.flush()
+        try:
+            values = await asyncio.to_thread(self._read)
+        except RedisError as e:
+            logger.warning(f"Metrics store unavailable, reporting this worker only: {str(e)}")
+            values = self._shared_samples()
+            values.update(self._gauge_samples(local=False))
+        values.update(self._gauge_samples(local=True))
+        return values
+
+    async def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        values = await self._collect()
+        families: Dict[str, List[str]] = {}
+        owner = {name: metric for metric in self._metrics for name in metric.series_names()}
+        for series in values:
+            metric = owner.get(series.partition("{")[0])
+            if metric is not None:
+                families.setdefault(metric.name, []).append(series)
+
+        lines: List[str] = []
+        for metric in self._metrics:
+            series_list = families.get(metric.name)
+            if not series_list:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for series in sorted(series_list, key=_sort_key):
+                lines.append(f"{series} {_format(values[series])}")
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> None:
+        """Start the periodic flush and the event-loop lag probe in the running loop"""
+        if self._tasks or not Config.METRICS_ENABLED:
+            return
+        self._tasks = [asyncio.create_task(self._flush_forever()), asyncio.create_task(_probe_event_loop_lag())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks:
+            await self.flush()
+        self._tasks = []
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(Config.METRICS_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep flushing; a dead task would silently stop this worker reporting
+                logger.error(f"Metrics flush failed: {str(e)}", exc_info=True)
+
+
+registry = MetricsRegistry()
+
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer callback",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+event_loop_lag_last = Gauge("event_loop_lag_last_seconds", "Most recent event loop lag measurement")
+
+
+async def _probe_event_loop_lag() -> None:
+    """Sleep for a fixed interval and record how much later than asked the loop woke us"""
+    loop = asyncio.get_running_loop()
+    interval = Config.EVENT_LOOP_LAG_INTERVAL_SECONDS
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        event_loop_lag_seconds.observe(lag)
+        event_loop_lag_last.set(lag)
+
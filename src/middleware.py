@@ -0,0 +1,85 @@
+import time
+import uuid
+from fastapi import FastAPI, Request
+from src.db.instrumentation import start_request_stats, reset_request_stats, get_request_stats
+from src.config import Config
+from src.idempotency import idempotency_middleware
+from src.log_config import request_id_var
+from src.profiling import profiling_middleware
+from src.tracing import SERVER, start_span
+from src.metrics import Counter, Gauge, Histogram
+
+http_requests_total = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_seconds = Histogram("http_request_seconds", "HTTP request latency by route", ("method", "route"))
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled")
+
+
+def register_middleware(app: FastAPI) -> None:
+    """Attach the application's HTTP middleware"""
+
+    @app.middleware("http")
+    async def query_stats_middleware(request: Request, call_next):
+        """Count SQL statements per request and report them in Server-Timing"""
+        token = start_request_stats(f"{request.method} {request.url.path}")
+        try:
+            stats = get_request_stats()
+            response = await call_next(request)
+            response.headers.append("Server-Timing", stats.server_timing())
+            return response
+        finally:
+            reset_request_stats(token)
+
+    # Not installed unless enabled, so it costs nothing when off
+    if Config.PROFILING_ENABLED:
+        app.middleware("http")(profiling_middleware)
+
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        """Count requests and time them per route template, so path parameters do not become labels"""
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            http_requests_in_flight.dec()
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_seconds.observe(time.perf_counter() - start, request.method, path)
+            http_requests_total.inc(request.method, path, status)
+
+    # Registered after the others so it is outside them: replays skip the rest of the stack
+    app.middleware("http")(idempotency_middleware)
+
+    if Config.TRACING_ENABLED:
+        @app.middleware("http")
+        async def tracing_middleware(request: Request, call_next):
+            """Root span of the request, continuing the caller's trace when it sent a traceparent"""
+            span = start_span(f"{request.method} {request.url.path}", SERVER, root=True,
+                              parent=request.headers.get("traceparent"),
+                              attributes={"http.request.method": request.method, "url.path": request.url.path})
+            with span:
+                response = await call_next(request)
+                route = getattr(request.scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{request.method} {route}"
+                    span.set_attribute("http.route", route)
+                span.set_attribute("http.response.status_code", response.status_code)
+                span.set_attribute("request_id", request_id_var.get())
+                if response.status_code >= 500:
+                    span.set_error(f"HTTP {response.status_code}")
+                return response
+
+    @app.middleware("http")
+    async def request_id_middleware(request: Request, call_next):
+        """Tag every log line written for the request with its id, and echo the id back"""
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        try:
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = request_id
+            return response
+        finally:
+            request_id_var.reset(token)
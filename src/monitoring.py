@@ -0,0 +1,48 @@
+import hmac
+import logging
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func, select
+
+from src.authservice.dependencies import get_token_from_header
+from src.config import Config
+from src.db.main import AsyncSessionLocal
+from src.db.models import EmailOutbox, NotificationDigestItem, OutboxStatus
+from src.metrics import Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+monitoring_router = APIRouter()
+
+# Database backlogs are the same for every worker, so only the scraping worker reports them
+outbox_backlog = Gauge("email_outbox_backlog", "Outbox emails not yet sent, by status", ("status",), local=True)
+digest_backlog = Gauge("notification_digest_backlog", "Notifications waiting for their digest", local=True)
+
+
+async def _update_backlogs() -> None:
+    try:
+        async with AsyncSessionLocal() as session:
+            counts = dict((await session.execute(
+                select(EmailOutbox.status, func.count())
+                .where(EmailOutbox.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]))
+                .group_by(EmailOutbox.status)
+            )).all())
+            digest_items = await session.scalar(select(func.count()).select_from(NotificationDigestItem))
+    except Exception as e:
+        logger.warning(f"Could not read outbox backlog: {str(e)}")
+        return
+    for outbox_status in (OutboxStatus.PENDING, OutboxStatus.SENDING):
+        outbox_backlog.set(counts.get(outbox_status, 0), outbox_status.value)
+    digest_backlog.set(digest_items or 0)
+
+
+@monitoring_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint, aggregated over all workers"""
+    if Config.METRICS_TOKEN:
+        token = await get_token_from_header(request)
+        if not token or not hmac.compare_digest(token, Config.METRICS_TOKEN):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    await _update_backlogs()
+    return PlainTextResponse(await registry.render(), media_type="text/plain; version=0.0.4")
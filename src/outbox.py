@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import Config
+from src.db.models import EmailOutbox, NotificationDigestItem, OutboxStatus, current_time
+from src.tracing import current_traceparent
+
+# Email kinds; src.email_templates.EMAIL_TEMPLATES maps each to its subject and body template
+EMAIL_WELCOME = "welcome"
+EMAIL_SERIAL_TOKEN = "serial_token"
+EMAIL_ADMISSION_APPROVED = "admission_approved"
+EMAIL_ADMISSION_DECLINED = "admission_declined"
+EMAIL_DIGEST = "digest"
+
+# Kinds that may wait for the recipient's next digest; anything else (credentials,
+# serial tokens) is urgent and always goes straight to the outbox
+DIGEST_KINDS = frozenset({EMAIL_ADMISSION_APPROVED, EMAIL_ADMISSION_DECLINED})
+
+
+def _digested(kind: str) -> bool:
+    return Config.NOTIFICATION_DIGEST_WINDOW_SECONDS > 0 and kind in DIGEST_KINDS
+
+
+def enqueue_email(session: AsyncSession, kind: str, recipient: str, **payload: Any) -> None:
+    """Add an email to the outbox, or to the digest buffer; it is sent only if the session's transaction commits"""
+    if _digested(kind):
+        session.add(NotificationDigestItem(kind=kind, recipient=recipient, payload=payload))
+    else:
+        session.add(EmailOutbox(kind=kind, recipient=recipient, payload=payload, traceparent=current_traceparent()))
+
+
+async def enqueue_emails(session: AsyncSession, kind: str, messages: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """Add many (recipient, payload) emails of one kind to the outbox in a single INSERT"""
+    now = current_time()
+    if _digested(kind):
+        rows = [dict(kind=kind, recipient=recipient, payload=payload, created_at=now) for recipient, payload in messages]
+        if rows:
+            await session.execute(insert(NotificationDigestItem), rows)
+        return
+    traceparent = current_traceparent()
+    rows = [
+        dict(kind=kind, recipient=recipient, payload=payload, status=OutboxStatus.PENDING,
+             attempts=0, next_attempt_at=now, created_at=now, traceparent=traceparent)
+        for recipient, payload in messages
+    ]
+    if rows:
+        await session.execute(insert(EmailOutbox), rows)
+
+
+async def flush_digests(session: AsyncSession, before: datetime) -> int:
+    """Move every digest item created before `before` into one outbox email per recipient.
+
+    A single statement: the items are deleted and their payloads aggregated by
+    recipient into the inserted digest rows, so the buffer can never be both
+    emptied and not sent. Returns the number of digest emails queued.
+    """
+    drained = (
+        delete(NotificationDigestItem)
+        .where(NotificationDigestItem.created_at < before)
+        .returning(NotificationDigestItem.recipient, NotificationDigestItem.kind,
+                   NotificationDigestItem.payload, NotificationDigestItem.created_at)
+        .cte("drained")
+    )
+    item = func.json_build_object(
+        "kind", drained.c.kind, "payload", drained.c.payload, "created_at", drained.c.created_at
+    )
+    now = current_time()
+    digests = (
+        select(
+            literal(EMAIL_DIGEST, EmailOutbox.kind.type),
+            drained.c.recipient,
+            func.json_build_object("items", func.json_agg(aggregate_order_by(item, drained.c.created_at))),
+            literal(OutboxStatus.PENDING, EmailOutbox.status.type),
+            literal(0, EmailOutbox.attempts.type),
+            literal(now, EmailOutbox.next_attempt_at.type),
+            literal(now, EmailOutbox.created_at.type),
+            literal(current_traceparent(), EmailOutbox.traceparent.type),
+        )
+        .group_by(drained.c.recipient)
+    )
+    result = await session.execute(
+        insert(EmailOutbox)
+        .from_select(["kind", "recipient", "payload", "status", "attempts", "next_attempt_at", "created_at",
+                      "traceparent"], digests)
+        .returning(EmailOutbox.id)
+    )
+    return len(result.all())
@@ -0,0 +1,237 @@
+"""Delivery worker for the email outbox.
+
+Runs as its own process, next to the API workers:
+
+    python -m src.outbox_worker
+
+Due rows are claimed with SKIP LOCKED, so several workers can run at once.
+A claimed row is leased for OUTBOX_LEASE_SECONDS; if the worker dies before
+recording the outcome, another worker picks the row up after the lease. An
+email can therefore be sent twice, never zero times.
+
+With NOTIFICATION_DIGEST_WINDOW_SECONDS set, the worker also turns buffered
+notifications into digest emails once their window has closed. Windows are
+aligned to the clock, so every worker agrees on where they end. If the window
+is set back to 0, notifications still buffered are all sent as digests.
+"""
+import asyncio
+import logging
+import random
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_, select, update
+
+from src.config import Config
+from src.db.main import AsyncSessionLocal, async_engine
+from src.db.models import EmailOutbox, OutboxStatus
+from src.email_templates import email_templates
+from src.log_config import setup_logging
+from src.mail import send_email
+from src.metrics import registry as metrics_registry
+from src.outbox import flush_digests
+from src.smtp_pool import smtp_pool
+from src.tracing import CONSUMER, exporter, start_span
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at OUTBOX_BACKOFF_MAX_SECONDS"""
+    ceiling = min(Config.OUTBOX_BACKOFF_MAX_SECONDS, Config.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class OutboxWorker:
+    def __init__(self):
+        self._stopping = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(Config.OUTBOX_CONCURRENCY)
+        self._next_digest_check = 0.0
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(
+            "Outbox worker started: batch %d, concurrency %d, max attempts %d",
+            Config.OUTBOX_BATCH_SIZE, Config.OUTBOX_CONCURRENCY, Config.OUTBOX_MAX_ATTEMPTS
+        )
+        while not self._stopping.is_set():
+            try:
+                await self._maybe_flush_digests()
+                claimed = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Outbox poll failed: {str(e)}", exc_info=True)
+                claimed = 0
+            # A full batch means more are probably due; otherwise wait for new rows
+            if claimed < Config.OUTBOX_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), Config.OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info(f"Outbox worker stopped: {smtp_pool.stats()}")
+
+    async def _maybe_flush_digests(self) -> None:
+        if time.monotonic() < self._next_digest_check:
+            return
+        self._next_digest_check = time.monotonic() + Config.NOTIFICATION_DIGEST_CHECK_SECONDS
+        # Still checked with digests off, so items buffered before they were turned off are sent
+        await self.flush_digests(Config.NOTIFICATION_DIGEST_WINDOW_SECONDS)
+
+    async def flush_digests(self, window: int) -> int:
+        """Queue digests for every closed window (all buffered items when window is 0); returns how many"""
+        now = datetime.now(timezone.utc)
+        if window > 0:
+            window_start = datetime.fromtimestamp(int(now.timestamp()) // window * window, tz=timezone.utc)
+        else:
+            window_start = now
+        # Digest emails are queued under this span, so their delivery joins its trace
+        with start_span("outbox.flush_digests", root=True) as span:
+            async with AsyncSessionLocal() as session:
+                queued = await flush_digests(session, window_start)
+                await session.commit()
+            span.set_attribute("outbox.digests", queued)
+        if queued:
+            logger.info(f"Queued {queued} digest emails for notifications before {window_start.isoformat()}")
+        return queued
+
+    async def drain_once(self) -> int:
+        """Claim one batch of due emails, send them and record the outcomes; returns the batch size"""
+        messages = await self._claim()
+        if not messages:
+            return 0
+        rendered, undeliverable = await self._render(messages)
+        sendable = [message for message in messages if message.id in rendered]
+        results = await asyncio.gather(*(self._send(message, rendered[message.id]) for message in sendable))
+        send_errors = dict(zip((message.id for message in sendable), results))
+        errors = [send_errors[message.id] if message.id in rendered else undeliverable[message.id] for message in messages]
+        await self._record(messages, errors, set(undeliverable))
+        return len(messages)
+
+    async def _render(self, messages: list) -> Tuple[Dict[int, Tuple[str, str]], Dict[int, str]]:
+        """Render the batch one template at a time; returns id -> (subject, html) and id -> error"""
+        rendered: Dict[int, Tuple[str, str]] = {}
+        undeliverable: Dict[int, str] = {}
+        by_kind: Dict[str, list] = {}
+        for message in messages:
+            if message.kind in email_templates:
+                by_kind.setdefault(message.kind, []).append(message)
+            else:
+                undeliverable[message.id] = f"Unknown email kind {message.kind!r}"
+
+        for kind, group in by_kind.items():
+            contexts = [message.payload or {} for message in group]
+            try:
+                results = await email_templates.render_batch(kind, contexts)
+            except Exception:
+                # Find the payloads that cannot be rendered and render the rest
+                results = []
+                for message, context in zip(group, contexts):
+                    try:
+                        results.append(email_templates.render(kind, context))
+                    except Exception as e:
+                        results.append(None)
+                        undeliverable[message.id] = f"Template error: {type(e).__name__}: {e}"
+            for message, result in zip(group, results):
+                if result is not None:
+                    rendered[message.id] = result
+        return rendered, undeliverable
+
+    async def _claim(self) -> list:
+        now = datetime.now(timezone.utc)
+        due = (
+            select(EmailOutbox.id)
+            .where(or_(
+                and_(EmailOutbox.status == OutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+                and_(EmailOutbox.status == OutboxStatus.SENDING, EmailOutbox.locked_until < now)
+            ))
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(Config.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .cte("due")
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id == due.c.id)
+                .values(
+                    status=OutboxStatus.SENDING,
+                    locked_until=now + timedelta(seconds=Config.OUTBOX_LEASE_SECONDS),
+                    attempts=EmailOutbox.attempts + 1
+                )
+                .returning(EmailOutbox.id, EmailOutbox.kind, EmailOutbox.recipient, EmailOutbox.payload,
+                           EmailOutbox.attempts, EmailOutbox.traceparent)
+                .execution_options(synchronize_session=False)
+            )
+            messages = result.all()
+            await session.commit()
+        return messages
+
+    async def _send(self, message, rendered: Tuple[str, str]) -> Optional[str]:
+        """Send one email; returns the error, or None once it was handed to the mail server"""
+        subject, html = rendered
+        attributes = {"outbox.id": message.id, "outbox.kind": message.kind, "outbox.attempt": message.attempts}
+        # Continues the trace of the request that queued the email, if it was sampled
+        with start_span("outbox.deliver", CONSUMER, attributes, parent=message.traceparent) as span:
+            async with self._semaphore:
+                try:
+                    await asyncio.wait_for(send_email(message.recipient, subject, html), Config.OUTBOX_SEND_TIMEOUT_SECONDS)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    span.set_error(error)
+                    return error
+        return None
+
+    async def _record(self, messages: list, errors: List[Optional[str]], undeliverable: Set[int]) -> None:
+        now = datetime.now(timezone.utc)
+        rows: List[Dict] = []
+        for message, error in zip(messages, errors):
+            if error is None:
+                # The payload can hold a temporary password; it is not kept after delivery
+                rows.append(dict(id=message.id, status=OutboxStatus.SENT, sent_at=now, payload=None,
+                                 locked_until=None, last_error=None))
+            elif message.attempts >= Config.OUTBOX_MAX_ATTEMPTS or message.id in undeliverable:
+                logger.error(f"Giving up on {message.kind} email {message.id} after {message.attempts} attempts: {error}")
+                rows.append(dict(id=message.id, status=OutboxStatus.FAILED, locked_until=None, last_error=error))
+            else:
+                logger.warning(f"{message.kind} email {message.id} failed (attempt {message.attempts}): {error}")
+                rows.append(dict(
+                    id=message.id, status=OutboxStatus.PENDING, locked_until=None, last_error=error,
+                    next_attempt_at=now + timedelta(seconds=backoff_delay(message.attempts))
+                ))
+
+        # Rows differ in their keys, so group them for executemany
+        groups: Dict[tuple, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        async with AsyncSessionLocal() as session:
+            for group in groups.values():
+                await session.execute(update(EmailOutbox), group)
+            await session.commit()
+
+        sent = sum(1 for error in errors if error is None)
+        rate = smtp_pool.stats()["recent_messages_per_second"]
+        logger.info(f"Outbox batch: {sent} sent, {len(messages) - sent} failed, {rate:.1f} msg/s over the last minute")
+
+
+async def main() -> None:
+    email_templates.load()
+    worker = OutboxWorker()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    metrics_registry.start()
+    try:
+        await worker.run()
+    finally:
+        await metrics_registry.stop()
+        await smtp_pool.close()
+        await async_engine.dispose()
+        exporter.shutdown()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(main())
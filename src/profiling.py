@@ -0,0 +1,205 @@
+"""Opt-in profiling of single requests.
+
+With PROFILING_ENABLED, a request is profiled when a SUPER_ADMIN sends
+``X-Profile: 1`` or when it falls within PROFILE_SAMPLE_RATE. When profiling
+is disabled the middleware is not installed at all.
+
+Two profilers are available (PROFILE_MODE):
+
+- ``sampling``: a background thread records the event loop thread's stack every
+  PROFILE_INTERVAL_MS. Output is collapsed stacks, ready for flamegraph.pl or
+  speedscope. Overhead is small and does not depend on how many calls are made.
+- ``cprofile``: deterministic cProfile. Output is the pstats table and the raw
+  pstats data, loadable with ``pstats.Stats``. Every call is traced, so the
+  measured request runs noticeably slower.
+
+Both observe the whole event loop thread while the request runs, so other
+requests interleaved on the same worker appear in the profile as well. Only
+one request per worker is profiled at a time.
+
+Profiles are kept in Redis for PROFILE_TTL_SECONDS. The response carries
+``X-Profile-Id`` and the profile is read back from /admin/profiles.
+"""
+import asyncio
+import base64
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from src.authservice.dependencies import get_token_from_header, verify_and_decode_token
+from src.config import Config
+from src.db.redis import redis_service
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_RECENT_KEY = "profiles:recent"
+_STATS_LINES = 50
+_busy = threading.Lock()
+
+
+def _profile_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """`frame;frame;frame count` lines, most frequent first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common(Config.PROFILE_MAX_STACKS))
+
+
+async def _should_profile(request: Request) -> Optional[str]:
+    """Why this request is profiled ("header" or "sample"), or None"""
+    if request.headers.get(PROFILE_HEADER):
+        token = await get_token_from_header(request)
+        payload = await verify_and_decode_token(token) if token else None
+        if payload and payload.get("role") == "SUPER_ADMIN":
+            return "header"
+    if Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def _save(profile: Dict[str, Any]) -> None:
+    try:
+        pipe = redis_service.client.pipeline(transaction=False)
+        pipe.setex(_profile_key(profile["id"]), Config.PROFILE_TTL_SECONDS, json.dumps(profile))
+        pipe.lpush(_RECENT_KEY, profile["id"])
+        pipe.ltrim(_RECENT_KEY, 0, Config.PROFILE_KEEP - 1)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not store request profile: {str(e)}")
+
+
+async def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    raw = await asyncio.to_thread(redis_service.client.get, _profile_key(profile_id))
+    return json.loads(raw) if raw else None
+
+
+async def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Summaries of the most recent profiles that have not expired, newest first"""
+    return await asyncio.to_thread(_recent_profiles, limit)
+
+
+def _recent_profiles(limit: int) -> List[Dict[str, Any]]:
+    ids = redis_service.client.lrange(_RECENT_KEY, 0, limit - 1)
+    if not ids:
+        return []
+    summaries = []
+    for raw in redis_service.client.mget([_profile_key(profile_id) for profile_id in ids]):
+        if raw:
+            profile = json.loads(raw)
+            profile.pop("collapsed", None)
+            profile.pop("stats", None)
+            profile.pop("pstats", None)
+            summaries.append(profile)
+    return summaries
+
+
+async def profiling_middleware(request: Request, call_next):
+    """Run the request under the configured profiler when asked to"""
+    reason = await _should_profile(request)
+    if reason is None or not _busy.acquire(blocking=False):
+        return await call_next(request)
+
+    mode = Config.PROFILE_MODE
+    sampler = None
+    profiler = None
+    try:
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(threading.get_ident(), Config.PROFILE_INTERVAL_MS / 1000)
+            sampler.start()
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.stop()
+    finally:
+        _busy.release()
+
+    route = request.scope.get("route")
+    profile: Dict[str, Any] = {
+        "id": uuid.uuid4().hex,
+        "mode": mode,
+        "reason": reason,
+        "method": request.method,
+        "path": request.url.path,
+        "route": getattr(route, "path", None),
+        "status": response.status_code,
+        "duration_ms": round(elapsed * 1000, 3),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if sampler is not None:
+        profile["samples"] = sampler.samples
+        profile["collapsed"] = sampler.collapsed()
+    else:
+        profiler.create_stats()
+        # Dumped first: pstats.Stats takes over and empties profiler.stats
+        profile["pstats"] = base64.b64encode(marshal.dumps(profiler.stats)).decode()
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(_STATS_LINES)
+        profile["stats"] = report.getvalue()
+    # Off the loop: encoding and storing a large profile would delay the response being measured
+    await asyncio.to_thread(_save, profile)
+    logger.info(f"Profiled {request.method} {profile['route'] or request.url.path} "
+                f"({reason}, {mode}) in {profile['duration_ms']:.1f} ms as {profile['id']}")
+
+    response.headers[PROFILE_ID_HEADER] = profile["id"]
+    return response
@@ -0,0 +1,16 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSON response that serializes Pydantic models in a single pydantic-core pass.
+
+    Routes return ``PydanticJSONResponse(model)`` directly, which skips FastAPI's
+    ``jsonable_encoder`` walk; other content falls back to ``json.dumps``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return super().render(content)
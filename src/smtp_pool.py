@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from email.message import EmailMessage
+from typing import Deque, Dict, Optional
+
+import aiosmtplib
+
+from src.config import Config
+from src.metrics import Counter, Gauge
+from src.tracing import CLIENT, start_span
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection cannot be trusted for another message
+_CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+# Window for the recent messages/sec figure
+_RATE_WINDOW_SECONDS = 60.0
+
+
+class _Connection:
+    __slots__ = ("smtp", "sent", "last_used")
+
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """A few authenticated SMTP sessions shared by every send in the process.
+
+    Connecting, STARTTLS and AUTH happen once per connection instead of once
+    per message. A connection is replaced after MAIL_POOL_MAX_MESSAGES
+    messages, or when it was idle longer than MAIL_POOL_IDLE_SECONDS, since
+    servers drop quiet sessions. A send that fails on a broken connection is
+    retried once on a fresh one.
+    """
+
+    def __init__(self):
+        self._idle: Deque[_Connection] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._started = time.monotonic()
+        self._recent: Deque[float] = deque()
+        self.sent = 0
+        self.failed = 0
+        self.connects = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(Config.MAIL_POOL_SIZE)
+        return self._slots
+
+    async def _connect(self) -> _Connection:
+        smtp = aiosmtplib.SMTP(
+            hostname=Config.MAIL_SERVER,
+            port=Config.MAIL_PORT,
+            username=Config.MAIL_USERNAME if Config.USE_CREDENTIALS else None,
+            password=Config.MAIL_PASSWORD if Config.USE_CREDENTIALS else None,
+            use_tls=Config.MAIL_SSL_TLS,
+            start_tls=Config.MAIL_STARTTLS,
+            validate_certs=Config.VALIDATE_CERTS,
+            timeout=Config.MAIL_TIMEOUT_SECONDS,
+        )
+        await smtp.connect()
+        self.connects += 1
+        return _Connection(smtp)
+
+    async def _discard(self, connection: _Connection) -> None:
+        try:
+            if connection.smtp.is_connected:
+                await asyncio.wait_for(connection.smtp.quit(), Config.MAIL_TIMEOUT_SECONDS)
+        except Exception:
+            connection.smtp.close()
+
+    async def _checkout(self) -> _Connection:
+        """Take a usable idle connection or open a new one; the caller holds a pool slot"""
+        while self._idle:
+            connection = self._idle.pop()
+            idle_for = time.monotonic() - connection.last_used
+            if connection.smtp.is_connected and idle_for < Config.MAIL_POOL_IDLE_SECONDS:
+                return connection
+            await self._discard(connection)
+        return await self._connect()
+
+    def _checkin(self, connection: _Connection) -> None:
+        connection.last_used = time.monotonic()
+        if connection.sent >= Config.MAIL_POOL_MAX_MESSAGES:
+            asyncio.ensure_future(self._discard(connection))
+        else:
+            self._idle.append(connection)
+
+    async def send(self, message: EmailMessage) -> None:
+        with start_span("smtp send", CLIENT, {"server.address": Config.MAIL_SERVER, "server.port": Config.MAIL_PORT}):
+            async with self._semaphore():
+                for attempt in range(2):
+                    connection = await self._checkout()
+                    try:
+                        await connection.smtp.send_message(message)
+                    except _CONNECTION_ERRORS as e:
+                        await self._discard(connection)
+                        if attempt:
+                            self.failed += 1
+                            raise
+                        logger.info(f"SMTP connection lost ({type(e).__name__}), reconnecting")
+                        continue
+                    except Exception:
+                        # Refused recipient or similar: the message failed, the session is fine
+                        self.failed += 1
+                        self._checkin(connection)
+                        raise
+                    except BaseException:
+                        # Cancelled mid-send (e.g. a wait_for timeout): the session state is unknown
+                        connection.smtp.close()
+                        raise
+                    connection.sent += 1
+                    self._checkin(connection)
+                    self._count_sent()
+                    return
+
+    def _count_sent(self) -> None:
+        now = time.monotonic()
+        self.sent += 1
+        self._recent.append(now)
+        while self._recent and self._recent[0] < now - _RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+
+    def stats(self) -> Dict[str, float]:
+        """Delivery counters and throughput, overall and over the last minute"""
+        now = time.monotonic()
+        while self._recent and self._recent[0] < now - _RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+        elapsed = now - self._started
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "connects": self.connects,
+            "idle_connections": len(self._idle),
+            "messages_per_second": self.sent / elapsed if elapsed else 0.0,
+            "recent_messages_per_second": len(self._recent) / min(elapsed, _RATE_WINDOW_SECONDS) if elapsed else 0.0,
+        }
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+smtp_pool = SMTPConnectionPool()
+Counter("smtp_messages_sent_total", "Messages accepted by the mail server", function=lambda: smtp_pool.sent)
+Counter("smtp_messages_failed_total", "Messages that could not be sent", function=lambda: smtp_pool.failed)
+Counter("smtp_connections_opened_total", "SMTP sessions opened", function=lambda: smtp_pool.connects)
+Gauge("smtp_idle_connections", "Open SMTP sessions waiting for a message", function=lambda: len(smtp_pool._idle))
@@ -0,0 +1,292 @@
+"""Request tracing exported as OpenTelemetry (OTLP/JSON) spans.
+
+Sampling is decided once, when a trace starts: an incoming W3C ``traceparent``
+header is honoured, otherwise TRACE_SAMPLE_RATE of requests are traced. Inside
+an unsampled request every ``start_span`` returns a shared no-op span, so the
+cost is one context variable lookup. With TRACING_ENABLED off, nothing is
+wrapped or installed at all.
+
+Finished spans are queued and exported in batches by a background thread.
+They are POSTed to TRACE_EXPORT_ENDPOINT (an OTLP/HTTP collector, e.g.
+http://localhost:4318/v1/traces) and/or appended as one OTLP JSON document
+per line to TRACE_EXPORT_FILE.
+
+Work that leaves the request carries its ``traceparent`` string. The outbox
+worker continues an email's trace with it. Ingestion batches link to the
+traces of the submissions they persist.
+"""
+import atexit
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.config import Config
+from src.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+PRODUCER = 4
+CONSUMER = 5
+
+_STATUS_UNSET = 0
+_STATUS_ERROR = 2
+
+_spans_dropped = Counter("trace_spans_dropped_total", "Finished spans discarded because the export queue was full")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end_time", "attributes",
+                 "status", "status_message", "links", "_token")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int,
+                 attributes: Optional[Dict[str, Any]], links: List[Tuple[str, str]]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end_time = 0
+        self.attributes = attributes or {}
+        self.status = _STATUS_UNSET
+        self.status_message = ""
+        self.links = links
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = _STATUS_ERROR
+        self.status_message = message
+
+    def end(self) -> None:
+        if not self.end_time:
+            self.end_time = time.time_ns()
+            exporter.submit(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.set_error(f"{exc_type.__name__}: {exc}")
+        self.end()
+
+
+class _NoopSpan:
+    """Stands in for every span of an unsampled trace"""
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a W3C traceparent header"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3][:2], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def start_span(name: str, kind: int = INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+               parent: Optional[str] = None, root: bool = False, links: Iterable[Optional[str]] = ()):
+    """A child of `parent` (a traceparent), of the current span, or a new trace when `root` is set.
+
+    Returns NOOP_SPAN when the trace is not sampled. A span with no parent
+    whose `links` include a sampled trace is always recorded, so a batch that
+    serves sampled requests shows up in their traces.
+    """
+    if not Config.TRACING_ENABLED:
+        return NOOP_SPAN
+    context = parse_traceparent(parent)
+    if context is not None:
+        trace_id, parent_id, sampled = context
+        return Span(name, trace_id, parent_id, kind, attributes, []) if sampled else NOOP_SPAN
+    current = _current_span.get()
+    if current is not None:
+        return Span(name, current.trace_id, current.span_id, kind, attributes, [])
+    linked = [context for context in map(parse_traceparent, links) if context and context[2]]
+    if linked or (root and random.random() < Config.TRACE_SAMPLE_RATE):
+        return Span(name, os.urandom(16).hex(), None, kind, attributes, [(t, s) for t, s, _ in linked])
+    return NOOP_SPAN
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the active span, to hand work to another process or task"""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+def trace_methods(cls):
+    """Class decorator: a span around every public coroutine method, named Class.method"""
+    if not Config.TRACING_ENABLED:
+        return cls
+    for attribute, method in list(vars(cls).items()):
+        if attribute.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, attribute, _traced(f"{cls.__name__}.{attribute}", method))
+    return cls
+
+
+def _traced(name: str, function):
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return await function(*args, **kwargs)
+        with start_span(name):
+            return await function(*args, **kwargs)
+    return wrapper
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def _otlp(spans: List[Span]) -> Dict[str, Any]:
+    """An OTLP ExportTraceServiceRequest in its JSON encoding"""
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": [_attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": span.status, "message": span.status_message} if span.status else {},
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.links:
+            item["links"] = [{"traceId": trace_id, "spanId": span_id} for trace_id, span_id in span.links]
+        encoded.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", Config.TRACE_SERVICE_NAME),
+                                    _attribute("process.pid", os.getpid())]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": encoded}],
+    }]}
+
+
+class SpanExporter:
+    """Batches finished spans on a daemon thread and ships them to the collector and/or file"""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=Config.TRACE_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            _spans_dropped.inc()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self) -> None:
+        while True:
+            stopping = self._stopping.is_set()
+            batch: List[Span] = []
+            while len(batch) < Config.TRACE_EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._export(batch)
+            if stopping and self._queue.empty():
+                return
+            if len(batch) < Config.TRACE_EXPORT_BATCH_SIZE:
+                self._stopping.wait(Config.TRACE_EXPORT_INTERVAL_SECONDS)
+
+    def _export(self, batch: List[Span]) -> None:
+        body = json.dumps(_otlp(batch))
+        if Config.TRACE_EXPORT_FILE:
+            try:
+                with open(Config.TRACE_EXPORT_FILE, "a") as file:
+                    file.write(body + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write {len(batch)} spans to {Config.TRACE_EXPORT_FILE}: {str(e)}")
+        if Config.TRACE_EXPORT_ENDPOINT:
+            request = urllib.request.Request(
+                Config.TRACE_EXPORT_ENDPOINT, data=body.encode(), headers={"Content-Type": "application/json"}
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=10):
+                    pass
+            except Exception as e:
+                logger.warning(f"Could not export {len(batch)} spans to {Config.TRACE_EXPORT_ENDPOINT}: {str(e)}")
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Export what is queued and stop the thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join(timeout)
+        self._thread = None
+
+
+exporter = SpanExporter()